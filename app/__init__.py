@@ -1,10 +1,15 @@
 """app flask"""
 
 
-from flask import Flask
+def create_app():
+    """Функция создания приложения.
 
+    Модули API импортируются при вызове, поэтому импорт пакета app не
+    загружает Flask приложение и хранилище.
 
-def create_app():
-    """функция создания приложения"""
-    app = Flask(__name__)
-    return app
+    Returns:
+        Flask приложение из app.api.create_app
+    """
+    from app.api import create_app as create_api_app  # pylint: disable=import-outside-toplevel
+
+    return create_api_app()
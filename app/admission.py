@@ -0,0 +1,274 @@
+"""Ограничение частоты и параллелизма запросов на запись.
+
+Всплеск POST/PUT запросов занимает общее хранилище событий и замедляет и
+чтения, поэтому запросы на запись проходят допуск:
+
+* корзина токенов (token bucket) клиента ограничивает частоту его записей;
+* общая корзина ограничивает частоту записей всего процесса;
+* шлюз параллелизма ограничивает число одновременно выполняемых записей.
+
+Клиент определяется по адресу соединения, а за доверенными обратными
+прокси - по заголовку X-Forwarded-For (client_address). Не прошедший
+допуск запрос сразу получает 429 с Retry-After. Корзины
+клиентов разнесены по полосам со своими блокировками (как блокировки дат
+в EventsLogic), а проверка - несколько арифметических операций под
+блокировкой полосы, поэтому потоки разных клиентов почти не конкурируют.
+"""
+
+import threading
+import time
+
+# Число полос корзин клиентов
+STRIPES = 64
+# Наибольшее число корзин в полосе; при превышении удаляются корзины
+# простаивающих клиентов
+MAX_CLIENTS_PER_STRIPE = 1024
+
+# Причины отказа
+REJECT_CLIENT = "client"
+REJECT_GLOBAL = "global"
+REJECT_CONCURRENCY = "concurrency"
+
+
+def client_address(remote_addr: str, forwarded_for: str = None, proxies: int = 0) -> str:
+    """Определяет адрес клиента для ограничения частоты.
+
+    За proxies доверенными прокси адрес клиента - proxies-й с конца в
+    X-Forwarded-For: каждый прокси дописывает адрес, с которого пришел
+    запрос, а записи левее мог подставить сам клиент. Если адресов
+    меньше, чем прокси, заголовок не доверяется.
+
+    Args:
+        remote_addr: Адрес соединения
+        forwarded_for: Значение заголовка X-Forwarded-For или None
+        proxies: Число доверенных прокси перед приложением
+
+    Returns:
+        str: Адрес клиента
+    """
+    if not proxies or not forwarded_for:
+        return remote_addr
+    addresses = forwarded_for.split(",")
+    if len(addresses) < proxies:
+        return remote_addr
+    return addresses[-proxies].strip() or remote_addr
+
+
+class TokenBucket:
+    """Корзина токенов: пополняется со скоростью rate, вмещает burst.
+
+    Методы вызываются под блокировкой владельца корзины.
+    """
+
+    __slots__ = ("rate", "burst", "tokens", "updated")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        """Создает полную корзину.
+
+        Args:
+            rate: Токенов в секунду
+            burst: Емкость корзины
+            now: Текущее время (time.monotonic())
+        """
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = now
+
+    def take(self, now: float) -> float:
+        """Берет токен, если он есть.
+
+        Args:
+            now: Текущее время (time.monotonic())
+
+        Returns:
+            float: 0, если токен взят, иначе время до появления токена в
+                секундах
+        """
+        tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if tokens >= 1:
+            self.tokens = tokens - 1
+            return 0.0
+        self.tokens = tokens
+        return (1 - tokens) / self.rate
+
+    def refund(self) -> None:
+        """Возвращает взятый токен."""
+        self.tokens = min(self.burst, self.tokens + 1)
+
+    def idle(self, now: float) -> bool:
+        """Проверяет, пополнилась ли корзина до краев (клиент простаивает).
+
+        Args:
+            now: Текущее время (time.monotonic())
+
+        Returns:
+            bool: True если корзину можно удалить без потери состояния
+        """
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateLimiter:
+    """Ограничение частоты по клиентам и общее для процесса."""
+
+    def __init__(
+        self,
+        rate: float = 0,
+        burst: float = None,
+        global_rate: float = 0,
+        global_burst: float = None,
+    ) -> None:
+        """Создает ограничитель.
+
+        Args:
+            rate: Запросов в секунду на клиента; 0 отключает ограничение
+            burst: Допустимый всплеск запросов клиента (по умолчанию rate)
+            global_rate: Запросов в секунду на процесс; 0 отключает
+                ограничение
+            global_burst: Допустимый всплеск запросов процесса (по
+                умолчанию global_rate)
+        """
+        self.rate = rate
+        self.burst = max(1.0, burst or rate)
+        self._stripes = [({}, threading.Lock()) for _ in range(STRIPES)]
+        self._global = None
+        self._global_lock = threading.Lock()
+        if global_rate:
+            self._global = TokenBucket(
+                global_rate, max(1.0, global_burst or global_rate), time.monotonic()
+            )
+
+    def acquire(self, client: str) -> tuple[str, float]:
+        """Берет токены клиента и процесса.
+
+        Args:
+            client: Идентификатор клиента (адрес)
+
+        Returns:
+            tuple: None, если запрос допущен, иначе причина отказа и время
+                до появления токена в секундах
+        """
+        now = time.monotonic()
+        bucket = None
+        if self.rate:
+            clients, lock = self._stripes[hash(client) % STRIPES]
+            with lock:
+                bucket = clients.get(client)
+                if bucket is None:
+                    if len(clients) >= MAX_CLIENTS_PER_STRIPE:
+                        _evict(clients, now)
+                    bucket = clients[client] = TokenBucket(self.rate, self.burst, now)
+                wait = bucket.take(now)
+            if wait:
+                return REJECT_CLIENT, wait
+        if self._global is not None:
+            with self._global_lock:
+                wait = self._global.take(now)
+            if wait:
+                if bucket is not None:
+                    # Отказ не по вине клиента не расходует его токен
+                    with lock:
+                        bucket.refund()
+                return REJECT_GLOBAL, wait
+        return None
+
+    def clients(self) -> int:
+        """Возвращает число отслеживаемых клиентов."""
+        return sum(len(clients) for clients, _ in self._stripes)
+
+
+def _evict(clients: dict[str, TokenBucket], now: float) -> None:
+    """Удаляет корзины простаивающих клиентов полосы.
+
+    Если простаивающих нет, удаляется самая старая корзина, чтобы память
+    оставалась ограниченной.
+
+    Args:
+        clients: Корзины полосы по клиентам
+        now: Текущее время (time.monotonic())
+    """
+    idle = [client for client, bucket in clients.items() if bucket.idle(now)]
+    for client in idle:
+        del clients[client]
+    if not idle:
+        del clients[next(iter(clients))]
+
+
+class ConcurrencyGate:
+    """Шлюз, ограничивающий число одновременно выполняемых записей."""
+
+    def __init__(self, limit: int) -> None:
+        """Создает шлюз.
+
+        Args:
+            limit: Наибольшее число одновременных записей
+        """
+        self.limit = limit
+        self._slots = threading.BoundedSemaphore(limit)
+
+    def enter(self) -> bool:
+        """Занимает место без ожидания.
+
+        Returns:
+            bool: True если место занято; тогда нужно вызвать leave()
+        """
+        return self._slots.acquire(blocking=False)
+
+    def leave(self) -> None:
+        """Освобождает место."""
+        self._slots.release()
+
+
+class WriteAdmission:
+    """Допуск запросов на запись: ограничение частоты и шлюз параллелизма."""
+
+    def __init__(
+        self, limiter: RateLimiter = None, gate: ConcurrencyGate = None, proxies: int = 0
+    ) -> None:
+        """Создает допуск.
+
+        Args:
+            limiter: Ограничитель частоты или None
+            gate: Шлюз параллелизма или None
+            proxies: Число доверенных прокси для client_address()
+        """
+        self.configure(limiter, gate, proxies)
+
+    def configure(
+        self, limiter: RateLimiter = None, gate: ConcurrencyGate = None, proxies: int = 0
+    ) -> None:
+        """Заменяет ограничения допуска (при создании приложения).
+
+        Args:
+            limiter: Ограничитель частоты или None
+            gate: Шлюз параллелизма или None
+            proxies: Число доверенных прокси для client_address()
+        """
+        self.limiter = limiter
+        self.gate = gate
+        self.proxies = proxies
+
+    def enter(self, client: str) -> tuple[str, float]:
+        """Проверяет, можно ли выполнить запрос на запись.
+
+        Args:
+            client: Идентификатор клиента (адрес)
+
+        Returns:
+            tuple: None, если запрос допущен (тогда по его завершении нужно
+                вызвать leave()), иначе причина отказа и рекомендуемое
+                время до повтора в секундах
+        """
+        if self.limiter is not None:
+            rejection = self.limiter.acquire(client)
+            if rejection is not None:
+                return rejection
+        if self.gate is not None and not self.gate.enter():
+            return REJECT_CONCURRENCY, 1.0
+        return None
+
+    def leave(self) -> None:
+        """Отмечает завершение допущенного запроса."""
+        if self.gate is not None:
+            self.gate.leave()
@@ -1,25 +1,304 @@
 """API для управления событиями."""
 
-from itertools import count
+import calendar
+import hmac
+import math
+import os
+import tempfile
+import time
+from collections.abc import Iterable, Iterator
+from datetime import datetime, timezone
+from itertools import count, islice
 
-from flask import Flask, render_template, request
+import click
+from flask import (
+    Flask,
+    Response,
+    g,
+    jsonify,
+    render_template,
+    request,
+    send_file,
+    stream_with_context,
+)
+from flask.cli import AppGroup
 
+from werkzeug.http import is_resource_modified
+
+import app.admission as admission
+import app.cache as cache
+import app.changes as changes
+import app.compression as compression
+import app.formats as formats
 import app.logic as logic
+import app.metrics as metrics
 import app.model as model
+import app.persistence as persistence
+import app.recurrence as recurrence
+import app.snapshot as snapshot
+import app.sqlite_store as sqlite_store
+import app.startup as startup
+import app.tenants as tenants
 
 # Константы API
 API_VERSION = "v1"
 API_ROOT = f"/api/{API_VERSION}"
 EVENTS_API_ROOT = f"{API_ROOT}/events"
+CALENDAR_API_ROOT = f"{API_ROOT}/calendar"
+RECURRING_API_ROOT = f"{API_ROOT}/recurring"
+CACHE_API_ROOT = f"{API_ROOT}/cache"
+PROFILER_API_ROOT = f"{API_ROOT}/profiler"
+SNAPSHOT_API_ROOT = f"{API_ROOT}/snapshot"
+READY_PATH = f"{API_ROOT}/ready/"
+# Маршруты календарей арендаторов: /api/v1/<calendar>/events/ и т. д.
+TENANT_ROOT = f"{API_ROOT}/<calendar>"
+TENANT_EVENTS_ROOT = f"{TENANT_ROOT}/events"
+TENANT_CALENDAR_ROOT = f"{TENANT_ROOT}/calendar"
+TENANT_RECURRING_ROOT = f"{TENANT_ROOT}/recurring"
+TENANT_SNAPSHOT_ROOT = f"{TENANT_ROOT}/snapshot"
+# Имена, совпадающие с разделами API, не могут быть именами календарей
+RESERVED_CALENDARS = frozenset(
+    ("events", "calendar", "recurring", "cache", "profiler", "ready", "snapshot")
+)
+METRICS_PATH = "/metrics"
+
+# Переменная окружения с каталогом для хранения данных; если она не задана,
+# события хранятся только в памяти процесса
+DATA_DIR_ENV = "CALENDAR_DATA_DIR"
+# Переменная окружения с путем к общей базе SQLite для запуска нескольких
+# процессов-воркеров; имеет приоритет над DATA_DIR_ENV
+SHARED_DB_ENV = "CALENDAR_SHARED_DB"
+# Переменная окружения, включающая компактное колоночное хранение событий
+COMPACT_ENV = "CALENDAR_COMPACT"
+# Переменная окружения, отключающая фоновую загрузку хранилища в
+# create_app(): хранилище загружается при первом запросе к событиям,
+# проверке готовности или вызове start_loading()
+LAZY_LOAD_ENV = "CALENDAR_LAZY_LOAD"
+# Через сколько секунд без запросов хранилище календаря арендатора
+# выгружается из памяти (0 - не выгружать); календари хранятся в
+# подкаталогах TENANTS_DIR каталога данных или в отдельных файлах SQLite
+TENANT_IDLE_ENV = "CALENDAR_TENANT_IDLE_SECONDS"
+TENANTS_DIR = "calendars"
+# Наибольшее число одновременно открытых календарей арендаторов
+MAX_TENANTS_ENV = "CALENDAR_MAX_TENANTS"
+
+# Сколько секунд запрос к событиям ждет загрузки хранилища перед ответом 503
+LOAD_WAIT_SECONDS = 30
+
+# Допуск запросов на запись (0 отключает ограничение): записей в секунду на
+# клиента и на процесс и число одновременно выполняемых записей; всплеск
+# допускается в пределах WRITE_BURST_SECONDS секунд нормы
+WRITE_RATE_ENV = "CALENDAR_WRITE_RATE"
+GLOBAL_WRITE_RATE_ENV = "CALENDAR_GLOBAL_WRITE_RATE"
+MAX_WRITES_ENV = "CALENDAR_MAX_CONCURRENT_WRITES"
+# Число доверенных обратных прокси перед приложением: клиент определяется
+# по X-Forwarded-For, а не по адресу соединения (адресу прокси)
+TRUSTED_PROXIES_ENV = "CALENDAR_TRUSTED_PROXIES"
+DEFAULT_WRITE_RATE = 100
+DEFAULT_GLOBAL_WRITE_RATE = 2000
+DEFAULT_MAX_WRITES = 32
+WRITE_BURST_SECONDS = 2
+WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+# Маршруты снимков добавляются, а маршруты профилирования доступны, только
+# если задан токен администратора (заголовок Authorization: Bearer
+# <токен>); размер загружаемого снимка
+# ограничен, а операции со снимками выполняются по одной и не чаще раза в
+# заданное число секунд на процесс (0 снимает ограничение частоты)
+SNAPSHOT_TOKEN_ENV = "CALENDAR_SNAPSHOT_TOKEN"
+MAX_SNAPSHOT_BYTES_ENV = "CALENDAR_MAX_SNAPSHOT_BYTES"
+SNAPSHOT_INTERVAL_ENV = "CALENDAR_SNAPSHOT_INTERVAL_SECONDS"
+DEFAULT_MAX_SNAPSHOT_BYTES = 1 << 30
+DEFAULT_SNAPSHOT_INTERVAL = 10.0
+COPY_CHUNK_SIZE = 1 << 20
+
+# Количество событий, отдаваемых одним фрагментом потокового ответа
+STREAM_CHUNK_SIZE = 512
+
+# Суффиксы ETag для форматов ответа: представления одного ресурса в разных
+# форматах должны различаться по ETag
+ETAG_SUFFIXES = {formats.TEXT: "", formats.JSON: "-json", formats.BINARY: "-bin"}
+
+# Операции пакетного API и соответствующие им коды журнала
+BATCH_OPS = {
+    "create": persistence.OP_CREATE,
+    "update": persistence.OP_UPDATE,
+    "delete": persistence.OP_DELETE,
+}
+# Наибольший размер страницы списка событий (параметр limit)
+MAX_LIST_LIMIT = 10_000
+# Максимальное число операций в одном пакете
+MAX_BATCH_SIZE = 10_000
+# Число свободных дней в ответе по умолчанию и наибольшее
+DEFAULT_FREE_COUNT = 10
+MAX_FREE_COUNT = 1000
+
+# Журнал изменений: наибольшее число изменений в ответе и время ожидания
+# (long-poll) в секундах
+EVENT_STREAM = "text/event-stream"
+MAX_CHANGES_LIMIT = 1000
+MAX_CHANGES_WAIT = 30.0
+# Поток Server-Sent Events: интервал комментариев для поддержания
+# соединения, длительность потока до переподключения клиента и пауза
+# перед переподключением
+SSE_KEEPALIVE_SECONDS = 15.0
+SSE_STREAM_SECONDS = 300.0
+SSE_RETRY_MS = 1000
 
 # Логика работы с событиями
 
 
+def _make_logic(calendar_name: str = None) -> logic.EventsLogic:
+    """Выбирает хранилище событий по переменным окружения.
+
+    Args:
+        calendar_name: Имя календаря арендатора или None для общего
+            календаря
+
+    Returns:
+        Объект бизнес-логики: общий SQLite (SHARED_DB_ENV), журнал
+        в каталоге (DATA_DIR_ENV) или хранилище в памяти процесса
+    """
+    shared_db = os.environ.get(SHARED_DB_ENV)
+    if shared_db:
+        if calendar_name is not None:
+            root, ext = os.path.splitext(shared_db)
+            shared_db = f"{root}.{calendar_name}{ext}"
+        return sqlite_store.SQLiteEventsLogic(shared_db)
+    data_dir = os.environ.get(DATA_DIR_ENV)
+    if data_dir and calendar_name is not None:
+        data_dir = os.path.join(data_dir, TENANTS_DIR, calendar_name)
+    backend = persistence.JournalPersistence(data_dir) if data_dir else None
+    compact = os.environ.get(COMPACT_ENV, "") not in ("", "0")
+    return logic.EventsLogic(backend, compact=compact)
+
+
+# Хранилище создается не при импорте, а в фоне после create_app() или при
+# первом обращении
+_events_logic = startup.LazyLogic(_make_logic)
+_write_admission = admission.WriteAdmission()
+_snapshot_admission = admission.WriteAdmission()
+
+
+def _open_tenant(calendar_name: str) -> tuple:
+    """Открывает хранилище календаря арендатора.
+
+    Args:
+        calendar_name: Имя календаря
+
+    Returns:
+        tuple: Хранилище событий и кэш его полного списка
+    """
+    store = _make_logic(calendar_name)
+    return store, _make_list_cache(store)
+
+
+def _configure_tenants() -> None:
+    """Настраивает выгрузку календарей арендаторов по переменным окружения.
+
+    Непустое хранилище только в памяти не выгружается: его данные негде
+    сохранить.
+    """
+    persistent = bool(os.environ.get(SHARED_DB_ENV) or os.environ.get(DATA_DIR_ENV))
+    idle = float(os.environ.get(TENANT_IDLE_ENV, tenants.IDLE_SECONDS))
+    max_tenants = int(os.environ.get(MAX_TENANTS_ENV, tenants.MAX_TENANTS))
+    _tenants.configure(idle, max_tenants, persistent)
+
+
+_tenants = tenants.TenantRegistry(_open_tenant, RESERVED_CALENDARS)
+
+
+def _current_logic():
+    """Возвращает хранилище событий календаря текущего запроса.
+
+    Returns:
+        Хранилище календаря арендатора или общее хранилище
+    """
+    tenant = g.get("tenant")
+    return _events_logic if tenant is None else tenant.logic
+
+
+def _current_list_cache() -> cache.ResponseCache:
+    """Возвращает кэш полного списка календаря текущего запроса.
+
+    Returns:
+        Кэш списка календаря арендатора или общего календаря
+    """
+    tenant = g.get("tenant")
+    return _list_cache if tenant is None else tenant.list_cache
+
+
+def _configure_admission() -> None:
+    """Настраивает допуск запросов на запись по переменным окружения."""
+    rate = float(os.environ.get(WRITE_RATE_ENV, DEFAULT_WRITE_RATE))
+    global_rate = float(os.environ.get(GLOBAL_WRITE_RATE_ENV, DEFAULT_GLOBAL_WRITE_RATE))
+    max_writes = int(os.environ.get(MAX_WRITES_ENV, DEFAULT_MAX_WRITES))
+    limiter = None
+    if rate or global_rate:
+        limiter = admission.RateLimiter(
+            rate, rate * WRITE_BURST_SECONDS,
+            global_rate, global_rate * WRITE_BURST_SECONDS,
+        )
+    gate = admission.ConcurrencyGate(max_writes) if max_writes else None
+    proxies = int(os.environ.get(TRUSTED_PROXIES_ENV, 0))
+    _write_admission.configure(limiter, gate, proxies)
+
+
+def admit_write(remote_addr: str, forwarded_for: str = None) -> tuple[str, float]:
+    """Проверяет допуск запроса на запись и учитывает отказ в метриках.
+
+    Args:
+        remote_addr: Адрес соединения
+        forwarded_for: Заголовок X-Forwarded-For или None; учитывается
+            только за доверенными прокси (TRUSTED_PROXIES_ENV)
+
+    Returns:
+        tuple: None, если запрос допущен (по его завершении нужно вызвать
+            finish_write()), иначе причина отказа и время до повтора в
+            секундах
+    """
+    rejection = _write_admission.enter(admission.client_address(
+        remote_addr, forwarded_for, _write_admission.proxies
+    ))
+    if rejection is not None:
+        metrics.RATE_LIMITED.inc(rejection[0])
+    return rejection
+
+
+def finish_write() -> None:
+    """Отмечает завершение допущенного запроса на запись."""
+    _write_admission.leave()
+
+
+def retry_after_seconds(wait: float) -> int:
+    """Округляет время до повтора для заголовка Retry-After.
+
+    Args:
+        wait: Время в секундах
+
+    Returns:
+        int: Целое число секунд, не меньше 1
+    """
+    return max(1, math.ceil(wait))
+
 
-_events_logic = logic.EventsLogic()
 _event_counter = count(1)
 
 
+def _make_list_cache(store) -> cache.ResponseCache:
+    """Создает кэш полного списка событий и подписывает его на изменения.
+
+    Args:
+        store: Хранилище событий календаря
+
+    Returns:
+        Кэш тела ответа GET /api/v1/events/
+    """
+    list_cache = cache.ResponseCache(_to_raw)
+    store.subscribe(list_cache.invalidate)
+    return list_cache
+
+
 class ApiException(Exception):
     """Базовое исключение для ошибок API."""
 
@@ -28,11 +307,13 @@ class StorageException(Exception):
     """Исключение для ошибок хранилища."""
 
 
-def _from_raw(raw_note: str) -> model.Events:
+def _from_raw(raw_note: str, check_date: bool = True) -> model.Events:
     """Преобразует сырые данные в объект Events.
 
     Args:
         raw_note: Строка в формате 'id|date|title|text' или 'date|title|text'
+        check_date: Проверять ли формат даты (пакетные операции проверяют
+            даты сами за один проход)
 
     Returns:
         Объект Events
@@ -60,7 +341,7 @@ def _from_raw(raw_note: str) -> model.Events:
         )
         raise ApiException(error_msg)
 
-    if not model.Events.validate_date(events.dates):
+    if check_date and not model.Events.validate_date(events.dates):
         raise ApiException(
             f"Неверный формат даты: {events.dates}. Ожидается YYYY-MM-DD"
         )
@@ -77,19 +358,633 @@ def _to_raw(events: model.Events) -> str:
     Returns:
         Строка в формате 'id|date|title|text' или 'date|title|text'
     """
-    logic.EventsLogic.num()
     if events.id is None:
         return f"{events.dates}|{events.title}|{events.text}"
     return f"{events.id}|{events.dates}|{events.title}|{events.text}"
 
 
+def _event_from_request(body: bytes, mimetype: str) -> model.Events:
+    """Разбирает событие из тела запроса в формате по Content-Type.
+
+    Args:
+        body: Тело запроса
+        mimetype: Тип содержимого запроса без параметров: formats.JSON,
+            formats.BINARY или любой другой для сырого формата
+
+    Returns:
+        Объект Events
+
+    Raises:
+        ApiException: При неверном формате данных или даты
+    """
+    if mimetype not in (formats.JSON, formats.BINARY):
+        return _from_raw(body.decode('utf-8'))
+    try:
+        events = formats.decode_event(body, mimetype)
+    except formats.FormatError as ex:
+        raise ApiException(str(ex)) from ex
+    if events.ordinal is None:
+        raise ApiException(
+            f"Неверный формат даты: {events.dates}. Ожидается YYYY-MM-DD"
+        )
+    return events
+
+
+def _batch_from_raw(body: str) -> list[tuple[str, str, model.Events]]:
+    """Разбирает пакет операций из строк в сыром формате.
+
+    Строка 'date|title|text' создает событие, 'id|date|title|text' обновляет
+    событие с указанным ID, а строка из одного ID удаляет событие.
+
+    Args:
+        body: Строки операций, разделенные переводом строки
+
+    Returns:
+        Список кортежей (код операции, ID, событие)
+
+    Raises:
+        ApiException: При неверном формате строки
+    """
+    operations = []
+    for number, line in enumerate(body.splitlines(), 1):
+        if not line.strip():
+            continue
+        if '|' not in line:
+            operations.append((persistence.OP_DELETE, line.strip(), None))
+            continue
+        try:
+            event = _from_raw(line, check_date=False)
+        except ApiException as ex:
+            raise ApiException(f"Строка {number}: {ex}") from ex
+        op = persistence.OP_CREATE if event.id is None else persistence.OP_UPDATE
+        operations.append((op, event.id, event))
+    return operations
+
+
+def _batch_from_json(items) -> list[tuple[str, str, model.Events]]:
+    """Разбирает пакет операций из JSON массива.
+
+    Каждый элемент - объект с полями op ("create", "update" или "delete";
+    по умолчанию "update" при наличии id, иначе "create"), id, date,
+    title и text.
+
+    Args:
+        items: Разобранное тело запроса
+
+    Returns:
+        Список кортежей (код операции, ID, событие)
+
+    Raises:
+        ApiException: При неверной структуре пакета
+    """
+    if not isinstance(items, list):
+        raise ApiException("Ожидается JSON массив операций")
+    operations = []
+    for number, item in enumerate(items, 1):
+        if not isinstance(item, dict):
+            raise ApiException(f"Запись {number}: ожидается JSON объект")
+        _id = item.get("id")
+        _id = None if _id is None else str(_id)
+        op_name = item.get("op") or ("create" if _id is None else "update")
+        op = BATCH_OPS.get(op_name)
+        if op is None:
+            raise ApiException(f"Запись {number}: неизвестная операция {op_name}")
+        if op != persistence.OP_CREATE and _id is None:
+            raise ApiException(f"Запись {number}: для операции {op_name} нужен id")
+        event = None
+        if op != persistence.OP_DELETE:
+            event = model.Events()
+            event.id = _id
+            event.dates = str(item.get("date", ""))
+            event.title = str(item.get("title", ""))
+            event.text = str(item.get("text", ""))
+        operations.append((op, _id, event))
+    return operations
+
+
+def _stream_raw(events: Iterable[model.Events]) -> Iterator[str]:
+    """Построчно сериализует события, группируя строки во фрагменты.
+
+    Args:
+        events: Итерируемая последовательность событий
+
+    Yields:
+        str: Фрагмент ответа из не более чем STREAM_CHUNK_SIZE строк
+    """
+    events = iter(events)
+    while True:
+        chunk = [_to_raw(event) + '\n' for event in islice(events, STREAM_CHUNK_SIZE)]
+        if not chunk:
+            return
+        yield ''.join(chunk)
+
+
+def _join(chunks: Iterable) -> bytes:
+    """Собирает фрагменты ответа в одно тело.
+
+    Args:
+        chunks: Фрагменты из _encode_stream
+
+    Returns:
+        Тело ответа
+    """
+    return b''.join(
+        chunk.encode('utf-8') if isinstance(chunk, str) else chunk for chunk in chunks
+    )
+
+
+def _encode_stream(events: Iterable[model.Events], mimetype: str) -> Iterator:
+    """Сериализует события фрагментами в согласованном формате.
+
+    Args:
+        events: Итерируемая последовательность событий
+        mimetype: Формат ответа из formats.MIMETYPES
+
+    Returns:
+        Итератор фрагментов ответа (str для сырого формата, иначе bytes)
+    """
+    if mimetype == formats.TEXT:
+        return _stream_raw(events)
+    return formats.encode_stream(events, mimetype, STREAM_CHUNK_SIZE)
+
+
+def _response_format() -> str:
+    """Выбирает формат ответа по заголовку Accept.
+
+    Returns:
+        Тип содержимого из formats.MIMETYPES; без заголовка Accept или
+        при отсутствии подходящего формата - сырой формат
+    """
+    return request.accept_mimetypes.best_match(formats.MIMETYPES, formats.TEXT)
+
+
+def _page_limit(value: str) -> int:
+    """Разбирает размер страницы списка событий.
+
+    Args:
+        value: Значение параметра limit или None
+
+    Returns:
+        int: Размер страницы или None, если параметр не задан
+
+    Raises:
+        ApiException: Если значение не число или вне 1..MAX_LIST_LIMIT
+    """
+    if value is None:
+        return None
+    digits = value.isascii() and value.isdigit() and len(value) <= len(str(MAX_LIST_LIMIT))
+    limit = int(value) if digits else 0
+    if not 0 < limit <= MAX_LIST_LIMIT:
+        raise ApiException(f"Значение limit должно быть от 1 до {MAX_LIST_LIMIT}")
+    return limit
+
+
+def _etag(version: int, mimetype: str = formats.TEXT, store=None) -> str:
+    """Формирует ETag по версии хранилища или события.
+
+    Args:
+        version: Версия
+        mimetype: Формат ответа
+        store: Хранилище календаря; по умолчанию общее
+
+    Returns:
+        Значение ETag без кавычек
+    """
+    epoch = (_events_logic if store is None else store).epoch
+    return f"{epoch}-{version}{ETAG_SUFFIXES[mimetype]}"
+
+
+def _not_modified(etag: str, last_modified: float) -> bool:
+    """Проверяет условные заголовки запроса (If-None-Match и др.).
+
+    Args:
+        etag: Текущий ETag ресурса
+        last_modified: Время последнего изменения ресурса (Unix time)
+
+    Returns:
+        True если у клиента актуальная копия и можно ответить 304
+    """
+    return not is_resource_modified(
+        request.environ,
+        etag=etag,
+        last_modified=datetime.fromtimestamp(int(last_modified), timezone.utc),
+    )
+
+
+def _with_validators(response: Response, etag: str, last_modified: float) -> Response:
+    """Добавляет к ответу заголовки для условных запросов.
+
+    Args:
+        response: Ответ
+        etag: ETag ресурса
+        last_modified: Время последнего изменения ресурса (Unix time)
+
+    Returns:
+        Тот же ответ с заголовками ETag, Last-Modified и Cache-Control
+    """
+    response.set_etag(etag)
+    response.last_modified = int(last_modified)
+    # Клиент может хранить копию, но обязан проверять ее актуальность
+    response.cache_control.no_cache = True
+    # Формат тела зависит от Accept
+    response.vary.add("Accept")
+    return response
+
+
+def _set_encoding(response: Response, encoding: str) -> Response:
+    """Помечает ответ как сжатый.
+
+    ETag становится слабым: сжатое и несжатое представления различаются
+    побайтно, но условные запросы (If-None-Match сравнивает ETag в слабом
+    режиме) продолжают работать.
+
+    Args:
+        response: Ответ со сжатым телом
+        encoding: Примененная кодировка
+
+    Returns:
+        Тот же ответ с заголовками Content-Encoding и Vary
+    """
+    response.headers["Content-Encoding"] = encoding
+    response.vary.add("Accept-Encoding")
+    etag, _ = response.get_etag()
+    if etag is not None:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def _not_modified_response(etag: str, last_modified: float) -> Response:
+    """Формирует ответ 304 Not Modified.
+
+    Args:
+        etag: ETag ресурса
+        last_modified: Время последнего изменения ресурса (Unix time)
+
+    Returns:
+        Пустой ответ со статусом 304
+    """
+    return _with_validators(Response(status=304), etag, last_modified)
+
+
+def _parse_change_cursor(value: str) -> tuple[str, int]:
+    """Разбирает позицию в журнале изменений.
+
+    Args:
+        value: Номер изменения или "<эпоха>-<номер>" (ID события SSE)
+
+    Returns:
+        tuple: Эпоха или None и номер изменения
+
+    Raises:
+        ApiException: При неверном номере
+    """
+    epoch, _, seq = value.rpartition("-")
+    if not seq.isdigit():
+        raise ApiException(f"Неверный номер изменения: {value}")
+    return epoch or None, int(seq)
+
+
+def _compact_changes(store, entries: list[tuple[int, str, str]]) -> list[dict]:
+    """Сводит изменения к последнему по каждому событию.
+
+    Для каждого события отдается его текущее состояние, поэтому клиенту
+    достаточно применить изменения по порядку, заменяя или удаляя события.
+
+    Args:
+        store: Хранилище событий календаря
+        entries: Кортежи (номер, ID события, вид изменения)
+
+    Returns:
+        list[dict]: Изменения с полями seq, op, id и event (для op="put";
+            для правил повторения - rule) по возрастанию номера
+    """
+    latest: dict[str, int] = {}
+    for seq, _id, _ in entries:
+        latest.pop(_id, None)
+        latest[_id] = seq
+    items = []
+    for _id, seq in latest.items():
+        if recurrence.is_rule_id(_id):
+            rule = store.read_rule(_id)
+            if rule is None:
+                items.append({"seq": seq, "op": changes.OP_DELETE, "id": _id})
+            else:
+                items.append({
+                    "seq": seq, "op": changes.OP_PUT, "id": _id, "rule": rule.to_dict(),
+                })
+            continue
+        event = store.read(_id)
+        if event is None:
+            items.append({"seq": seq, "op": changes.OP_DELETE, "id": _id})
+        else:
+            items.append({
+                "seq": seq, "op": changes.OP_PUT, "id": _id,
+                "event": formats.to_dict(event),
+            })
+    return items
+
+
+def _change_events(store, epoch: str, seq: int) -> Iterator[bytes]:
+    """Выдает изменения после seq в формате Server-Sent Events.
+
+    Между изменениями поток спит на ожидании журнала; раз в
+    SSE_KEEPALIVE_SECONDS отправляется комментарий, а через
+    SSE_STREAM_SECONDS поток завершается, и клиент переподключается с
+    заголовком Last-Event-ID.
+
+    Args:
+        store: Хранилище событий календаря
+        epoch: Эпоха хранилища
+        seq: Номер последнего известного клиенту изменения
+
+    Yields:
+        bytes: Сообщения потока
+    """
+    deadline = time.monotonic() + SSE_STREAM_SECONDS
+    yield f"retry: {SSE_RETRY_MS}\n\n".encode()
+    while True:
+        try:
+            entries = store.changes_since(seq, MAX_CHANGES_LIMIT)
+        except changes.ChangesExpiredError as ex:
+            yield b"event: expired\ndata: " + formats.dumps_json(str(ex)) + b"\n\n"
+            return
+        for item in _compact_changes(store, entries):
+            yield (
+                f"id: {epoch}-{item['seq']}\nevent: change\ndata: ".encode()
+                + formats.dumps_json(item) + b"\n\n"
+            )
+        if entries:
+            seq = entries[-1][0]
+            continue
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        if not store.wait_for_changes(seq, min(SSE_KEEPALIVE_SECONDS, remaining)):
+            yield b": keepalive\n\n"
+
+
+_list_cache = _make_list_cache(_events_logic)
+
+
+def _register_store_metrics() -> None:
+    """Регистрирует показатели хранилища и кэша списка для /metrics."""
+    registry = metrics.REGISTRY
+    # Показатели хранилища до окончания загрузки равны нулю: выгрузка
+    # метрик не должна ждать загрузки
+    registry.register(metrics.Gauge(
+        "calendar_events", "Число событий в хранилище",
+        lambda: _events_logic.count() if _events_logic.ready else 0,
+    ))
+    registry.register(metrics.Gauge(
+        "calendar_store_version", "Версия хранилища (число изменений)",
+        lambda: _events_logic.version if _events_logic.ready else 0,
+    ))
+    registry.register(metrics.Gauge(
+        "calendar_store_ready", "Загружено ли хранилище (1 или 0)",
+        lambda: int(_events_logic.ready),
+    ))
+    registry.register(metrics.Gauge(
+        "calendar_store_load_seconds", "Длительность загрузки хранилища",
+        lambda: _events_logic.load_seconds or 0,
+    ))
+    registry.register(metrics.Gauge(
+        "calendar_tenants_loaded", "Число открытых календарей арендаторов",
+        _tenants.loaded,
+    ))
+    registry.register(metrics.CallbackCounter(
+        "calendar_tenant_evictions", "Выгрузки простаивающих календарей арендаторов",
+        lambda: _tenants.evictions,
+    ))
+    for name, help_text in (
+        ("hits", "Ответы на полный список из кэша"),
+        ("misses", "Сборки полного списка"),
+        ("line_hits", "Строки событий, взятые из кэша при сборке списка"),
+        ("line_misses", "Строки событий, сериализованные при сборке списка"),
+        ("invalidations", "Сбросы кэша списка изменениями событий"),
+        ("compressed_hits", "Ответы на полный список сжатым телом из кэша"),
+        ("compressions", "Сжатия полного списка для кэша"),
+    ):
+        registry.register(metrics.CallbackCounter(
+            f"calendar_list_cache_{name}", help_text,
+            lambda name=name: _list_cache.stats()[name],
+        ))
+    registry.register(metrics.Gauge(
+        "calendar_list_cache_bytes", "Размер тела списка в кэше",
+        lambda: _list_cache.stats()["body_bytes"],
+    ))
+
+
+_register_store_metrics()
+
+
+def start_loading() -> None:
+    """Запускает загрузку хранилища в фоновом потоке, если она не начата."""
+    _events_logic.start()
+
+
+def preload_store() -> float:
+    """Загружает хранилище синхронно.
+
+    Используется в мастер-процессе gunicorn (preload_app): загруженные до
+    fork данные воркеры разделяют в режиме копирования при записи.
+
+    Returns:
+        Длительность загрузки в секундах
+    """
+    _events_logic.load()
+    return _events_logic.load_seconds
+
+
 def create_app():
     """Создает и настраивает Flask приложение.
 
+    Загрузка хранилища начинается в фоновом потоке (если не задана
+    LAZY_LOAD_ENV); запросы к событиям до ее окончания ждут готовности
+    не дольше LOAD_WAIT_SECONDS.
+
     Returns:
         Flask приложение с настроенными маршрутами API
     """
     app = Flask(__name__)
+    if os.environ.get(LAZY_LOAD_ENV, "") in ("", "0"):
+        start_loading()
+    _configure_admission()
+    _configure_tenants()
+    admin_token = os.environ.get(SNAPSHOT_TOKEN_ENV)
+
+    @app.url_value_preprocessor
+    def pop_calendar(endpoint: str, values: dict):
+        """Запоминает имя календаря арендатора из пути запроса.
+
+        Args:
+            endpoint: Имя обработчика
+            values: Параметры пути
+        """
+        if values and "calendar" in values:
+            g.calendar_name = values.pop("calendar")
+
+    @app.before_request
+    def start_timing():
+        """Запоминает время начала запроса и запускает профилирование."""
+        g.started = time.perf_counter()
+        g.profile = metrics.PROFILER.start()
+
+    @app.before_request
+    def admit():
+        """Допускает запрос на запись к API или отклоняет его с 429.
+
+        Returns:
+            None или ответ 429 с заголовком Retry-After
+        """
+        if request.method not in WRITE_METHODS or not request.path.startswith(API_ROOT + "/"):
+            return None
+        rejection = admit_write(
+            request.remote_addr or "", request.headers.get("X-Forwarded-For")
+        )
+        if rejection is None:
+            g.write_admitted = True
+            return None
+        reason, wait = rejection
+        response = Response(
+            f"Слишком много запросов на запись ({reason}), повторите позже",
+            429, mimetype="text/plain",
+        )
+        response.retry_after = retry_after_seconds(wait)
+        return response
+
+    @app.before_request
+    def wait_for_store():
+        """Ждет загрузки хранилища перед запросами к событиям и календарю.
+
+        Returns:
+            None или ответ 503, если хранилище не загрузилось вовремя
+        """
+        if not request.path.startswith(
+            (
+                EVENTS_API_ROOT + "/", CALENDAR_API_ROOT + "/",
+                RECURRING_API_ROOT + "/", SNAPSHOT_API_ROOT + "/",
+            )
+        ):
+            return None
+        if _events_logic.wait(LOAD_WAIT_SECONDS):
+            return None
+        response = Response("Хранилище загружается", 503, mimetype="text/plain")
+        response.retry_after = 1
+        return response
+
+    @app.before_request
+    def open_calendar():
+        """Открывает хранилище календаря арендатора для запроса.
+
+        Returns:
+            None, ответ 404 для неверного имени календаря или 503, если
+            открыто слишком много календарей
+        """
+        calendar_name = g.pop("calendar_name", None)
+        if calendar_name is None:
+            return None
+        try:
+            g.tenant = _tenants.acquire(calendar_name)
+        except tenants.TenantError as ex:
+            return Response(str(ex), 404, mimetype="text/plain")
+        except tenants.TenantLimitError as ex:
+            response = Response(str(ex), 503, mimetype="text/plain")
+            response.retry_after = 1
+            return response
+        return None
+
+    @app.after_request
+    def release_calendar(response: Response) -> Response:
+        """Освобождает календарь арендатора после выдачи ответа.
+
+        Потоковый ответ читает хранилище и после обработчика, поэтому
+        календарь освобождается при закрытии ответа.
+
+        Args:
+            response: Ответ
+
+        Returns:
+            Тот же ответ
+        """
+        tenant = g.pop("tenant", None)
+        if tenant is not None:
+            response.call_on_close(lambda: _tenants.release(tenant))
+        return response
+
+    @app.after_request
+    def record_timing(response: Response) -> Response:
+        """Записывает время обработки запроса по маршруту.
+
+        Для потоковых ответов учитывается время до начала выдачи.
+
+        Args:
+            response: Ответ
+
+        Returns:
+            Тот же ответ
+        """
+        duration = time.perf_counter() - g.started
+        route = request.url_rule.rule if request.url_rule else "<unmatched>"
+        metrics.REQUEST_DURATION.observe(duration, request.method, route)
+        metrics.REQUESTS.inc(request.method, route, str(response.status_code))
+        profile = g.pop("profile", None)
+        if profile is not None:
+            metrics.PROFILER.finish(profile, duration, f"{request.method} {route}")
+        return response
+
+    @app.after_request
+    def compress_response(response: Response) -> Response:
+        """Сжимает ответ по заголовку Accept-Encoding.
+
+        Потоковые ответы сжимаются по мере выдачи, остальные - целиком,
+        если тело не меньше compression.MIN_SIZE. Ответы, уже сжатые
+        обработчиком (полный список из кэша), не меняются.
+
+        Args:
+            response: Ответ
+
+        Returns:
+            Тот же ответ, возможно сжатый
+        """
+        if (
+            response.status_code != 200
+            or response.direct_passthrough
+            or "Content-Encoding" in response.headers
+            or not compression.compressible(response.mimetype)
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+        encoding = compression.negotiate(request.headers.get("Accept-Encoding"))
+        if encoding is None:
+            return response
+        if response.is_streamed:
+            response.response = compression.compress_stream(
+                response.iter_encoded(), encoding
+            )
+            response.headers.pop("Content-Length", None)
+        else:
+            body, encoding = compression.maybe_compress(response.get_data(), encoding)
+            if encoding is None:
+                return response
+            response.set_data(body)
+        return _set_encoding(response, encoding)
+
+    @app.teardown_request
+    def stop_profile(exc: BaseException = None):
+        """Останавливает профилирование и освобождает занятые запросом ресурсы.
+
+        Args:
+            exc: Необработанное исключение или None
+        """
+        profile = g.pop("profile", None)
+        if profile is not None:
+            profile.disable()
+        if g.pop("write_admitted", False):
+            finish_write()
+        tenant = g.pop("tenant", None)
+        if tenant is not None:
+            # Ответ не сформирован: release_calendar не вызывался
+            _tenants.release(tenant)
 
     @app.route('/')
     def index():
@@ -101,41 +996,565 @@ def create_app():
         return render_template('index.html')
 
     @app.route(EVENTS_API_ROOT + "/", methods=["POST"])
+    @app.route(TENANT_EVENTS_ROOT + "/", methods=["POST"])
     def create():
         """Создает новое событие.
 
+        Тело запроса - событие в сыром формате, JSON объект или двоичная
+        запись, в зависимости от Content-Type.
+
         Returns:
             Ответ с ID созданного события или сообщение об ошибке
         """
+        store = _current_logic()
         try:
-            data = request.get_data().decode('utf-8')
-            events = _from_raw(data)
-            event_id = _events_logic.create(events)
+            data = request.get_data()
+            with metrics.STAGE_DURATION.time("parse"):
+                events = _event_from_request(data, request.mimetype)
+            with metrics.STAGE_DURATION.time("logic"):
+                event_id = store.create(events)
             return f"Новый ID: {event_id}", 201
         except ApiException as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
             return f"Ошибка API: {ex}", 400
         except ValueError as ex:
+            metrics.count_rejection(ex)
             return f"Ошибка валидации: {ex}", 400
         except (ImportError, AttributeError, RuntimeError) as ex:
             return f"Внутренняя ошибка сервера: {ex}", 500
 
+    @app.route(EVENTS_API_ROOT + "/batch/", methods=["POST"])
+    @app.route(TENANT_EVENTS_ROOT + "/batch/", methods=["POST"])
+    def batch():
+        """Атомарно применяет пакет операций создания, изменения и удаления.
+
+        Принимает строки в сыром формате (по одной операции на строку) или
+        JSON массив операций. Пакет проверяется целиком и применяется только
+        если корректны все операции.
+
+        Returns:
+            Результат по каждой операции: строки 'N|ok|id' или
+            'N|error|сообщение' либо JSON массив для JSON запроса
+        """
+        store = _current_logic()
+        as_json = request.is_json
+        try:
+            with metrics.STAGE_DURATION.time("parse"):
+                if as_json:
+                    operations = _batch_from_json(request.get_json(silent=True))
+                else:
+                    operations = _batch_from_raw(request.get_data().decode('utf-8'))
+            if not operations:
+                raise ApiException("Пустой пакет")
+            if len(operations) > MAX_BATCH_SIZE:
+                raise ApiException(f"Пакет больше {MAX_BATCH_SIZE} операций")
+            with metrics.STAGE_DURATION.time("logic"):
+                ids = store.apply_batch(operations)
+            errors = [None] * len(ids)
+            status = 200
+        except ApiException as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
+            return f"Ошибка API: {ex}", 400
+        except logic.BatchError as ex:
+            metrics.VALIDATION_FAILURES.inc("batch")
+            ids = [_id for _, _id, _ in operations]
+            errors = ex.errors
+            status = 400
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Внутренняя ошибка сервера: {ex}", 500
+
+        if as_json:
+            return jsonify([
+                {"index": number, "status": "error", "error": error}
+                if error else {"index": number, "status": "ok", "id": _id}
+                for number, (_id, error) in enumerate(zip(ids, errors), 1)
+            ]), status
+        lines = [
+            f"{number}|error|{error}" if error else f"{number}|ok|{_id or ''}"
+            for number, (_id, error) in enumerate(zip(ids, errors), 1)
+        ]
+        return Response('\n'.join(lines) + '\n', status, mimetype="text/plain")
+
     @app.route(EVENTS_API_ROOT + "/", methods=["GET"])
+    @app.route(TENANT_EVENTS_ROOT + "/", methods=["GET"])
     def list_events():
         """Возвращает список всех событий.
 
+        Параметры запроса cursor (ID последнего полученного события) и
+        limit (размер страницы) включают постраничную выдачу; ID для
+        следующей страницы возвращается в заголовке X-Next-Cursor.
+        Параметры from и to (YYYY-MM-DD) ограничивают выдачу диапазоном
+        дат; в этом режиме события упорядочены по дате, а курсором
+        служит дата последнего полученного события.
+        ETag ответа - версия хранилища, поэтому повторный запрос
+        с If-None-Match без изменений данных стоит одного сравнения.
+        Полный список без параметров в сыром формате отдается из кэша
+        сериализованного ответа, который сбрасывается при изменении событий;
+        сжатое по Accept-Encoding тело тоже берется из кэша.
+        Формат ответа (сырой, JSON или двоичный) выбирается по Accept.
+
         Returns:
-            Список событий в сыром формате или сообщение об ошибке
+            Список событий или сообщение об ошибке
         """
+        store = _current_logic()
         try:
-            events = _events_logic.list_events()
-            raw_notes = ""
-            for event in events:
-                raw_notes = raw_notes + _to_raw(event) + '\n'
-            return raw_notes, 200
+            mimetype = _response_format()
+            # Версия читается до данных: если данные изменятся во время
+            # выдачи, следующий запрос увидит новую версию
+            etag = _etag(store.version, mimetype, store)
+            last_modified = store.last_modified
+            if _not_modified(etag, last_modified):
+                return _not_modified_response(etag, last_modified)
+            cursor = request.args.get("cursor")
+            limit = _page_limit(request.args.get("limit"))
+            start = request.args.get("from")
+            end = request.args.get("to")
+            by_date = start is not None or end is not None
+            cached = mimetype == formats.TEXT
+            if cursor is None and limit is None and not by_date and cached:
+                encoding = compression.negotiate(request.headers.get("Accept-Encoding"))
+                with metrics.STAGE_DURATION.time("serialize"):
+                    body, encoding = _current_list_cache().encoded_body(store, encoding)
+                response = Response(body, 200, mimetype=mimetype)
+                _with_validators(response, etag, last_modified)
+                return _set_encoding(response, encoding) if encoding else response
+            if by_date:
+                events = store.iter_range(start, end, cursor)
+            else:
+                events = store.iter_events(cursor)
+            if limit is None:
+                body = stream_with_context(_encode_stream(events, mimetype))
+                response = Response(body, 200, mimetype=mimetype)
+                return _with_validators(response, etag, last_modified)
+            # Страница ограничена limit, поэтому ее можно собрать целиком
+            with metrics.STAGE_DURATION.time("logic"):
+                page = list(islice(events, limit + 1))
+            with metrics.STAGE_DURATION.time("serialize"):
+                body = _join(_encode_stream(page[:limit], mimetype))
+            response = Response(body, 200, mimetype=mimetype)
+            if len(page) > limit:
+                last = page[limit - 1]
+                response.headers["X-Next-Cursor"] = last.dates if by_date else last.id
+            return _with_validators(response, etag, last_modified)
+        except ApiException as ex:
+            return f"Ошибка API: {ex}", 400
+        except ValueError as ex:
+            return f"Неверный параметр запроса: {ex}", 400
         except (ImportError, AttributeError, RuntimeError) as ex:
             return f"Ошибка при получении списка: {ex}", 500
 
+    @app.route(READY_PATH, methods=["GET"])
+    def ready():
+        """Сообщает о готовности хранилища для балансировщика нагрузки.
+
+        Returns:
+            JSON с признаком готовности, длительностью загрузки и временем
+            холодного старта; статус 200 после загрузки, иначе 503
+        """
+        start_loading()
+        return jsonify(
+            ready=_events_logic.ready,
+            load_seconds=_events_logic.load_seconds,
+            ready_after_seconds=_events_logic.ready_after,
+            error=_events_logic.error,
+        ), 200 if _events_logic.ready else 503
+
+    @app.route(CACHE_API_ROOT + "/stats/", methods=["GET"])
+    def cache_stats():
+        """Возвращает счетчики кэша списка событий для мониторинга.
+
+        Returns:
+            JSON с попаданиями, промахами и размером кэша
+        """
+        return jsonify(_list_cache.stats())
+
+    @app.route(METRICS_PATH, methods=["GET"])
+    def metrics_export():
+        """Выгружает метрики в текстовом формате Prometheus.
+
+        Returns:
+            Метрики запросов, этапов обработки, хранилища и кэша
+        """
+        return Response(
+            metrics.REGISTRY.render(),
+            mimetype="text/plain",
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+    def check_profiler_access() -> Response:
+        """Проверяет токен администратора для маршрутов профилирования.
+
+        Профилирование замедляет запросы и пишет файлы на диск, а отчеты
+        раскрывают внутреннее устройство приложения.
+
+        Returns:
+            None, если токен верен, иначе ответ 403
+        """
+        if _has_admin_token(admin_token):
+            return None
+        return Response("Нужен токен администратора", 403, mimetype="text/plain")
+
+    @app.route(PROFILER_API_ROOT + "/", methods=["GET"])
+    def profiler_status():
+        """Возвращает настройки профилирования и список профилей.
+
+        Returns:
+            JSON с настройками и профилями медленных запросов или ответ 403
+        """
+        forbidden = check_profiler_access()
+        if forbidden is not None:
+            return forbidden
+        return jsonify(
+            settings=metrics.PROFILER.settings(),
+            profiles=metrics.PROFILER.dumps(),
+        )
+
+    @app.route(PROFILER_API_ROOT + "/", methods=["PUT"])
+    def profiler_configure():
+        """Включает, выключает или перенастраивает профилирование.
+
+        Принимает JSON объект с полями enabled, threshold_ms и sample_rate;
+        отсутствующие поля не меняются.
+
+        Returns:
+            JSON с новыми настройками или сообщение об ошибке
+        """
+        forbidden = check_profiler_access()
+        if forbidden is not None:
+            return forbidden
+        options = request.get_json(silent=True)
+        if not isinstance(options, dict):
+            return "Ошибка API: ожидается JSON объект", 400
+        try:
+            threshold = options.get("threshold_ms")
+            sample_rate = options.get("sample_rate")
+            return jsonify(metrics.PROFILER.configure(
+                enabled=options.get("enabled"),
+                threshold=None if threshold is None else float(threshold) / 1000,
+                sample_rate=None if sample_rate is None else float(sample_rate),
+            ))
+        except (TypeError, ValueError) as ex:
+            return f"Ошибка API: {ex}", 400
+
+    @app.route(PROFILER_API_ROOT + "/<name>", methods=["GET"])
+    def profiler_report(name: str):
+        """Возвращает отчет по сохраненному профилю.
+
+        Args:
+            name: Имя профиля из списка профилей
+
+        Returns:
+            Функции профиля по накопленному времени или сообщение об ошибке
+        """
+        forbidden = check_profiler_access()
+        if forbidden is not None:
+            return forbidden
+        report = metrics.PROFILER.report(name)
+        if report is None:
+            return "Профиль не найден", 404
+        return Response(report, 200, mimetype="text/plain")
+
+    @app.route(EVENTS_API_ROOT + "/search/", methods=["GET"])
+    @app.route(TENANT_EVENTS_ROOT + "/search/", methods=["GET"])
+    def search_events():
+        """Ищет события по словам заголовка и текста.
+
+        Параметр q - поисковый запрос (последнее слово ищется как
+        префикс), from и to ограничивают диапазон дат, limit - число
+        событий в ответе.
+
+        Returns:
+            Найденные события в согласованном по Accept формате,
+            упорядоченные по дате, или сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            query = request.args.get("q", "")
+            if not query.strip():
+                raise ApiException("Пустой поисковый запрос")
+            limit = request.args.get("limit", type=int)
+            if limit is not None and limit <= 0:
+                raise ApiException(f"Неверное значение limit: {limit}")
+            mimetype = _response_format()
+            etag = _etag(store.version, mimetype, store)
+            last_modified = store.last_modified
+            if _not_modified(etag, last_modified):
+                return _not_modified_response(etag, last_modified)
+            with metrics.STAGE_DURATION.time("logic"):
+                events = store.search(
+                    query, request.args.get("from"), request.args.get("to"), limit
+                )
+            with metrics.STAGE_DURATION.time("serialize"):
+                body = _join(_encode_stream(events, mimetype))
+            response = Response(body, 200, mimetype=mimetype)
+            return _with_validators(response, etag, last_modified)
+        except ApiException as ex:
+            return f"Ошибка API: {ex}", 400
+        except ValueError as ex:
+            return f"Неверный параметр запроса: {ex}", 400
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при поиске: {ex}", 500
+
+    @app.route(EVENTS_API_ROOT + "/stats/", methods=["GET"])
+    @app.route(TENANT_EVENTS_ROOT + "/stats/", methods=["GET"])
+    def events_stats():
+        """Возвращает число занятых дней по годам и месяцам.
+
+        Счетчики поддерживаются при изменении событий, поэтому ответ не
+        требует перебора событий.
+
+        Returns:
+            JSON с общим числом событий total, словарями years ("YYYY")
+            и months ("YYYY-MM") или сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            etag = _etag(store.version, formats.JSON, store)
+            last_modified = store.last_modified
+            if _not_modified(etag, last_modified):
+                return _not_modified_response(etag, last_modified)
+            with metrics.STAGE_DURATION.time("logic"):
+                years, months = store.occupancy_counts()
+            response = jsonify(
+                total=sum(years.values()),
+                years={str(year): count for year, count in years.items()},
+                months={
+                    f"{year:04d}-{month:02d}": count
+                    for (year, month), count in months.items()
+                },
+            )
+            return _with_validators(response, etag, last_modified)
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при получении статистики: {ex}", 500
+
+    @app.route(EVENTS_API_ROOT + "/changes/", methods=["GET"])
+    @app.route(TENANT_EVENTS_ROOT + "/changes/", methods=["GET"])
+    def events_changes():
+        """Возвращает изменения событий после номера since.
+
+        Без since отдается номер последнего изменения, с которого клиент
+        начинает синхронизацию. Параметр wait (до MAX_CHANGES_WAIT секунд)
+        включает long-poll: если изменений нет, ответ ждет первого из них.
+        При Accept: text/event-stream изменения передаются потоком
+        Server-Sent Events; позиция продолжения берется из Last-Event-ID.
+
+        Returns:
+            JSON с эпохой epoch, номером последнего отданного изменения seq
+            и списком изменений changes, поток событий или сообщение об
+            ошибке; 410, если изменения после since уже не хранятся
+        """
+        store = _current_logic()
+        try:
+            epoch = store.epoch
+            stream = request.accept_mimetypes.best_match(
+                (formats.JSON, EVENT_STREAM)
+            ) == EVENT_STREAM
+            cursor = request.headers.get("Last-Event-ID") or request.args.get("since")
+            if cursor is None:
+                seq = store.change_seq
+                if not stream:
+                    return jsonify(epoch=epoch, seq=seq, changes=[])
+            else:
+                client_epoch, seq = _parse_change_cursor(cursor)
+                client_epoch = client_epoch or request.args.get("epoch")
+                if client_epoch not in (None, epoch):
+                    raise changes.ChangesExpiredError(
+                        f"Эпоха {client_epoch} не совпадает с текущей {epoch}"
+                    )
+            limit = request.args.get("limit", MAX_CHANGES_LIMIT, type=int)
+            if not 0 < limit <= MAX_CHANGES_LIMIT:
+                raise ApiException(
+                    f"Значение limit должно быть от 1 до {MAX_CHANGES_LIMIT}"
+                )
+            wait = request.args.get("wait", 0.0, type=float)
+            if not 0 <= wait <= MAX_CHANGES_WAIT:
+                raise ApiException(
+                    f"Значение wait должно быть от 0 до {MAX_CHANGES_WAIT:g}"
+                )
+            if stream:
+                # Недоступная позиция отклоняется до начала потока
+                store.changes_since(seq, 0)
+                response = Response(_change_events(store, epoch, seq), mimetype=EVENT_STREAM)
+                response.headers["Cache-Control"] = "no-cache"
+                response.headers["X-Accel-Buffering"] = "no"
+                return response
+            entries = store.changes_since(seq, limit)
+            if not entries and wait and store.wait_for_changes(seq, wait):
+                entries = store.changes_since(seq, limit)
+            with metrics.STAGE_DURATION.time("serialize"):
+                items = _compact_changes(store, entries)
+            return jsonify(
+                epoch=epoch, seq=entries[-1][0] if entries else seq, changes=items
+            )
+        except changes.ChangesExpiredError as ex:
+            return f"Изменения недоступны: {ex}", 410
+        except ApiException as ex:
+            return f"Ошибка API: {ex}", 400
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при получении изменений: {ex}", 500
+
+    @app.route(EVENTS_API_ROOT + "/free/", methods=["GET"])
+    @app.route(TENANT_EVENTS_ROOT + "/free/", methods=["GET"])
+    def free_days():
+        """Возвращает первые свободные дни начиная с даты from.
+
+        Параметр count - число дней в ответе (по умолчанию
+        DEFAULT_FREE_COUNT, не больше MAX_FREE_COUNT), to ограничивает
+        поиск последней датой. Время ответа пропорционально числу
+        найденных дней, а не длине диапазона.
+
+        Returns:
+            JSON со списком свободных дат days или сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            start = request.args.get("from")
+            if start is None:
+                raise ApiException("Не указана дата from")
+            count = request.args.get("count", DEFAULT_FREE_COUNT, type=int)
+            if not 0 < count <= MAX_FREE_COUNT:
+                raise ApiException(
+                    f"Значение count должно быть от 1 до {MAX_FREE_COUNT}"
+                )
+            etag = _etag(store.version, formats.JSON, store)
+            last_modified = store.last_modified
+            if _not_modified(etag, last_modified):
+                return _not_modified_response(etag, last_modified)
+            with metrics.STAGE_DURATION.time("logic"):
+                days = store.free_days(start, count, request.args.get("to"))
+            response = jsonify(days=days)
+            return _with_validators(response, etag, last_modified)
+        except ApiException as ex:
+            return f"Ошибка API: {ex}", 400
+        except ValueError as ex:
+            return f"Неверный параметр запроса: {ex}", 400
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при поиске свободных дней: {ex}", 500
+
+    @app.route(RECURRING_API_ROOT + "/", methods=["POST"])
+    @app.route(TENANT_RECURRING_ROOT + "/", methods=["POST"])
+    def create_rule():
+        """Создает правило повторения события.
+
+        Тело запроса - JSON объект с полями date (первая дата), title,
+        text, freq (daily, weekly или monthly) и необязательными interval,
+        until или count. Повторения не сохраняются по отдельности и
+        появляются в выборках по диапазону дат.
+
+        Returns:
+            JSON созданного правила или сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            with metrics.STAGE_DURATION.time("parse"):
+                rule = recurrence.Rule.from_dict(formats.loads_json(request.get_data()))
+            with metrics.STAGE_DURATION.time("logic"):
+                store.create_rule(rule)
+            return jsonify(rule.to_dict()), 201
+        except formats.FormatError as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
+            return f"Ошибка API: {ex}", 400
+        except ValueError as ex:
+            metrics.count_rejection(ex)
+            return f"Ошибка валидации: {ex}", 400
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Внутренняя ошибка сервера: {ex}", 500
+
+    @app.route(RECURRING_API_ROOT + "/", methods=["GET"])
+    @app.route(TENANT_RECURRING_ROOT + "/", methods=["GET"])
+    def list_rules():
+        """Возвращает все правила повторения.
+
+        Returns:
+            JSON со списком правил rules или сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            return jsonify(rules=[rule.to_dict() for rule in store.list_rules()])
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при получении правил: {ex}", 500
+
+    @app.route(RECURRING_API_ROOT + "/<rule_id>/", methods=["GET"])
+    @app.route(TENANT_RECURRING_ROOT + "/<rule_id>/", methods=["GET"])
+    def read_rule(rule_id: str):
+        """Возвращает правило повторения по ID.
+
+        Args:
+            rule_id: ID правила
+
+        Returns:
+            JSON правила или сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            rule = store.read_rule(rule_id)
+            if rule is None:
+                return "Правило не найдено", 404
+            return jsonify(rule.to_dict())
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при получении правила: {ex}", 500
+
+    @app.route(RECURRING_API_ROOT + "/<rule_id>/", methods=["DELETE"])
+    @app.route(TENANT_RECURRING_ROOT + "/<rule_id>/", methods=["DELETE"])
+    def delete_rule(rule_id: str):
+        """Удаляет правило повторения вместе со всеми повторениями.
+
+        Args:
+            rule_id: ID правила
+
+        Returns:
+            Сообщение об успехе или ошибке
+        """
+        store = _current_logic()
+        try:
+            with metrics.STAGE_DURATION.time("logic"):
+                store.delete_rule(rule_id)
+            return "Удалено", 200
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при удалении: {ex}", 500
+
+    @app.route(CALENDAR_API_ROOT + "/<int:year>/<int:month>/", methods=["GET"])
+    @app.route(TENANT_CALENDAR_ROOT + "/<int:year>/<int:month>/", methods=["GET"])
+    def calendar_month(year: int, month: int):
+        """Возвращает занятые дни месяца для отрисовки календаря.
+
+        Маска месяца хранится готовой, поэтому ответ строится за O(1)
+        независимо от числа событий.
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            JSON с маской занятых дней bitmap (бит d-1 - день d), списком
+            дней days, их числом count и числом дней в месяце или
+            сообщение об ошибке
+        """
+        store = _current_logic()
+        try:
+            etag = _etag(store.version, formats.JSON, store)
+            last_modified = store.last_modified
+            if _not_modified(etag, last_modified):
+                return _not_modified_response(etag, last_modified)
+            with metrics.STAGE_DURATION.time("logic"):
+                bitmap = store.month_bitmap(year, month)
+            days = [day for day in range(1, 32) if bitmap >> (day - 1) & 1]
+            response = jsonify(
+                year=year,
+                month=month,
+                days_in_month=calendar.monthrange(year, month)[1],
+                count=len(days),
+                bitmap=bitmap,
+                days=days,
+            )
+            return _with_validators(response, etag, last_modified)
+        except ValueError as ex:
+            return f"Неверный параметр запроса: {ex}", 400
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            return f"Ошибка при получении календаря: {ex}", 500
+
     @app.route(EVENTS_API_ROOT + "/<_id>/", methods=["GET"])
+    @app.route(TENANT_EVENTS_ROOT + "/<_id>/", methods=["GET"])
     def read(_id: str):
         """Возвращает событие по ID.
 
@@ -143,18 +1562,34 @@ def create_app():
             _id: ID события для поиска
 
         Returns:
-            Событие в сыром формате или сообщение об ошибке
+            Событие в согласованном по Accept формате или сообщение об ошибке
         """
+        store = _current_logic()
         try:
-            events = _events_logic.read(_id)
+            mimetype = _response_format()
+            version = store.event_version(_id)
+            if version is None:
+                return "Событие не найдено", 404
+            etag = _etag(version, mimetype, store)
+            last_modified = store.last_modified
+            if _not_modified(etag, last_modified):
+                return _not_modified_response(etag, last_modified)
+            with metrics.STAGE_DURATION.time("logic"):
+                events = store.read(_id)
             if not events:
                 return "Событие не найдено", 404
-            raw_note = _to_raw(events)
-            return raw_note, 200
+            with metrics.STAGE_DURATION.time("serialize"):
+                if mimetype == formats.TEXT:
+                    body = _to_raw(events)
+                else:
+                    body = formats.encode_event(events, mimetype)
+            response = Response(body, 200, mimetype=mimetype)
+            return _with_validators(response, etag, last_modified)
         except (ImportError, AttributeError, RuntimeError) as ex:
             return f"Ошибка при чтении: {ex}", 500
 
     @app.route(EVENTS_API_ROOT + "/<_id>/", methods=["PUT"])
+    @app.route(TENANT_EVENTS_ROOT + "/<_id>/", methods=["PUT"])
     def update(_id: str):
         """Обновляет существующее событие.
 
@@ -164,19 +1599,25 @@ def create_app():
         Returns:
             Сообщение об успехе или ошибке
         """
+        store = _current_logic()
         try:
-            data = request.get_data().decode('utf-8')
-            event = _from_raw(data)
-            _events_logic.update(_id, event)
+            data = request.get_data()
+            with metrics.STAGE_DURATION.time("parse"):
+                event = _event_from_request(data, request.mimetype)
+            with metrics.STAGE_DURATION.time("logic"):
+                store.update(_id, event)
             return "Обновлено", 200
         except ApiException as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
             return f"Ошибка API: {ex}", 400
         except ValueError as ex:
+            metrics.count_rejection(ex)
             return f"Ошибка: {ex}", 404
         except (ImportError, AttributeError, RuntimeError) as ex:
             return f"Ошибка при обновлении: {ex}", 500
 
     @app.route(EVENTS_API_ROOT + "/<_id>/", methods=["DELETE"])
+    @app.route(TENANT_EVENTS_ROOT + "/<_id>/", methods=["DELETE"])
     def delete(_id: str):
         """Удаляет событие по ID.
 
@@ -186,10 +1627,228 @@ def create_app():
         Returns:
             Сообщение об успехе или ошибке
         """
+        store = _current_logic()
         try:
-            _events_logic.delete(_id)
+            with metrics.STAGE_DURATION.time("logic"):
+                store.delete(_id)
             return "Удалено", 200
         except (ImportError, AttributeError, RuntimeError) as ex:
             return f"Ошибка при удалении: {ex}", 500
 
+    shared_db = os.environ.get(SHARED_DB_ENV)
+    if admin_token and not shared_db:
+        _add_snapshot_routes(app, admin_token)
+    if not shared_db:
+        # Общую базу SQLite копируют ее собственным резервным копированием
+        app.cli.add_command(snapshot_cli)
     return app
+
+
+def _has_admin_token(token: str) -> bool:
+    """Проверяет токен администратора в заголовке Authorization запроса.
+
+    Args:
+        token: Токен администратора или None, если он не задан
+
+    Returns:
+        bool: True, если токен задан и запрос передал его как Bearer
+    """
+    if not token:
+        return False
+    scheme, _, credentials = request.headers.get("Authorization", "").partition(" ")
+    return scheme.lower() == "bearer" and hmac.compare_digest(
+        credentials.encode(), token.encode()
+    )
+
+
+def _add_snapshot_routes(app: Flask, token: str) -> None:
+    """Добавляет маршруты выгрузки и загрузки снимков календаря.
+
+    Маршруты выгружают или заменяют все данные календаря, поэтому
+    доступны только с токеном администратора и не чаще, чем позволяет
+    _snapshot_admission.
+
+    Args:
+        app: Flask приложение
+        token: Токен администратора (заголовок Authorization: Bearer)
+    """
+    max_bytes = int(os.environ.get(MAX_SNAPSHOT_BYTES_ENV, DEFAULT_MAX_SNAPSHOT_BYTES))
+    interval = float(os.environ.get(SNAPSHOT_INTERVAL_ENV, DEFAULT_SNAPSHOT_INTERVAL))
+    _snapshot_admission.configure(
+        admission.RateLimiter(global_rate=1 / interval) if interval else None,
+        admission.ConcurrencyGate(1),
+    )
+
+    def check_access() -> Response:
+        """Проверяет токен администратора и частоту операций со снимками.
+
+        Returns:
+            None, если операция допущена (по ее завершении нужно вызвать
+            _snapshot_admission.leave()), иначе ответ 401 или 429
+        """
+        if not _has_admin_token(token):
+            response = Response("Нужен токен администратора", 401, mimetype="text/plain")
+            response.www_authenticate.type = "bearer"
+            return response
+        rejection = _snapshot_admission.enter(request.remote_addr or "")
+        if rejection is None:
+            return None
+        response = Response(
+            "Операция со снимком уже выполняется или выполнялась недавно, "
+            "повторите позже", 429, mimetype="text/plain",
+        )
+        response.retry_after = retry_after_seconds(rejection[1])
+        return response
+
+    @app.route(SNAPSHOT_API_ROOT + "/", methods=["GET"])
+    @app.route(TENANT_SNAPSHOT_ROOT + "/", methods=["GET"])
+    def export_snapshot():
+        """Выгружает все события и правила календаря двоичным снимком.
+
+        Снимок пишется во временный файл и отдается из него, поэтому
+        изменения приостанавливаются только на время записи файла, а не на
+        время передачи клиенту.
+
+        Returns:
+            Файл снимка с числом событий в заголовке X-Events-Count или
+            сообщение об ошибке
+        """
+        denied = check_access()
+        if denied is not None:
+            return denied
+        store = _current_logic()
+        file = tempfile.TemporaryFile()
+        try:
+            with metrics.STAGE_DURATION.time("serialize"):
+                count = store.export_snapshot(file)
+            file.seek(0)
+        except (ImportError, AttributeError, RuntimeError, OSError) as ex:
+            file.close()
+            return f"Ошибка при выгрузке снимка: {ex}", 500
+        finally:
+            _snapshot_admission.leave()
+        response = send_file(
+            file, mimetype=snapshot.MIMETYPE, as_attachment=True,
+            download_name="calendar.snapshot",
+        )
+        response.headers["X-Events-Count"] = str(count)
+        return response
+
+    @app.route(SNAPSHOT_API_ROOT + "/", methods=["PUT"])
+    @app.route(TENANT_SNAPSHOT_ROOT + "/", methods=["PUT"])
+    def import_snapshot():
+        """Заменяет все события и правила календаря содержимым снимка.
+
+        Тело запроса - файл снимка из GET того же маршрута, не больше
+        MAX_SNAPSHOT_BYTES_ENV байт. Тело сохраняется во временный файл и
+        читается через mmap.
+
+        Returns:
+            JSON с числом загруженных событий и правил и новой эпохой
+            хранилища или сообщение об ошибке
+        """
+        denied = check_access()
+        if denied is not None:
+            return denied
+        store = _current_logic()
+        try:
+            if (request.content_length or 0) > max_bytes:
+                return f"Снимок больше {max_bytes} байт", 413
+            with tempfile.NamedTemporaryFile() as file:
+                size = 0
+                while True:
+                    chunk = request.stream.read(COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        return f"Снимок больше {max_bytes} байт", 413
+                    file.write(chunk)
+                file.flush()
+                with metrics.STAGE_DURATION.time("logic"):
+                    count = store.import_snapshot(file.name)
+            return jsonify(events=count, rules=len(store.list_rules()), epoch=store.epoch)
+        except ValueError as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
+            return f"Неверный снимок: {ex}", 400
+        except (ImportError, AttributeError, RuntimeError, OSError) as ex:
+            return f"Ошибка при загрузке снимка: {ex}", 500
+        finally:
+            _snapshot_admission.leave()
+
+
+# Команды Flask CLI: flask --app run snapshot export|import <файл>
+snapshot_cli = AppGroup("snapshot", help="Выгрузка и загрузка двоичных снимков календаря.")
+
+
+def _cli_store(calendar_name: str):
+    """Возвращает загруженное хранилище для команды CLI.
+
+    Args:
+        calendar_name: Имя календаря арендатора или None для общего
+
+    Returns:
+        Хранилище событий и функция его освобождения
+    """
+    if calendar_name is None:
+        return _events_logic.load(), _events_logic.close
+    tenant = _tenants.acquire(calendar_name)
+
+    def release() -> None:
+        """Освобождает календарь и закрывает хранилища арендаторов."""
+        _tenants.release(tenant)
+        _tenants.close()
+
+    return tenant.logic, release
+
+
+@snapshot_cli.command("export")
+@click.argument("path", type=click.Path(dir_okay=False, writable=True))
+@click.option("--calendar", "calendar_name", help="Имя календаря арендатора.")
+def export_snapshot_command(path: str, calendar_name: str) -> None:
+    """Выгружает календарь в файл снимка PATH.
+
+    \f
+    Args:
+        path: Путь к файлу снимка
+        calendar_name: Имя календаря арендатора или None
+    """
+    store, release = _cli_store(calendar_name)
+    try:
+        started = time.perf_counter()
+        tmp_path = path + ".tmp"
+        try:
+            with open(tmp_path, "wb") as file:
+                count = store.export_snapshot(file)
+                file.flush()
+                os.fsync(file.fileno())
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        os.replace(tmp_path, path)
+        click.echo(f"Выгружено событий: {count} за {time.perf_counter() - started:.2f} с")
+    finally:
+        release()
+
+
+@snapshot_cli.command("import")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--calendar", "calendar_name", help="Имя календаря арендатора.")
+def import_snapshot_command(path: str, calendar_name: str) -> None:
+    """Заменяет содержимое календаря снимком из файла PATH.
+
+    \f
+    Args:
+        path: Путь к файлу снимка
+        calendar_name: Имя календаря арендатора или None
+    """
+    store, release = _cli_store(calendar_name)
+    try:
+        started = time.perf_counter()
+        try:
+            count = store.import_snapshot(path)
+        except ValueError as ex:
+            raise click.ClickException(f"Неверный снимок: {ex}") from None
+        click.echo(f"Загружено событий: {count} за {time.perf_counter() - started:.2f} с")
+    finally:
+        release()
@@ -0,0 +1,856 @@
+"""Асинхронный (ASGI) режим обслуживания API событий.
+
+ASGI приложение обрабатывает основные маршруты /api/v1/events/ прямо в
+цикле событий asyncio: чтение из памяти выполняется без блокировок, а
+операции, которые могут ждать диска (запись в журнал, SQLite), уходят
+в пул потоков через asyncio.to_thread. Ожидающее соединение не занимает
+поток. Остальные маршруты (фронт, статика, пакетные операции, выдача
+диапазона дат потоком) и запросы в форматах JSON и двоичном передаются
+Flask приложению в отдельном пуле потоков: долгие запросы Flask (поток
+изменений, long-poll) не занимают потоки, нужные быстрым маршрутам.
+
+Приложение совместимо с любым ASGI сервером (uvicorn app.asgi:application),
+а для запуска без дополнительных зависимостей есть встроенный HTTP/1.1
+сервер на asyncio:
+
+    python -m app.asgi --port 8000
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from http import HTTPStatus
+from itertools import islice
+from urllib.parse import parse_qs, unquote
+
+from werkzeug.datastructures import MIMEAccept
+from werkzeug.http import http_date, is_resource_modified, parse_accept_header
+
+import app.api as api
+import app.compression as compression
+import app.formats as formats
+import app.metrics as metrics
+import app.sqlite_store as sqlite_store
+
+# Типы сообщений протокола ASGI
+Scope = dict
+Receive = Callable[[], Awaitable[dict]]
+Send = Callable[[dict], Awaitable[None]]
+
+TEXT_PLAIN = b"text/plain; charset=utf-8"
+TEXT_HTML = b"text/html; charset=utf-8"
+
+# Максимальный размер заголовков и тела запроса встроенного сервера
+MAX_HEADER_BYTES = 64 * 1024
+MAX_BODY_BYTES = 16 * 1024 * 1024
+# Число фрагментов потокового ответа Flask, буферизуемых до отправки
+WSGI_QUEUE_SIZE = 8
+# Переменная окружения с числом потоков для запросов к Flask приложению;
+# столько запросов Flask (включая долгие потоки изменений) выполняются
+# одновременно, остальные ждут в очереди пула
+WSGI_THREADS_ENV = "CALENDAR_WSGI_THREADS"
+DEFAULT_WSGI_THREADS = 32
+
+
+class ASGIApplication:
+    """ASGI приложение с асинхронной обработкой CRUD маршрутов событий."""
+
+    def __init__(self, flask_app=None) -> None:
+        """Инициализирует приложение.
+
+        Args:
+            flask_app: Flask приложение для остальных маршрутов; по умолчанию
+                создается api.create_app()
+        """
+        self._flask_app = flask_app or api.create_app()
+        # Отдельный пул: потоки Flask заняты и долгими запросами, и
+        # общий пул asyncio.to_thread не должен от них зависеть
+        self._wsgi_executor = ThreadPoolExecutor(
+            int(os.environ.get(WSGI_THREADS_ENV, DEFAULT_WSGI_THREADS)),
+            thread_name_prefix="wsgi",
+        )
+        self._logic = api._events_logic  # pylint: disable=protected-access
+        # Определяется после загрузки хранилища: чтение из SQLite обращается
+        # к диску, из памяти - нет
+        self._blocking_reads = None
+        self._prefix = api.EVENTS_API_ROOT + "/"
+        # Маршруты Flask вида /api/v1/events/<имя>/..., которые нельзя
+        # принять за ID события
+        self._reserved = {
+            rule.rule[len(self._prefix):].split("/")[0]
+            for rule in self._flask_app.url_map.iter_rules()
+            if rule.rule.startswith(self._prefix)
+        } - {"", "<_id>"}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Обрабатывает соединение по протоколу ASGI.
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+        """
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send, self.close)
+            return
+        if scope["type"] != "http":
+            return
+        handler = self._route(scope)
+        if handler is None:
+            await self._call_wsgi(scope, receive, send)
+            return
+        if self._blocking_reads is None:
+            # Загрузка хранилища не должна блокировать цикл событий
+            if not await asyncio.to_thread(self._logic.wait, api.LOAD_WAIT_SECONDS):
+                await _respond(
+                    send, 503, "Хранилище загружается", headers=[(b"retry-after", b"1")]
+                )
+                return
+            self._blocking_reads = isinstance(
+                self._logic.load(), sqlite_store.SQLiteEventsLogic
+            )
+        handler, args = handler
+        method = scope["method"]
+        route = self._prefix + ("<_id>/" if args else "")
+        status = []
+
+        async def send_with_status(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                status.append(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        write = method in api.WRITE_METHODS
+        try:
+            if write:
+                client = scope.get("client")
+                forwarded_for = next(
+                    (value for name, value in scope["headers"] if name == b"x-forwarded-for"),
+                    None,
+                )
+                rejection = api.admit_write(
+                    client[0] if client else "",
+                    None if forwarded_for is None else forwarded_for.decode("latin-1"),
+                )
+                if rejection is not None:
+                    reason, wait = rejection
+                    retry = str(api.retry_after_seconds(wait)).encode("ascii")
+                    write = False
+                    await _respond(
+                        send_with_status, 429,
+                        f"Слишком много запросов на запись ({reason}), повторите позже",
+                        TEXT_PLAIN, headers=[(b"retry-after", retry)],
+                    )
+                    return
+            await handler(scope, receive, send_with_status, *args)
+        finally:
+            if write:
+                api.finish_write()
+            metrics.REQUEST_DURATION.observe(time.perf_counter() - started, method, route)
+            metrics.REQUESTS.inc(method, route, str(status[0] if status else 500))
+
+    def _route(self, scope: Scope):
+        """Находит асинхронный обработчик запроса.
+
+        Args:
+            scope: Описание запроса
+
+        Returns:
+            Кортеж (обработчик, аргументы) или None, если запрос нужно
+            передать Flask приложению
+        """
+        path, method = scope["path"], scope["method"]
+        if not path.startswith(self._prefix) or not _plain_text(scope):
+            return None
+        rest = path[len(self._prefix):]
+        if not rest:
+            if method == "POST":
+                return self._create, ()
+            if method in ("GET", "HEAD"):
+                return self._list, ()
+            return None
+        _id = rest[:-1]
+        if not rest.endswith("/") or not _id or "/" in _id or _id in self._reserved:
+            return None
+        handlers = {
+            "GET": self._read,
+            "HEAD": self._read,
+            "PUT": self._update,
+            "DELETE": self._delete,
+        }
+        handler = handlers.get(method)
+        return (handler, (_id,)) if handler else None
+
+    async def _run_read(self, func, *args):
+        """Выполняет операцию чтения хранилища.
+
+        Args:
+            func: Метод хранилища
+            *args: Аргументы метода
+
+        Returns:
+            Результат метода
+        """
+        if self._blocking_reads:
+            return await asyncio.to_thread(func, *args)
+        return func(*args)
+
+    async def _create(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Создает новое событие (POST /api/v1/events/).
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+        """
+        data = (await _read_body(receive)).decode("utf-8", "replace")
+        try:
+            with metrics.STAGE_DURATION.time("parse"):
+                event = api._from_raw(data)  # pylint: disable=protected-access
+            with metrics.STAGE_DURATION.time("logic"):
+                event_id = await asyncio.to_thread(self._logic.create, event)
+            await _respond(send, 201, f"Новый ID: {event_id}")
+        except api.ApiException as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
+            await _respond(send, 400, f"Ошибка API: {ex}")
+        except ValueError as ex:
+            metrics.count_rejection(ex)
+            await _respond(send, 400, f"Ошибка валидации: {ex}")
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            await _respond(send, 500, f"Внутренняя ошибка сервера: {ex}")
+
+    async def _list(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Возвращает список событий (GET /api/v1/events/).
+
+        Полный список отдается из кэша сериализованного ответа, страница
+        с limit собирается в цикле событий. Выдача без limit с курсором
+        или диапазоном дат передается потоком Flask приложению.
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+        """
+        args = {
+            key: values[0]
+            for key, values in parse_qs(
+                scope["query_string"].decode("latin-1"), keep_blank_values=True
+            ).items()
+        }
+        start, end = args.get("from"), args.get("to")
+        by_date = start is not None or end is not None
+        try:
+            etag = api._etag(self._logic.version)  # pylint: disable=protected-access
+            last_modified = self._logic.last_modified
+            if _not_modified(scope, etag, last_modified):
+                await _respond(send, 304, b"", validators=(etag, last_modified))
+                return
+            cursor = args.get("cursor")
+            limit = api._page_limit(args.get("limit"))  # pylint: disable=protected-access
+            if limit is None:
+                if cursor is not None or by_date:
+                    # Выдача без limit идет потоком через Flask приложение
+                    await self._call_wsgi(scope, receive, send)
+                    return
+                list_cache = api._list_cache  # pylint: disable=protected-access
+                with metrics.STAGE_DURATION.time("serialize"):
+                    body, encoding = await asyncio.to_thread(
+                        list_cache.encoded_body, self._logic, _accept_encoding(scope)
+                    )
+                await _respond(
+                    send, 200, body, TEXT_PLAIN, (etag, last_modified), encoding=encoding
+                )
+                return
+            if by_date:
+                events = self._logic.iter_range(start, end, cursor)
+            else:
+                events = self._logic.iter_events(cursor)
+            with metrics.STAGE_DURATION.time("logic"):
+                page = await self._run_read(list, islice(events, limit + 1))
+            with metrics.STAGE_DURATION.time("serialize"):
+                body = "".join(api._stream_raw(page[:limit]))  # pylint: disable=protected-access
+                body, encoding = compression.maybe_compress(
+                    body.encode("utf-8"), _accept_encoding(scope)
+                )
+            headers = []
+            if len(page) > limit:
+                last = page[limit - 1]
+                next_cursor = last.dates if by_date else last.id
+                headers.append((b"x-next-cursor", next_cursor.encode("latin-1")))
+            await _respond(
+                send, 200, body, TEXT_PLAIN, (etag, last_modified), headers, encoding
+            )
+        except api.ApiException as ex:
+            await _respond(send, 400, f"Ошибка API: {ex}")
+        except ValueError as ex:
+            await _respond(send, 400, f"Неверный параметр запроса: {ex}")
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            await _respond(send, 500, f"Ошибка при получении списка: {ex}")
+
+    async def _read(self, scope: Scope, receive: Receive, send: Send, _id: str) -> None:
+        """Возвращает событие по ID (GET /api/v1/events/<id>/).
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+            _id: ID события
+        """
+        try:
+            version = await self._run_read(self._logic.event_version, _id)
+            if version is None:
+                await _respond(send, 404, "Событие не найдено")
+                return
+            etag = api._etag(version)  # pylint: disable=protected-access
+            last_modified = self._logic.last_modified
+            if _not_modified(scope, etag, last_modified):
+                await _respond(send, 304, b"", validators=(etag, last_modified))
+                return
+            with metrics.STAGE_DURATION.time("logic"):
+                event = await self._run_read(self._logic.read, _id)
+            if not event:
+                await _respond(send, 404, "Событие не найдено")
+                return
+            with metrics.STAGE_DURATION.time("serialize"):
+                body = api._to_raw(event)  # pylint: disable=protected-access
+                body, encoding = compression.maybe_compress(
+                    body.encode("utf-8"), _accept_encoding(scope)
+                )
+            await _respond(
+                send, 200, body, TEXT_PLAIN, (etag, last_modified), encoding=encoding
+            )
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            await _respond(send, 500, f"Ошибка при чтении: {ex}")
+
+    async def _update(self, scope: Scope, receive: Receive, send: Send, _id: str) -> None:
+        """Обновляет событие (PUT /api/v1/events/<id>/).
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+            _id: ID события
+        """
+        data = (await _read_body(receive)).decode("utf-8", "replace")
+        try:
+            with metrics.STAGE_DURATION.time("parse"):
+                event = api._from_raw(data)  # pylint: disable=protected-access
+            with metrics.STAGE_DURATION.time("logic"):
+                await asyncio.to_thread(self._logic.update, _id, event)
+            await _respond(send, 200, "Обновлено")
+        except api.ApiException as ex:
+            metrics.VALIDATION_FAILURES.inc("format")
+            await _respond(send, 400, f"Ошибка API: {ex}")
+        except ValueError as ex:
+            metrics.count_rejection(ex)
+            await _respond(send, 404, f"Ошибка: {ex}")
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            await _respond(send, 500, f"Ошибка при обновлении: {ex}")
+
+    async def _delete(self, scope: Scope, receive: Receive, send: Send, _id: str) -> None:
+        """Удаляет событие (DELETE /api/v1/events/<id>/).
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+            _id: ID события
+        """
+        try:
+            with metrics.STAGE_DURATION.time("logic"):
+                await asyncio.to_thread(self._logic.delete, _id)
+            await _respond(send, 200, "Удалено")
+        except (ImportError, AttributeError, RuntimeError) as ex:
+            await _respond(send, 500, f"Ошибка при удалении: {ex}")
+
+    def close(self) -> None:
+        """Останавливает пул потоков Flask и закрывает хранилище.
+
+        Запросы, ожидающие в очереди пула, отменяются; выполняющиеся
+        (например, потоки изменений) не ожидаются.
+        """
+        self._wsgi_executor.shutdown(wait=False, cancel_futures=True)
+        self._logic.close()
+
+    async def _call_wsgi(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Передает запрос Flask приложению в отдельном потоке.
+
+        Ответ Flask итерируется в том же потоке, поэтому потоковые ответы
+        (stream_with_context) работают как под WSGI сервером. Фрагменты
+        передаются в цикл событий через ограниченную очередь, так что
+        медленный клиент приостанавливает генерацию ответа.
+
+        Args:
+            scope: Описание запроса
+            receive: Функция получения сообщений от сервера
+            send: Функция отправки сообщений серверу
+        """
+        environ = _make_environ(scope, await _read_body(receive))
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue(WSGI_QUEUE_SIZE)
+        closed = threading.Event()
+
+        def put(message) -> None:
+            asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        def run() -> None:
+            status_headers = []
+
+            def start_response(status, headers, exc_info=None):
+                status_headers[:] = [status, headers]
+
+            try:
+                result = self._flask_app.wsgi_app(environ, start_response)
+                try:
+                    for chunk in result:
+                        if closed.is_set():
+                            return
+                        if chunk:
+                            put((status_headers, chunk))
+                finally:
+                    if hasattr(result, "close"):
+                        result.close()
+                put((status_headers, None))
+            except BaseException as ex:  # pylint: disable=broad-except
+                put(ex)
+
+        worker = loop.run_in_executor(self._wsgi_executor, run)
+        started = False
+        try:
+            while True:
+                message = await queue.get()
+                if isinstance(message, BaseException):
+                    raise message
+                (status, headers), chunk = message
+                if not started:
+                    started = True
+                    await send({
+                        "type": "http.response.start",
+                        "status": int(status.split(" ", 1)[0]),
+                        "headers": [
+                            (name.lower().encode("latin-1"), value.encode("latin-1"))
+                            for name, value in headers
+                        ],
+                    })
+                if chunk is None:
+                    await send({"type": "http.response.body", "body": b""})
+                    break
+                await send({
+                    "type": "http.response.body", "body": chunk, "more_body": True
+                })
+        finally:
+            # Клиент мог отключиться: поток не должен ждать места в очереди
+            closed.set()
+            while not worker.done():
+                while not queue.empty():
+                    queue.get_nowait()
+                await asyncio.wait({worker}, timeout=0.05)
+
+
+async def _lifespan(receive: Receive, send: Send, close: Callable[[], None]) -> None:
+    """Обрабатывает события запуска и остановки ASGI сервера.
+
+    При запуске начинается фоновая загрузка хранилища, при остановке
+    хранилище сбрасывает журнал на диск.
+
+    Args:
+        receive: Функция получения сообщений от сервера
+        send: Функция отправки сообщений серверу
+        close: Функция освобождения ресурсов приложения
+    """
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            api._events_logic.start()  # pylint: disable=protected-access
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            await asyncio.to_thread(close)
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _read_body(receive: Receive) -> bytes:
+    """Читает тело запроса целиком.
+
+    Args:
+        receive: Функция получения сообщений от сервера
+
+    Returns:
+        bytes: Тело запроса
+    """
+    parts = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        parts.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(parts)
+
+
+async def _respond(
+    send: Send,
+    status: int,
+    body,
+    content_type: bytes = TEXT_HTML,
+    validators: tuple[str, float] = None,
+    headers: list[tuple[bytes, bytes]] = None,
+    encoding: str = None,
+) -> None:
+    """Отправляет ответ целиком.
+
+    Args:
+        send: Функция отправки сообщений серверу
+        status: Код ответа
+        body: Тело ответа (str или bytes)
+        content_type: Значение Content-Type
+        validators: ETag и время изменения для условных запросов
+        headers: Дополнительные заголовки
+        encoding: Кодировка, которой уже сжато тело; ETag сжатого тела
+            отдается слабым, как во Flask приложении
+    """
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    response_headers = list(headers or [])
+    if status != 304:
+        response_headers.append((b"content-type", content_type))
+    response_headers.append((b"content-length", str(len(body)).encode()))
+    if encoding is not None:
+        response_headers.append((b"content-encoding", encoding.encode("latin-1")))
+    if validators is not None:
+        etag, last_modified = validators
+        etag = f'W/"{etag}"' if encoding is not None else f'"{etag}"'
+        response_headers += [
+            (b"etag", etag.encode("latin-1")),
+            (b"last-modified", http_date(int(last_modified)).encode("latin-1")),
+            (b"cache-control", b"no-cache"),
+            (b"vary", b"Accept, Accept-Encoding"),
+        ]
+    await send({"type": "http.response.start", "status": status, "headers": response_headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+def _accept_encoding(scope: Scope):
+    """Выбирает кодировку сжатия ответа по заголовку Accept-Encoding.
+
+    Args:
+        scope: Описание запроса
+
+    Returns:
+        Кодировка из compression.ENCODINGS или None
+    """
+    for name, value in scope["headers"]:
+        if name == b"accept-encoding":
+            return compression.negotiate(value.decode("latin-1"))
+    return None
+
+
+def _plain_text(scope: Scope) -> bool:
+    """Проверяет, что запрос и ответ используют сырой формат.
+
+    Args:
+        scope: Описание запроса
+
+    Returns:
+        True если тело запроса не в JSON и не в двоичном формате, а по
+        Accept выбирается сырой формат
+    """
+    for name, value in scope["headers"]:
+        if name == b"accept":
+            accept = parse_accept_header(value.decode("latin-1"), MIMEAccept)
+            if accept.best_match(formats.MIMETYPES, formats.TEXT) != formats.TEXT:
+                return False
+        elif name == b"content-type":
+            mimetype = value.split(b";")[0].strip().decode("latin-1").lower()
+            if mimetype in (formats.JSON, formats.BINARY):
+                return False
+    return True
+
+
+def _not_modified(scope: Scope, etag: str, last_modified: float) -> bool:
+    """Проверяет условные заголовки запроса (If-None-Match и др.).
+
+    Args:
+        scope: Описание запроса
+        etag: Текущий ETag ресурса
+        last_modified: Время последнего изменения ресурса (Unix time)
+
+    Returns:
+        True если у клиента актуальная копия и можно ответить 304
+    """
+    environ = {"REQUEST_METHOD": scope["method"]}
+    for name, value in scope["headers"]:
+        if name in (b"if-none-match", b"if-modified-since", b"if-match", b"if-range"):
+            key = "HTTP_" + name.decode("latin-1").upper().replace("-", "_")
+            environ[key] = value.decode("latin-1")
+    if len(environ) == 1:
+        return False
+    return not is_resource_modified(
+        environ,
+        etag=etag,
+        last_modified=datetime.fromtimestamp(int(last_modified), timezone.utc),
+    )
+
+
+def _make_environ(scope: Scope, body: bytes) -> dict:
+    """Формирует WSGI окружение по описанию ASGI запроса.
+
+    Args:
+        scope: Описание запроса
+        body: Тело запроса
+
+    Returns:
+        dict: Окружение WSGI (PEP 3333)
+    """
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client")
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode("utf-8").decode("latin-1"),
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope["query_string"].decode("latin-1"),
+        "SERVER_NAME": str(server[0]),
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": f"HTTP/{scope.get('http_version', '1.1')}",
+        "REMOTE_ADDR": client[0] if client else "",
+        "CONTENT_LENGTH": str(len(body)),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ["CONTENT_TYPE"] = value
+        elif name != "CONTENT_LENGTH":
+            key = "HTTP_" + name
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class _Connection:
+    """Соединение встроенного HTTP/1.1 сервера с поддержкой keep-alive."""
+
+    def __init__(self, application, reader, writer) -> None:
+        """Инициализирует соединение.
+
+        Args:
+            application: ASGI приложение
+            reader: Поток чтения соединения
+            writer: Поток записи соединения
+        """
+        self._application = application
+        self._reader = reader
+        self._writer = writer
+        self._server = writer.get_extra_info("sockname")
+        self._client = writer.get_extra_info("peername")
+
+    async def serve(self) -> None:
+        """Обрабатывает запросы соединения, пока клиент его не закроет."""
+        try:
+            while await self._serve_request():
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self._writer.close()
+
+    async def _serve_request(self) -> bool:
+        """Читает и обрабатывает один запрос.
+
+        Returns:
+            bool: True если соединение можно использовать дальше
+        """
+        try:
+            head = await self._reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            await self._send_error(431)
+            return False
+        lines = head[:-4].decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            await self._send_error(400)
+            return False
+        headers = []
+        for line in lines[1:]:
+            name, _, value = line.partition(":")
+            headers.append((name.strip().lower().encode("latin-1"),
+                            value.strip().encode("latin-1")))
+        header_map = dict(headers)
+        if b"chunked" in header_map.get(b"transfer-encoding", b"").lower():
+            await self._send_error(411)
+            return False
+        length = header_map.get(b"content-length", b"0") or b"0"
+        if not length.isdigit():
+            # Нечисловая или отрицательная длина тела
+            await self._send_error(400)
+            return False
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            await self._send_error(413)
+            return False
+        body = await self._reader.readexactly(length) if length else b""
+
+        http_version = version.partition("/")[2] or "1.0"
+        connection = header_map.get(b"connection", b"").lower()
+        keep_alive = (
+            connection != b"close"
+            if http_version == "1.1" else connection == b"keep-alive"
+        )
+        path, _, query = target.partition("?")
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0", "spec_version": "2.3"},
+            "http_version": http_version,
+            "method": method.upper(),
+            "scheme": "http",
+            "path": unquote(path),
+            "raw_path": path.encode("latin-1"),
+            "query_string": query.encode("latin-1"),
+            "root_path": "",
+            "headers": headers,
+            "client": self._client,
+            "server": self._server,
+        }
+        received = False
+
+        async def receive() -> dict:
+            nonlocal received
+            if not received:
+                received = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            # Тело уже прочитано: дальнейшие вызовы ждут отключения клиента
+            await asyncio.Future()
+            return {"type": "http.disconnect"}
+
+        state = {"chunked": False, "head": method.upper() == "HEAD"}
+
+        async def send(message: dict) -> None:
+            if message["type"] == "http.response.start":
+                state["start"] = message
+                return
+            data = message.get("body", b"")
+            more = message.get("more_body", False)
+            if "start" in state:
+                self._write_head(state.pop("start"), data, more, keep_alive, state)
+            if state["head"]:
+                data = b""
+            if state["chunked"]:
+                if data:
+                    self._writer.write(b"%x\r\n%b\r\n" % (len(data), data))
+                if not more:
+                    self._writer.write(b"0\r\n\r\n")
+            elif data:
+                self._writer.write(data)
+            await self._writer.drain()
+
+        await self._application(scope, receive, send)
+        return keep_alive
+
+    def _write_head(self, start: dict, data: bytes, more: bool,
+                    keep_alive: bool, state: dict) -> None:
+        """Записывает строку статуса и заголовки ответа.
+
+        Если приложение не указало Content-Length, для ответа из одного
+        фрагмента он вычисляется, а для потокового ответа используется
+        кодирование chunked.
+
+        Args:
+            start: Сообщение http.response.start
+            data: Первый фрагмент тела
+            more: Будут ли еще фрагменты
+            keep_alive: Сохраняется ли соединение
+            state: Состояние отправки ответа
+        """
+        status = start["status"]
+        headers = list(start.get("headers", []))
+        names = {name.lower() for name, _ in headers}
+        if b"content-length" not in names and status not in (204, 304):
+            if more:
+                headers.append((b"transfer-encoding", b"chunked"))
+                state["chunked"] = True
+            else:
+                headers.append((b"content-length", str(len(data)).encode()))
+        headers.append((b"connection", b"keep-alive" if keep_alive else b"close"))
+        try:
+            reason = HTTPStatus(status).phrase
+        except ValueError:
+            reason = ""
+        lines = [f"HTTP/1.1 {status} {reason}".encode("latin-1")]
+        lines += [name + b": " + value for name, value in headers]
+        self._writer.write(b"\r\n".join(lines) + b"\r\n\r\n")
+
+    async def _send_error(self, status: int) -> None:
+        """Отправляет ответ об ошибке протокола и закрывает соединение.
+
+        Args:
+            status: Код ответа
+        """
+        reason = HTTPStatus(status).phrase
+        self._writer.write(
+            f"HTTP/1.1 {status} {reason}\r\nContent-Length: 0\r\n"
+            "Connection: close\r\n\r\n".encode("latin-1")
+        )
+        await self._writer.drain()
+
+
+async def serve(application, host: str = "127.0.0.1", port: int = 8000,
+                ready: threading.Event = None) -> None:
+    """Запускает встроенный HTTP/1.1 сервер для ASGI приложения.
+
+    Args:
+        application: ASGI приложение
+        host: Адрес для прослушивания
+        port: Порт
+        ready: Событие, устанавливаемое после начала приема соединений
+    """
+    async def handle(reader, writer) -> None:
+        await _Connection(application, reader, writer).serve()
+
+    server = await asyncio.start_server(
+        handle, host, port, limit=MAX_HEADER_BYTES, backlog=1024
+    )
+    if ready is not None:
+        ready.set()
+    async with server:
+        await server.serve_forever()
+
+
+def main() -> int:
+    """Запускает API во встроенном асинхронном сервере.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description="Асинхронный сервер API событий")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(application, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        application.close()
+    return 0
+
+
+application = ASGIApplication()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
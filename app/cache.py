@@ -0,0 +1,174 @@
+"""Кэш сериализованного списка событий.
+
+ResponseCache хранит готовое тело ответа GET /api/v1/events/ в виде одного
+объекта bytes и отрисованные строки отдельных событий. Кэш подписывается
+на изменения EventsLogic: изменение события сбрасывает только его строку
+и тело целиком, поэтому после записи тело собирается заново из уже
+отрисованных строк без повторной сериализации остальных событий.
+Сжатые варианты тела хранятся рядом с ним и сбрасываются вместе с ним.
+"""
+
+import threading
+from collections.abc import Callable
+from typing import Optional
+
+import app.compression as compression
+from app.model import Events as EventsModel
+
+# Максимальный размер кэшируемого тела списка по умолчанию
+MAX_BODY_BYTES = 64 * 1024 * 1024
+
+
+class ResponseCache:
+    """Кэш тела списка событий с инкрементальной инвалидацией.
+
+    Изменения, о которых кэш не был уведомлен (например, сделанные другим
+    процессом в общей базе), обнаруживаются по версии хранилища: если
+    версия выросла больше, чем на число полученных уведомлений, сбрасываются
+    все строки.
+    """
+
+    def __init__(
+        self, render: Callable[[EventsModel], str], max_bytes: int = MAX_BODY_BYTES
+    ) -> None:
+        """Инициализирует пустой кэш.
+
+        Args:
+            render: Функция сериализации события в строку ответа
+            max_bytes: Максимальный размер кэшируемого тела
+        """
+        self._render = render
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._lines: dict[str, str] = {}  # event_id -> строка с переводом строки
+        self._body: bytes = None
+        self._compressed: dict[str, bytes] = {}  # кодировка -> сжатое _body
+        self._version = None  # версия хранилища, по которой собрано тело
+        self._notified = 0  # число уведомлений об изменениях
+        self._built_notified = 0  # значение _notified на момент сборки тела
+        self.hits = 0
+        self.misses = 0
+        self.line_hits = 0
+        self.line_misses = 0
+        self.invalidations = 0
+        self.compressed_hits = 0
+        self.compressions = 0
+
+    def invalidate(self, event_id: str) -> None:
+        """Сбрасывает строку измененного события и тело списка.
+
+        Вызывается EventsLogic при каждом изменении события.
+
+        Args:
+            event_id: ID измененного события
+        """
+        with self._lock:
+            self._notified += 1
+            self.invalidations += 1
+            self._lines.pop(event_id, None)
+            self._body = None
+            self._compressed = {}
+
+    def list_body(self, logic) -> bytes:
+        """Возвращает тело полного списка событий.
+
+        Args:
+            logic: Хранилище событий (EventsLogic или SQLiteEventsLogic)
+
+        Returns:
+            bytes: Тело ответа в сыром формате
+        """
+        version = logic.version
+        with self._lock:
+            if self._body is not None and self._version == version:
+                self.hits += 1
+                return self._body
+            self.misses += 1
+            notified = self._notified
+            if self._version is None or (
+                version - self._version != notified - self._built_notified
+            ):
+                # Были изменения без уведомлений: строкам нельзя доверять
+                self._lines.clear()
+            lines = self._lines
+
+        # Строки читаются без блокировки: если какая-то из них устареет во
+        # время сборки, результат не попадет в кэш (см. проверку ниже)
+        parts, rendered = [], {}
+        line_hits = 0
+        for event in logic.iter_events():
+            line = lines.get(event.id)
+            if line is None:
+                line = self._render(event) + "\n"
+                rendered[event.id] = line
+            else:
+                line_hits += 1
+            parts.append(line)
+        body = "".join(parts).encode("utf-8")
+
+        with self._lock:
+            self.line_hits += line_hits
+            self.line_misses += len(rendered)
+            # Если во время сборки пришло уведомление, часть строк могла
+            # устареть: такой результат отдается, но не кэшируется
+            if self._notified == notified and logic.version == version:
+                self._lines.update(rendered)
+                self._version = version
+                self._built_notified = notified
+                if len(body) <= self._max_bytes:
+                    self._body = body
+                    self._compressed = {}
+        return body
+
+    def encoded_body(self, logic, encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+        """Возвращает тело полного списка, сжатое для клиента.
+
+        Сжатое тело кэшируется, пока не изменится несжатое, поэтому при
+        неизменном списке сжатие выполняется один раз на кодировку.
+
+        Args:
+            logic: Хранилище событий (EventsLogic или SQLiteEventsLogic)
+            encoding: Кодировка, выбранная compression.negotiate, или None
+
+        Returns:
+            tuple[bytes, Optional[str]]: Тело и примененная кодировка или
+                None, если тело отдается без сжатия
+        """
+        body = self.list_body(logic)
+        if encoding is None or len(body) < compression.MIN_SIZE:
+            return body, None
+        with self._lock:
+            compressed = self._compressed.get(encoding) if self._body is body else None
+            if compressed is not None:
+                self.compressed_hits += 1
+                return compressed, encoding
+        compressed = compression.compress(
+            body, encoding, compression.CACHED_LEVELS[encoding]
+        )
+        with self._lock:
+            self.compressions += 1
+            # Тело могло смениться во время сжатия
+            if self._body is body:
+                self._compressed[encoding] = compressed
+        return compressed, encoding
+
+    def stats(self) -> dict[str, int]:
+        """Возвращает счетчики кэша для мониторинга.
+
+        Returns:
+            dict: Попадания и промахи по телу и строкам, число
+                инвалидаций, число строк и размер тела в кэше, попадания
+                в сжатые тела и число сжатий
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "line_hits": self.line_hits,
+                "line_misses": self.line_misses,
+                "invalidations": self.invalidations,
+                "cached_lines": len(self._lines),
+                "body_bytes": len(self._body) if self._body is not None else 0,
+                "compressed_hits": self.compressed_hits,
+                "compressions": self.compressions,
+            }
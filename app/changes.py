@@ -0,0 +1,106 @@
+"""Журнал изменений событий для синхронизации клиентов.
+
+ChangeLog хранит последние изменения в кольцевом буфере ограниченного
+размера. Каждое изменение получает порядковый номер (seq); клиент
+запрашивает изменения после известного ему номера и получает только
+разницу, а не весь список событий. Ожидающие изменений клиенты спят на
+условной переменной и не расходуют ресурсы, пока данные не меняются.
+"""
+
+import threading
+import time
+from collections import deque
+from itertools import islice
+
+# Число изменений в буфере по умолчанию
+CHANGE_LOG_SIZE = 10_000
+
+# Виды изменений
+OP_PUT = "put"  # событие создано или изменено
+OP_DELETE = "delete"  # событие удалено
+
+
+class ChangesExpiredError(ValueError):
+    """Исключение для номера изменения, которого уже (или еще) нет в журнале."""
+
+
+class ChangeLog:
+    """Кольцевой буфер последних изменений с ожиданием новых."""
+
+    def __init__(self, capacity: int = CHANGE_LOG_SIZE, seq: int = 0) -> None:
+        """Инициализирует пустой журнал.
+
+        Args:
+            capacity: Максимальное число хранимых изменений
+            seq: Номер последнего изменения до создания журнала
+        """
+        self._entries: deque[tuple[int, str, str]] = deque(maxlen=capacity)
+        self._first = seq  # наименьший номер, после которого журнал полон
+        self._seq = seq
+        self._changed = threading.Condition()
+
+    @property
+    def seq(self) -> int:
+        """Номер последнего изменения."""
+        return self._seq
+
+    def append(self, seq: int, _id: str, op: str) -> None:
+        """Добавляет изменение и будит ожидающих клиентов.
+
+        Номера должны идти подряд по возрастанию.
+
+        Args:
+            seq: Номер изменения
+            _id: ID измененного события
+            op: Вид изменения (OP_PUT или OP_DELETE)
+        """
+        with self._changed:
+            if len(self._entries) == self._entries.maxlen:
+                self._first = self._entries[0][0]
+            self._entries.append((seq, _id, op))
+            self._seq = seq
+            self._changed.notify_all()
+
+    def since(self, seq: int, limit: int = None) -> list[tuple[int, str, str]]:
+        """Возвращает изменения с номерами больше seq.
+
+        Args:
+            seq: Номер последнего известного клиенту изменения
+            limit: Максимальное число изменений или None
+
+        Returns:
+            list[tuple[int, str, str]]: Кортежи (номер, ID события, вид)
+                по возрастанию номера
+
+        Raises:
+            ChangesExpiredError: Если изменения после seq вытеснены из
+                буфера или seq больше номера последнего изменения
+        """
+        with self._changed:
+            if not self._first <= seq <= self._seq:
+                raise ChangesExpiredError(
+                    f"Изменения после {seq} недоступны, доступны после "
+                    f"{self._first}-{self._seq}"
+                )
+            start = seq - self._first
+            stop = None if limit is None else start + limit
+            return list(islice(self._entries, start, stop))
+
+    def wait(self, seq: int, timeout: float) -> bool:
+        """Ждет изменения с номером больше seq.
+
+        Args:
+            seq: Номер последнего известного клиенту изменения
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            bool: True если такое изменение есть
+        """
+        deadline = time.monotonic() + timeout
+        with self._changed:
+            while self._seq <= seq:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._changed.wait(remaining)
+            return True
@@ -0,0 +1,165 @@
+"""Компактное колоночное хранилище событий.
+
+ColumnarStore заменяет словарь ID -> Events внутри EventsLogic, когда
+событий миллионы и накладные расходы на отдельный объект для каждого
+события становятся основной частью потребляемой памяти. ID событий
+выдаются монотонно, поэтому номер строки совпадает с числовым ID:
+
+* порядковые номера дат хранятся в array('l'), 0 означает пустую строку;
+* заголовок и текст события упакованы в один объект bytes в UTF-8,
+  длина заголовка в байтах хранится в array('I').
+
+Объекты Events создаются только при чтении.
+"""
+
+import threading
+from array import array
+from collections.abc import Iterator, MutableMapping
+from datetime import date
+
+from app.model import Events as EventsModel
+
+
+class ColumnarStore(MutableMapping):
+    """Словарь ID -> Events с колоночным хранением полей событий."""
+
+    def __init__(self, events: dict[str, EventsModel] = None) -> None:
+        """Инициализирует хранилище.
+
+        Args:
+            events: Начальные события; словарь можно освободить после вызова
+        """
+        self._ordinals = array("l", [0])
+        self._title_sizes = array("I", [0])
+        self._blobs: list[bytes] = [b""]
+        self._count = 0
+        self._lock = threading.Lock()
+        for event_id, event in (events or {}).items():
+            self[event_id] = event
+
+    def __getitem__(self, _id: str) -> EventsModel:
+        """Собирает объект события из колонок.
+
+        Args:
+            _id: ID события
+
+        Returns:
+            EventsModel: Новый объект события
+
+        Raises:
+            KeyError: Если события с таким ID нет
+        """
+        row = _row(_id)
+        with self._lock:
+            if row >= len(self._ordinals) or not self._ordinals[row]:
+                raise KeyError(_id)
+            ordinal = self._ordinals[row]
+            title_size = self._title_sizes[row]
+            blob = self._blobs[row]
+        event = EventsModel()
+        event.id = str(row)
+        event.dates = date.fromordinal(ordinal).isoformat()
+        # Порядковый номер уже известен, повторно разбирать дату не нужно
+        event._ordinal = ordinal  # pylint: disable=protected-access
+        event.title = blob[:title_size].decode("utf-8")
+        event.text = blob[title_size:].decode("utf-8")
+        return event
+
+    def __setitem__(self, _id: str, event: EventsModel) -> None:
+        """Записывает событие в строку с номером ID.
+
+        Args:
+            _id: ID события
+            event: Событие с корректной датой
+        """
+        row = _row(_id)
+        title = event.title.encode("utf-8")
+        blob = title + event.text.encode("utf-8")
+        with self._lock:
+            missing = row + 1 - len(self._ordinals)
+            if missing > 0:
+                self._ordinals.extend([0] * missing)
+                self._title_sizes.extend([0] * missing)
+                self._blobs.extend([b""] * missing)
+            if not self._ordinals[row]:
+                self._count += 1
+            self._ordinals[row] = event.ordinal
+            self._title_sizes[row] = len(title)
+            self._blobs[row] = blob
+
+    def __delitem__(self, _id: str) -> None:
+        """Освобождает строку события.
+
+        Args:
+            _id: ID события
+
+        Raises:
+            KeyError: Если события с таким ID нет
+        """
+        row = _row(_id)
+        with self._lock:
+            if row >= len(self._ordinals) or not self._ordinals[row]:
+                raise KeyError(_id)
+            self._ordinals[row] = 0
+            self._title_sizes[row] = 0
+            self._blobs[row] = b""
+            self._count -= 1
+
+    def __contains__(self, _id: object) -> bool:
+        """Проверяет наличие события без сборки объекта.
+
+        Args:
+            _id: ID события
+
+        Returns:
+            bool: True если событие есть
+        """
+        try:
+            row = _row(_id)
+        except KeyError:
+            return False
+        ordinals = self._ordinals
+        return row < len(ordinals) and bool(ordinals[row])
+
+    def __iter__(self) -> Iterator[str]:
+        """Перебирает ID событий по возрастанию.
+
+        Yields:
+            str: ID события
+        """
+        ordinals = self._ordinals
+        row = 1
+        while row < len(ordinals):
+            if ordinals[row]:
+                yield str(row)
+            row += 1
+
+    def __len__(self) -> int:
+        """Возвращает число событий.
+
+        Returns:
+            int: Число событий
+        """
+        return self._count
+
+
+def _row(_id: object) -> int:
+    """Преобразует ID события в номер строки.
+
+    Args:
+        _id: ID события
+
+    Returns:
+        int: Номер строки
+
+    Raises:
+        KeyError: Если ID не является каноническим положительным целым числом
+    """
+    try:
+        row = int(_id)
+    except (TypeError, ValueError):
+        raise KeyError(_id) from None
+    # Строки вида "01" или " 1" не являются ID, как и в обычном словаре
+    if row <= 0 or str(row) != _id:
+        raise KeyError(_id)
+    return row
@@ -0,0 +1,132 @@
+"""Сжатие ответов API по заголовку Accept-Encoding.
+
+Поддерживается gzip (модуль zlib) и brotli, если установлен пакет brotli.
+Тела меньше MIN_SIZE байт не сжимаются: заголовки сжатого потока и
+затраты процессора на них больше выигрыша. Потоковые ответы сжимаются
+инкрементально, по мере выдачи фрагментов.
+"""
+
+import zlib
+from collections.abc import Iterable, Iterator
+from typing import Optional
+
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+
+import app.formats as formats
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - зависит от окружения
+    brotli = None
+
+# Кодировки в порядке предпочтения при равном весе в Accept-Encoding
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# Минимальный размер тела, которое имеет смысл сжимать
+MIN_SIZE = 1024
+# Степень сжатия для ответов, собираемых на каждый запрос: быстрое сжатие
+# уже уменьшает сырой список примерно в 5 раз
+LEVELS = {"gzip": 1, "br": 1}
+# Степень сжатия для тел, которые сжимаются один раз и отдаются из кэша;
+# более высокие степени на больших списках работают секунды
+CACHED_LEVELS = {"gzip": 6, "br": 5}
+# Типы содержимого, которые сжимаются
+COMPRESSIBLE_TYPES = (
+    formats.TEXT,
+    formats.JSON,
+    formats.BINARY,
+    "text/html",
+    "text/css",
+    "text/javascript",
+    "application/javascript",
+)
+
+# Размер окна zlib с заголовком и контрольной суммой gzip
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+
+def negotiate(header: Optional[str]) -> Optional[str]:
+    """Выбирает кодировку сжатия по заголовку Accept-Encoding.
+
+    Args:
+        header: Значение заголовка или None
+
+    Returns:
+        Optional[str]: "br", "gzip" или None, если клиент не принимает
+            сжатые ответы
+    """
+    if not header:
+        return None
+    return parse_accept_header(header, Accept).best_match(ENCODINGS)
+
+
+def compressible(mimetype: str) -> bool:
+    """Проверяет, имеет ли смысл сжимать содержимое этого типа.
+
+    Args:
+        mimetype: Тип содержимого без параметров
+
+    Returns:
+        bool: True для текстовых форматов и форматов событий
+    """
+    return mimetype in COMPRESSIBLE_TYPES
+
+
+def compress(body: bytes, encoding: str, level: int = None) -> bytes:
+    """Сжимает тело ответа целиком.
+
+    Args:
+        body: Тело ответа
+        encoding: "gzip" или "br"
+        level: Степень сжатия; по умолчанию LEVELS[encoding]
+
+    Returns:
+        bytes: Сжатое тело
+    """
+    level = LEVELS[encoding] if level is None else level
+    if encoding == "br":
+        return brotli.compress(body, quality=level)
+    compressor = zlib.compressobj(level, zlib.DEFLATED, _GZIP_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def maybe_compress(body: bytes, encoding: Optional[str]) -> tuple[bytes, Optional[str]]:
+    """Сжимает тело, если клиент это принимает и тело достаточно велико.
+
+    Args:
+        body: Тело ответа
+        encoding: Кодировка, выбранная negotiate, или None
+
+    Returns:
+        tuple[bytes, Optional[str]]: Тело и примененная кодировка или None,
+            если тело отдается без сжатия
+    """
+    if encoding is None or len(body) < MIN_SIZE:
+        return body, None
+    return compress(body, encoding), encoding
+
+
+def compress_stream(chunks: Iterable[bytes], encoding: str) -> Iterator[bytes]:
+    """Сжимает потоковый ответ по мере выдачи фрагментов.
+
+    Фрагмент сжатого потока выдается, как только компрессор его
+    сформировал, поэтому в памяти не накапливается весь ответ.
+
+    Args:
+        chunks: Фрагменты несжатого ответа
+        encoding: "gzip" или "br"
+
+    Yields:
+        bytes: Очередной фрагмент сжатого ответа
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=LEVELS["br"])
+        process, finish = compressor.process, compressor.finish
+    else:
+        compressor = zlib.compressobj(LEVELS["gzip"], zlib.DEFLATED, _GZIP_WBITS)
+        process, finish = compressor.compress, compressor.flush
+    for chunk in chunks:
+        data = process(chunk)
+        if data:
+            yield data
+    yield finish()
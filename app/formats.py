@@ -0,0 +1,283 @@
+"""Форматы передачи событий: JSON и компактный двоичный.
+
+Помимо сырого формата 'id|date|title|text' API принимает и отдает события
+в JSON (application/json) и в двоичном формате с префиксами длины
+(application/x-calendar-events), формат выбирается по заголовкам Accept
+и Content-Type.
+
+Двоичная запись события - заголовок из четырех беззнаковых 32-битных
+чисел little-endian (ID или 0, порядковый номер дня даты, длина
+заголовка и длина текста в байтах) и следующие за ним заголовок и текст
+в UTF-8. Поток событий - это записи подряд, без разделителей. У
+повторений правил в поле ID установлен старший бит (RULE_ID_FLAG), а
+младшие биты - номер правила: запись с ID 0x80000001 - повторение
+правила "r1".
+
+Для JSON используется orjson, если он установлен, иначе стандартный json.
+"""
+
+import json
+import struct
+from collections.abc import Iterable, Iterator
+from datetime import date
+from itertools import islice
+
+import app.recurrence as recurrence
+from app.model import Events as EventsModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - зависит от окружения
+    orjson = None
+
+TEXT = "text/plain"
+JSON = "application/json"
+BINARY = "application/x-calendar-events"
+# Форматы в порядке предпочтения при равном весе в Accept
+MIMETYPES = (TEXT, JSON, BINARY)
+
+# Заголовок двоичной записи: ID, день, длина заголовка, длина текста
+RECORD_HEADER = struct.Struct("<IIII")
+# Признак повторения правила в поле ID двоичной записи
+RULE_ID_FLAG = 1 << 31
+
+
+class FormatError(ValueError):
+    """Исключение для тела запроса, не соответствующего формату."""
+
+
+def dumps_json(value) -> bytes:
+    """Сериализует значение в JSON.
+
+    Args:
+        value: Значение
+
+    Returns:
+        bytes: JSON в UTF-8
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads_json(data: bytes):
+    """Разбирает JSON.
+
+    Args:
+        data: JSON в UTF-8
+
+    Returns:
+        Разобранное значение
+
+    Raises:
+        FormatError: При неверном JSON
+    """
+    try:
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data)
+    except ValueError as ex:
+        raise FormatError(f"Неверный JSON: {ex}") from None
+
+
+def to_dict(event: EventsModel) -> dict:
+    """Преобразует событие в словарь для JSON.
+
+    Args:
+        event: Событие
+
+    Returns:
+        dict: Поля id, date, title и text
+    """
+    return {"id": event.id, "date": event.dates, "title": event.title, "text": event.text}
+
+
+def from_dict(item) -> EventsModel:
+    """Создает событие из JSON объекта.
+
+    Args:
+        item: Разобранный JSON объект с полями date, title, text и
+            необязательным id
+
+    Returns:
+        EventsModel: Событие
+
+    Raises:
+        FormatError: Если значение не объект или нет обязательных полей
+    """
+    if not isinstance(item, dict):
+        raise FormatError("Ожидается JSON объект события")
+    missing = [field for field in ("date", "title", "text") if field not in item]
+    if missing:
+        raise FormatError(f"Нет полей: {', '.join(missing)}")
+    event = EventsModel()
+    _id = item.get("id")
+    event.id = None if _id is None else str(_id)
+    event.dates = str(item["date"])
+    event.title = str(item["title"])
+    event.text = str(item["text"])
+    return event
+
+
+def encode_event(event: EventsModel, mimetype: str) -> bytes:
+    """Сериализует одно событие.
+
+    Args:
+        event: Событие
+        mimetype: JSON или BINARY
+
+    Returns:
+        bytes: Тело ответа
+    """
+    if mimetype == JSON:
+        return dumps_json(to_dict(event))
+    buffer = bytearray()
+    _pack_into(buffer, event)
+    return bytes(buffer)
+
+
+def encode_stream(
+    events: Iterable[EventsModel], mimetype: str, chunk_size: int = 512
+) -> Iterator[bytes]:
+    """Сериализует события фрагментами для потокового ответа.
+
+    Фрагмент собирается сразу в байтах: для JSON - один вызов
+    сериализатора на фрагмент, для двоичного формата - запись в общий
+    буфер без промежуточных строк.
+
+    Args:
+        events: События
+        mimetype: JSON (массив объектов) или BINARY (записи подряд)
+        chunk_size: Число событий во фрагменте
+
+    Yields:
+        bytes: Очередной фрагмент
+    """
+    events = iter(events)
+    if mimetype == JSON:
+        separator = b"["
+        while True:
+            chunk = [to_dict(event) for event in islice(events, chunk_size)]
+            if not chunk:
+                break
+            # Массив фрагмента без скобок продолжает общий массив
+            yield separator + dumps_json(chunk)[1:-1]
+            separator = b","
+        yield b"[]" if separator == b"[" else b"]"
+        return
+    while True:
+        buffer = bytearray()
+        for event in islice(events, chunk_size):
+            _pack_into(buffer, event)
+        if not buffer:
+            return
+        yield bytes(buffer)
+
+
+def decode_event(body: bytes, mimetype: str) -> EventsModel:
+    """Разбирает одно событие из тела запроса.
+
+    Args:
+        body: Тело запроса
+        mimetype: JSON или BINARY
+
+    Returns:
+        EventsModel: Событие
+
+    Raises:
+        FormatError: При неверном теле запроса
+    """
+    if mimetype == JSON:
+        return from_dict(loads_json(body))
+    events = list(decode_stream(body))
+    if len(events) != 1:
+        raise FormatError(f"Ожидается одна запись, получено {len(events)}")
+    return events[0]
+
+
+def decode_stream(body: bytes, offset: int = 0) -> Iterator[EventsModel]:
+    """Разбирает поток двоичных записей.
+
+    Args:
+        body: Записи подряд (bytes или mmap)
+        offset: Смещение первой записи
+
+    Yields:
+        EventsModel: Очередное событие
+
+    Raises:
+        FormatError: При обрезанной записи или неверном дне
+    """
+    size = len(body)
+    header_size = RECORD_HEADER.size
+    while offset < size:
+        if offset + header_size > size:
+            raise FormatError("Обрезанный заголовок записи")
+        _id, day, title_size, text_size = RECORD_HEADER.unpack_from(body, offset)
+        offset += header_size
+        end = offset + title_size + text_size
+        if end > size:
+            raise FormatError("Обрезанная запись")
+        try:
+            dates = date.fromordinal(day).isoformat()
+            title = body[offset:offset + title_size].decode("utf-8")
+            text = body[offset + title_size:end].decode("utf-8")
+        except ValueError as ex:
+            raise FormatError(f"Неверная запись: {ex}") from None
+        offset = end
+        event = EventsModel()
+        event.id = _decode_id(_id)
+        event.dates = dates
+        # День уже известен, повторно разбирать дату не нужно
+        event._ordinal = day  # pylint: disable=protected-access
+        event.title = title
+        event.text = text
+        yield event
+
+
+def _encode_id(_id: str) -> int:
+    """Кодирует ID события или правила для поля ID двоичной записи.
+
+    Args:
+        _id: Числовой ID события, ID правила ("r1") или None
+
+    Returns:
+        int: Значение поля ID
+    """
+    if not _id:
+        return 0
+    if recurrence.is_rule_id(_id):
+        return int(_id[len(recurrence.RULE_ID_PREFIX):]) | RULE_ID_FLAG
+    return int(_id)
+
+
+def _decode_id(value: int) -> str:
+    """Восстанавливает ID по полю ID двоичной записи.
+
+    Args:
+        value: Значение поля ID
+
+    Returns:
+        str: ID события, ID правила или None для 0
+    """
+    if not value:
+        return None
+    if value & RULE_ID_FLAG:
+        return f"{recurrence.RULE_ID_PREFIX}{value & ~RULE_ID_FLAG}"
+    return str(value)
+
+
+def _pack_into(buffer: bytearray, event: EventsModel) -> None:
+    """Дописывает двоичную запись события в буфер.
+
+    Args:
+        buffer: Буфер
+        event: Событие с корректной датой и числовым ID или без ID
+    """
+    title = event.title.encode("utf-8")
+    text = event.text.encode("utf-8")
+    buffer += RECORD_HEADER.pack(
+        _encode_id(event.id), event.ordinal, len(title), len(text)
+    )
+    buffer += title
+    buffer += text
@@ -1,7 +1,51 @@
 """Модуль бизнес-логики для работы с событиями."""
 
 
+import heapq
+import threading
+import time
+from bisect import bisect_left, bisect_right, insort
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import ExitStack, contextmanager
+from datetime import date
+from itertools import islice
+from operator import attrgetter
+from typing import BinaryIO
+
+import app.changes as changes
+import app.columnar as columnar
+import app.occupancy as occupancy
+import app.persistence as persistence
+import app.recurrence as recurrence
+import app.search as search
+import app.snapshot as snapshot
 from app.model import Events as EventsModel
+from app.model import parse_date
+
+# Число полос блокировок для дат и ID событий
+LOCK_STRIPES = 64
+
+
+class DateConflictError(ValueError):
+    """Исключение для занятой даты (правило «одно событие в день»)."""
+
+
+class BatchError(ValueError):
+    """Исключение для отклоненного пакета операций.
+
+    Attributes:
+        errors: Сообщение об ошибке для каждой операции пакета или None,
+            если операция сама по себе корректна
+    """
+
+    def __init__(self, errors: list[str]) -> None:
+        """Сохраняет ошибки по операциям пакета.
+
+        Args:
+            errors: Сообщения об ошибках по операциям пакета
+        """
+        super().__init__(f"Пакет отклонен: ошибок {sum(1 for e in errors if e)}")
+        self.errors = errors
 
 
 class EventsLogic:
@@ -9,11 +53,58 @@ class EventsLogic:
 
     Обеспечивает CRUD операции, валидацию данных и управление
     индексами для быстрого поиска событий по датам.
+
+    Безопасен для использования из нескольких потоков: изменения
+    блокируют только полосы (stripes) затронутых дат и ID, а чтение
+    выполняется без блокировок.
     """
-    def __init__(self) -> None:
-        """Инициализирует хранилище событий и индекс по датам."""
-        self._storage: dict[str, EventsModel] = {}
-        self._date_index: dict[str, str] = {}  # date -> event_id
+    def __init__(
+        self, backend: persistence.Persistence = None, compact: bool = False
+    ) -> None:
+        """Инициализирует хранилище событий и индексы по датам.
+
+        Args:
+            backend: Механизм постоянного хранения; по умолчанию данные
+                хранятся только в памяти процесса
+            compact: Хранить события в колоночном ColumnarStore вместо
+                словаря объектов (меньше памяти, но объект события
+                собирается при каждом чтении)
+        """
+        self._persistence = backend or persistence.Persistence()
+        self._storage, self._last_id = self._persistence.load()
+        if compact:
+            self._storage = columnar.ColumnarStore(self._storage)
+        # Индексы построены по порядковым номерам дней (Events.ordinal),
+        # поэтому поиск и сравнения не разбирают строки дат повторно
+        self._date_index: dict[int, str] = {  # ordinal -> event_id
+            event.ordinal: event_id for event_id, event in self._storage.items()
+        }
+        # Отсортированные порядковые номера дат для запросов по диапазону
+        self._sorted_dates: list[int] = sorted(self._date_index)
+        # Инвертированный индекс слов заголовков и текстов
+        self._search = search.SearchIndex(self._storage.values())
+        # Маски занятых дней по месяцам и счетчики по годам
+        self._occupancy = occupancy.OccupancyIndex(self._date_index)
+        # Правила повторения; их повторения не попадают в индексы дат и
+        # вычисляются по запросу
+        self._rules = recurrence.RuleSet(
+            recurrence.Rule.from_dict(item) for item in self._persistence.load_rules()
+        )
+        # Порядок захвата: полоса ID, затем полосы дат по возрастанию номера,
+        # затем _index_lock; это исключает взаимоблокировки
+        self._id_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._date_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self._index_lock = threading.Lock()  # защищает _sorted_dates
+        self._counter_lock = threading.Lock()  # защищает _last_id и версии
+        # Версия хранилища растет при каждом изменении; вместе с эпохой
+        # (временем запуска) она однозначно определяет состояние данных
+        self._epoch = f"{time.time_ns():x}"
+        self._version = 0
+        self._modified_at = time.time()
+        self._event_versions: dict[str, int] = {}  # event_id -> версия
+        self._listeners: list[Callable[[str], None]] = []
+        # Журнал последних изменений; номер изменения равен версии
+        self._changes = changes.ChangeLog(changes.CHANGE_LOG_SIZE, self._version)
 
 
     def create(self, event: EventsModel) -> str:
@@ -29,21 +120,18 @@ class EventsLogic:
             ValueError: При неверном формате даты или конфликте дат
         """
         # Проверяем формат даты
-        if not EventsModel.validate_date(event.dates):
-            raise ValueError(
-                f"Неверный формат даты: {event.dates}. Ожидается YYYY-MM-DD"
-            )
-        # Проверяем, нет ли уже события на эту дату
-        if event.dates in self._date_index:
-            existing_event_id = self._date_index[event.dates]
-            raise ValueError(
-                f"На дату {event.dates} уже существует событие с ID {existing_event_id}"
-            )
-        event_id = str(len(self._storage) + 1)
-        event.id = event_id
-        # Сохраняем в основное хранилище и в индекс по датам
-        self._storage[event_id] = event
-        self._date_index[event.dates] = event_id
+        day = _check_date(event)
+        with self._locked_dates(day):
+            # Проверяем, нет ли уже события или повторения на эту дату
+            existing_event_id = self._owner_of(day)
+            if existing_event_id is not None:
+                raise _conflict_error(event.dates, existing_event_id)
+            event_id = self._next_id()
+            event.id = event_id
+            snapshot_due = self._log(persistence.OP_CREATE, event_id, event)
+            self._apply_insert(event_id, event)
+        if snapshot_due:
+            self._snapshot()
         return event_id
 
 
@@ -53,7 +141,56 @@ class EventsLogic:
         Returns:
             List[EventsModel]: Список всех объектов событий
         """
-        return list(self._storage.values())
+        return list(self.iter_events())
+
+
+    def count(self) -> int:
+        """Возвращает число событий в хранилище.
+
+        Returns:
+            int: Число событий
+        """
+        return len(self._storage)
+
+
+    def iter_events(self, cursor: str = None) -> Iterator[EventsModel]:
+        """Лениво перебирает события без копирования хранилища.
+
+        Args:
+            cursor: ID последнего полученного события; перебор продолжается
+                со следующего за ним события
+
+        Returns:
+            Iterator[EventsModel]: Итератор по событиям в порядке создания
+
+        Raises:
+            ValueError: При неверном значении курсора
+        """
+        after = 0 if cursor is None else int(cursor)
+        return self._iter_ids_from(after + 1)
+
+
+    def _iter_ids_from(self, first_id: int) -> Iterator[EventsModel]:
+        """Перебирает события по возрастанию ID.
+
+        ID выдаются монотонно, поэтому перебор идет по числовому диапазону
+        и не ломается при одновременном изменении хранилища другими
+        потоками; события, созданные во время перебора, тоже попадают
+        в выдачу.
+
+        Args:
+            first_id: Первый ID для перебора
+
+        Yields:
+            EventsModel: Очередное событие
+        """
+        storage = self._storage
+        event_id = first_id
+        while event_id <= self._last_id:
+            event = storage.get(str(event_id))
+            if event is not None:
+                yield event
+            event_id += 1
 
 
     def read(self, _id: str) -> EventsModel:
@@ -68,6 +205,91 @@ class EventsLogic:
         return self._storage.get(_id)
 
 
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """Подписывает обработчик на изменения событий.
+
+        Обработчик вызывается с ID события после каждого создания,
+        изменения или удаления, под внутренней блокировкой хранилища, в
+        порядке роста версии; он должен быть быстрым и не обращаться к
+        хранилищу на запись.
+
+        Args:
+            listener: Функция, принимающая ID измененного события
+        """
+        self._listeners.append(listener)
+
+
+    @property
+    def version(self) -> int:
+        """Текущая версия хранилища; растет при каждом изменении."""
+        return self._version
+
+
+    @property
+    def epoch(self) -> str:
+        """Идентификатор запуска, отличающий версии разных запусков."""
+        return self._epoch
+
+
+    @property
+    def last_modified(self) -> float:
+        """Время последнего изменения хранилища (Unix time)."""
+        return self._modified_at
+
+
+    @property
+    def change_seq(self) -> int:
+        """Номер последнего изменения в журнале изменений."""
+        return self._changes.seq
+
+
+    def changes_since(self, seq: int, limit: int = None) -> list[tuple[int, str, str]]:
+        """Возвращает изменения событий после заданного номера.
+
+        Args:
+            seq: Номер последнего известного клиенту изменения
+            limit: Максимальное число изменений или None
+
+        Returns:
+            list[tuple[int, str, str]]: Кортежи (номер, ID события, вид
+                изменения) по возрастанию номера
+
+        Raises:
+            ChangesExpiredError: Если изменения после seq уже вытеснены
+                из журнала
+        """
+        return self._changes.since(seq, limit)
+
+
+    def wait_for_changes(self, seq: int, timeout: float) -> bool:
+        """Ждет изменения с номером больше seq.
+
+        Args:
+            seq: Номер последнего известного клиенту изменения
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            bool: True если такое изменение есть
+        """
+        return self._changes.wait(seq, timeout)
+
+
+    def event_version(self, _id: str) -> int:
+        """Возвращает версию события.
+
+        Args:
+            _id: ID события
+
+        Returns:
+            int: Версия хранилища при последнем изменении события (0 для
+                событий, не менявшихся с момента запуска) или None, если
+                события нет
+        """
+        if _id not in self._storage:
+            return None
+        return self._event_versions.get(_id, 0)
+
+
     def read_by_date(self, date_str: str) -> EventsModel:
         """Получить событие по дате.
 
@@ -80,12 +302,319 @@ class EventsLogic:
         Raises:
             ValueError: При неверном формате даты
         """
-        if not EventsModel.validate_date(date_str):
+        day = parse_date(date_str)
+        if day is None:
             raise ValueError(f"Неверный формат даты: {date_str}")
-        event_id = self._date_index.get(date_str)
+        event_id = self._date_index.get(day)
         if event_id:
-            return self._storage[event_id]
-        return None
+            return self._storage.get(event_id)
+        rule_id = self._rules.owner_of(day)
+        return None if rule_id is None else self._rules.get(rule_id).make_event(day)
+
+
+    def read_range(self, start: str = None, end: str = None) -> list[EventsModel]:
+        """Возвращает события в диапазоне дат включительно.
+
+        Args:
+            start: Начальная дата в формате YYYY-MM-DD или None
+            end: Конечная дата в формате YYYY-MM-DD или None
+
+        Returns:
+            List[EventsModel]: События, упорядоченные по дате
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        return list(self.iter_range(start, end))
+
+
+    def iter_range(
+        self, start: str = None, end: str = None, cursor: str = None
+    ) -> Iterator[EventsModel]:
+        """Лениво перебирает события в диапазоне дат за O(log n + k).
+
+        Повторения правил вычисляются только внутри диапазона и
+        сливаются с событиями по дате.
+
+        Args:
+            start: Начальная дата в формате YYYY-MM-DD или None
+            end: Конечная дата в формате YYYY-MM-DD или None
+            cursor: Дата последнего полученного события; перебор
+                продолжается со следующей за ней даты
+
+        Returns:
+            Iterator[EventsModel]: Итератор по событиям, упорядоченным по дате
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        start, end, cursor = (
+            None if date_str is None else _parse_bound(date_str)
+            for date_str in (start, end, cursor)
+        )
+        if cursor is not None and (start is None or cursor >= start):
+            pos = bisect_right(self._sorted_dates, cursor)
+        elif start is not None:
+            pos = bisect_left(self._sorted_dates, start)
+        else:
+            pos = 0
+        events = self._iter_sorted_from(pos, end)
+        if not len(self._rules):
+            return events
+        low = start
+        if cursor is not None and (start is None or cursor >= start):
+            low = cursor + 1
+        return heapq.merge(
+            events, self._rules.occurrences(low, end), key=attrgetter("ordinal")
+        )
+
+
+    def _iter_sorted_from(self, pos: int, end: int = None) -> Iterator[EventsModel]:
+        """Перебирает события по отсортированному индексу начиная с позиции.
+
+        Читает индекс без блокировки: если другой поток сдвинул элементы,
+        позиция находится заново бинарным поиском после последней выданной
+        даты.
+
+        Args:
+            pos: Позиция в отсортированном списке дат
+            end: Порядковый номер конечной даты включительно или None
+
+        Yields:
+            EventsModel: Очередное событие
+        """
+        days = self._sorted_dates
+        while True:
+            try:
+                day = days[pos]
+            except IndexError:
+                return
+            if end is not None and day > end:
+                return
+            event = self._storage.get(self._date_index.get(day))
+            if event is not None and event.ordinal == day:
+                yield event
+            try:
+                shifted = days[pos] != day
+            except IndexError:
+                shifted = True
+            pos = bisect_right(days, day) if shifted else pos + 1
+
+
+    def _remove_sorted_date(self, day: int) -> None:
+        """Удаляет дату из отсортированного индекса.
+
+        Args:
+            day: Порядковый номер даты для удаления
+        """
+        with self._index_lock:
+            pos = bisect_left(self._sorted_dates, day)
+            if pos < len(self._sorted_dates) and self._sorted_dates[pos] == day:
+                del self._sorted_dates[pos]
+
+
+    def search(
+        self, query: str, start: str = None, end: str = None, limit: int = None
+    ) -> list[EventsModel]:
+        """Ищет события по словам заголовка и текста.
+
+        Последнее слово запроса ищется как префикс. Если диапазон дат
+        содержит меньше событий, чем найдено по словам, перебирается
+        диапазон, иначе - найденные события.
+
+        Args:
+            query: Поисковый запрос
+            start: Начальная дата в формате YYYY-MM-DD или None
+            end: Конечная дата в формате YYYY-MM-DD или None
+            limit: Максимальное число событий или None
+
+        Returns:
+            List[EventsModel]: Найденные события, упорядоченные по дате
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        start, end = (
+            None if date_str is None else _parse_bound(date_str)
+            for date_str in (start, end)
+        )
+        ids = self._search.find(query)
+        if not ids:
+            return []
+        if start is not None or end is not None:
+            days = self._sorted_dates
+            low = 0 if start is None else bisect_left(days, start)
+            high = len(days) if end is None else bisect_right(days, end)
+            if high - low < len(ids):
+                found = (
+                    event for event in self._iter_sorted_from(low, end)
+                    if event.id in ids
+                )
+                return list(islice(found, limit))
+        events = []
+        for event_id in ids:
+            event = self._storage.get(event_id)
+            if event is None:
+                continue
+            day = event.ordinal
+            if (start is None or day >= start) and (end is None or day <= end):
+                events.append(event)
+        key = attrgetter("ordinal")
+        if limit is not None and limit < len(events):
+            return heapq.nsmallest(limit, events, key=key)
+        return sorted(events, key=key)
+
+
+    def month_bitmap(self, year: int, month: int) -> int:
+        """Возвращает маску занятых дней месяца за O(1).
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 установлен, если день d занят
+
+        Raises:
+            ValueError: При неверном годе или месяце
+        """
+        occupancy.check_month(year, month)
+        return self._month_mask(year, month)
+
+
+    def occupancy_counts(self) -> tuple[dict[int, int], dict[tuple[int, int], int]]:
+        """Возвращает число занятых дней по годам и по месяцам.
+
+        Повторения правил считаются перебором, поэтому время зависит от их
+        числа.
+
+        Returns:
+            tuple: Словари год -> число дней и (год, месяц) -> число дней
+        """
+        years, months = self._occupancy.years(), self._occupancy.months()
+        if len(self._rules):
+            rule_years, rule_months = self._rules.counts()
+            for year, count in rule_years.items():
+                years[year] = years.get(year, 0) + count
+            for key, count in rule_months.items():
+                months[key] = months.get(key, 0) + count
+        return years, months
+
+
+    def free_days(self, start: str, count: int, end: str = None) -> list[str]:
+        """Находит первые свободные дни начиная с заданной даты.
+
+        Поиск идет по маскам занятых дней месяцев: занятые месяцы
+        пропускаются целиком, поэтому время пропорционально числу
+        найденных дней, а не длине диапазона.
+
+        Args:
+            start: Первая проверяемая дата в формате YYYY-MM-DD
+            count: Максимальное число дат в ответе
+            end: Последняя проверяемая дата в формате YYYY-MM-DD или None
+
+        Returns:
+            list[str]: Свободные даты в формате YYYY-MM-DD по возрастанию
+
+        Raises:
+            ValueError: При неверном формате даты или count
+        """
+        if count <= 0:
+            raise ValueError(f"Неверное число дней: {count}")
+        start, end = (
+            None if date_str is None else _parse_bound(date_str)
+            for date_str in (start, end)
+        )
+        days = occupancy.free_days(self._month_mask, start, count, end)
+        return [date.fromordinal(day).isoformat() for day in days]
+
+
+    def _month_mask(self, year: int, month: int) -> int:
+        """Возвращает маску дней месяца, занятых событиями и повторениями.
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 соответствует дню d
+        """
+        mask = self._occupancy.month(year, month)
+        if len(self._rules):
+            mask |= self._rules.month_mask(year, month)
+        return mask
+
+
+    def create_rule(self, rule: recurrence.Rule) -> str:
+        """Создает правило повторения.
+
+        Повторения не материализуются: пересечение с событиями проверяется
+        по тому из двух множеств, что меньше (события в диапазоне серии
+        или ее повторения), а с другими правилами - арифметически.
+
+        Args:
+            rule: Новое правило
+
+        Returns:
+            str: ID созданного правила
+
+        Raises:
+            DateConflictError: Если повторение приходится на занятую дату
+        """
+        with self._locked_all():
+            day = _first_taken_day(rule, self._sorted_dates, self._date_index)
+            if day is not None:
+                raise _conflict_error(
+                    date.fromordinal(day).isoformat(), self._date_index[day]
+                )
+            conflict = self._rules.conflict(rule)
+            if conflict is not None:
+                day, rule_id = conflict
+                raise _conflict_error(date.fromordinal(day).isoformat(), rule_id)
+            rule.id = self._rules.next_id()
+            self._persistence.save_rules(
+                [item.to_dict() for item in self._rules.values()] + [rule.to_dict()]
+            )
+            self._rules.add(rule)
+            self._touch(rule.id)
+        return rule.id
+
+
+    def read_rule(self, _id: str) -> recurrence.Rule:
+        """Возвращает правило повторения по ID.
+
+        Args:
+            _id: ID правила
+
+        Returns:
+            recurrence.Rule: Правило или None
+        """
+        return self._rules.get(_id)
+
+
+    def list_rules(self) -> list[recurrence.Rule]:
+        """Возвращает все правила повторения в порядке создания.
+
+        Returns:
+            list[recurrence.Rule]: Правила
+        """
+        return self._rules.values()
+
+
+    def delete_rule(self, _id: str) -> None:
+        """Удаляет правило повторения вместе со всеми повторениями.
+
+        Args:
+            _id: ID правила
+        """
+        with self._locked_all():
+            if self._rules.get(_id) is None:
+                return
+            self._persistence.save_rules(
+                [rule.to_dict() for rule in self._rules.values() if rule.id != _id]
+            )
+            self._rules.remove(_id)
+            self._touch(_id, removed=True)
 
 
     def update(self, _id: str, event: EventsModel) -> None:
@@ -98,31 +627,26 @@ class EventsLogic:
         Raises:
             ValueError: Если событие не найдено или неверный формат даты
         """
-        if _id not in self._storage:
-            raise ValueError("Событие не найдено")
         # Проверяем формат даты
-        if not EventsModel.validate_date(event.dates):
-            raise ValueError(
-                f"Неверный формат даты: {event.dates}. Ожидается YYYY-MM-DD"
-            )
-        # Получаем старое событие для проверки изменения даты
-        old_event = self._storage[_id]
-        # Если дата изменилась, проверяем новую дату на уникальность
-        if old_event.dates != event.dates:
-            if event.dates in self._date_index:
-                existing_event_id = self._date_index[event.dates]
-                # Если это не текущее событие (которое мы обновляем)
-                if existing_event_id != _id:
-                    raise ValueError(
-                        f"На дату {event.dates} уже существует событие с ID {existing_event_id}"
-                    )
-        # Обновляем данные
-        event.id = _id
-        self._storage[_id] = event
-        # Обновляем индекс дат
-        if old_event.dates in self._date_index:
-            del self._date_index[old_event.dates]
-        self._date_index[event.dates] = _id
+        day = _check_date(event)
+        with self._id_lock(_id):
+            # Получаем старое событие для проверки изменения даты
+            old_event = self._storage.get(_id)
+            if old_event is None:
+                raise ValueError("Событие не найдено")
+            with self._locked_dates(old_event.ordinal, day):
+                # Если дата изменилась, проверяем новую дату на уникальность
+                if old_event.ordinal != day:
+                    existing_event_id = self._owner_of(day)
+                    # Если это не текущее событие (которое мы обновляем)
+                    if existing_event_id is not None and existing_event_id != _id:
+                        raise _conflict_error(event.dates, existing_event_id)
+                # Обновляем данные
+                event.id = _id
+                snapshot_due = self._log(persistence.OP_UPDATE, _id, event)
+                self._apply_replace(_id, old_event, event)
+        if snapshot_due:
+            self._snapshot()
 
 
     def delete(self, _id: str) -> None:
@@ -131,13 +655,425 @@ class EventsLogic:
         Args:
             _id: ID события для удаления
         """
-        if _id in self._storage:
-            event = self._storage[_id]
-            # Удаляем из индекса дат
-            if event.dates in self._date_index:
-                del self._date_index[event.dates]
-            # Удаляем из основного хранилища
-            del self._storage[_id]
+        with self._id_lock(_id):
+            event = self._storage.get(_id)
+            if event is None:
+                return
+            with self._locked_dates(event.ordinal):
+                snapshot_due = self._log(persistence.OP_DELETE, _id)
+                self._apply_remove(_id, event)
+        if snapshot_due:
+            self._snapshot()
+
+
+    def apply_batch(
+        self, operations: list[tuple[str, str, EventsModel]]
+    ) -> list[str]:
+        """Атомарно применяет пакет операций создания, изменения и удаления.
+
+        Весь пакет проверяется за один проход с учетом конфликтов дат
+        внутри самого пакета; если хотя бы одна операция некорректна,
+        не применяется ни одна. Пакет пишется в журнал одной записью.
+
+        Args:
+            operations: Список кортежей (код операции, ID, событие); для
+                создания ID равен None, для удаления событие равно None
+
+        Returns:
+            list[str]: ID затронутого события для каждой операции
+
+        Raises:
+            BatchError: Если хотя бы одна операция пакета некорректна
+        """
+        with self._locked_all():
+            errors = self._validate_batch(operations)
+            if any(errors):
+                raise BatchError(errors)
+            ids, records, removed = [], [], set()
+            for op, _id, event in operations:
+                if op == persistence.OP_CREATE:
+                    _id = self._next_id()
+                if event is not None:
+                    event.id = _id
+                ids.append(_id)
+                if op == persistence.OP_DELETE:
+                    if _id not in self._storage or _id in removed:
+                        # Удаление отсутствующего события ничего не меняет
+                        # и не попадает в журнал
+                        continue
+                    removed.add(_id)
+                records.append((op, _id, event))
+            snapshot_due = self._persistence.append_batch(records) if records else False
+            for op, _id, event in records:
+                if op == persistence.OP_CREATE:
+                    self._apply_insert(_id, event)
+                elif op == persistence.OP_UPDATE:
+                    self._apply_replace(_id, self._storage[_id], event)
+                else:
+                    self._apply_remove(_id, self._storage[_id])
+        if snapshot_due:
+            self._snapshot()
+        return ids
+
+
+    def _validate_batch(
+        self, operations: list[tuple[str, str, EventsModel]]
+    ) -> list[str]:
+        """Проверяет пакет операций поверх текущего состояния.
+
+        Изменения, вносимые предыдущими операциями пакета, учитываются
+        через наложение (overlay) на индексы без их изменения.
+
+        Args:
+            operations: Список кортежей (код операции, ID, событие)
+
+        Returns:
+            list[str]: Сообщение об ошибке или None для каждой операции
+        """
+        # ordinal -> event_id, номер создающей записи пакета или None
+        owners: dict[int, str | int] = {}
+        days: dict[str, int] = {}  # event_id -> ordinal или None поверх _storage
+
+        def owner_of(day: int) -> str | int:
+            if day in owners:
+                return owners[day]
+            return self._owner_of(day)
+
+        def day_of(_id: str) -> int:
+            if _id in days:
+                return days[_id]
+            event = self._storage.get(_id)
+            return event.ordinal if event is not None else None
+
+        errors = []
+        for number, (op, _id, event) in enumerate(operations, 1):
+            error = None
+            if op not in (persistence.OP_CREATE, persistence.OP_UPDATE,
+                          persistence.OP_DELETE):
+                error = f"Неизвестная операция: {op}"
+            elif op != persistence.OP_DELETE and event.ordinal is None:
+                error = f"Неверный формат даты: {event.dates}. Ожидается YYYY-MM-DD"
+            elif op == persistence.OP_CREATE:
+                existing = owner_of(event.ordinal)
+                if existing is not None:
+                    error = _batch_conflict_message(event.dates, existing)
+                else:
+                    owners[event.ordinal] = number
+            elif op == persistence.OP_UPDATE:
+                old_day = day_of(_id)
+                existing = owner_of(event.ordinal)
+                if old_day is None:
+                    error = "Событие не найдено"
+                elif existing is not None and existing != _id:
+                    error = _batch_conflict_message(event.dates, existing)
+                else:
+                    owners[old_day] = None
+                    owners[event.ordinal] = _id
+                    days[_id] = event.ordinal
+            else:
+                old_day = day_of(_id)
+                if old_day is not None:
+                    owners[old_day] = None
+                    days[_id] = None
+            errors.append(error)
+        return errors
+
+
+    def export_snapshot(self, file: BinaryIO) -> int:
+        """Записывает все события и правила в двоичный снимок.
+
+        На время записи захватываются все полосы дат (как при сжатии
+        журнала), поэтому снимок согласован; чтения не блокируются.
+
+        Args:
+            file: Файл, открытый на запись в двоичном режиме
+
+        Returns:
+            int: Число записанных событий
+        """
+        with ExitStack() as stack:
+            for lock in self._date_locks:
+                stack.enter_context(lock)
+            storage, date_index = self._storage, self._date_index
+            snapshot.write(
+                file,
+                (storage[date_index[day]] for day in self._sorted_dates),
+                len(self._sorted_dates),
+                self._last_id,
+                [rule.to_dict() for rule in self._rules.values()],
+            )
+            return len(self._sorted_dates)
+
+
+    def import_snapshot(self, path: str) -> int:
+        """Заменяет все события и правила содержимым двоичного снимка.
+
+        Снимок читается через mmap, а хранилище и все индексы строятся за
+        один проход по записям вне блокировок; затем состояние сохраняется
+        в постоянное хранилище и подменяется целиком. Эпоха меняется,
+        поэтому ETag и номера изменений клиентов становятся
+        недействительными.
+
+        Args:
+            path: Путь к файлу снимка
+
+        Returns:
+            int: Число загруженных событий
+
+        Raises:
+            snapshot.SnapshotError: Если снимок поврежден, содержит
+                повторяющиеся даты или ID, неверные правила или повторения
+                правил, приходящиеся на занятые даты
+        """
+        storage: dict[str, EventsModel] = {}
+        date_index: dict[int, str] = {}
+        sorted_dates: list[int] = []
+        occupancy_index = occupancy.OccupancyIndex()
+        with snapshot.Snapshot(path) as snap:
+            last_id = snap.last_id
+            rules = _snapshot_rules(snap.rules)
+
+            def indexed(events: Iterable[EventsModel]) -> Iterator[EventsModel]:
+                """Заполняет хранилище и индексы дат по мере чтения событий.
+
+                Индекс поиска строится из того же потока, поэтому записи
+                снимка перебираются один раз; события идут по возрастанию
+                даты, и список дат не нужно сортировать.
+
+                Args:
+                    events: События снимка
+
+                Yields:
+                    EventsModel: То же событие
+                """
+                previous = 0
+                for event in events:
+                    day = event.ordinal
+                    if day <= previous:
+                        raise snapshot.SnapshotError(
+                            f"События не упорядочены по дате или дата "
+                            f"{event.dates} повторяется"
+                        )
+                    if (
+                        event.id is None or recurrence.is_rule_id(event.id)
+                        or event.id in storage or int(event.id) > last_id
+                    ):
+                        raise snapshot.SnapshotError(f"Неверный ID события: {event.id}")
+                    storage[event.id] = event
+                    date_index[day] = event.id
+                    sorted_dates.append(day)
+                    occupancy_index.add(day)
+                    previous = day
+                    yield event
+
+            search_index = search.SearchIndex(indexed(snap.events()))
+        for rule in rules.values():
+            day = _first_taken_day(rule, sorted_dates, date_index)
+            if day is not None:
+                raise snapshot.SnapshotError(
+                    f"Повторение правила {rule.id} на дату "
+                    f"{date.fromordinal(day).isoformat()} совпадает с событием "
+                    f"{date_index[day]}"
+                )
+        if isinstance(self._storage, columnar.ColumnarStore):
+            storage = columnar.ColumnarStore(storage)
+        with self._locked_all():
+            self._persistence.snapshot(storage.values(), last_id)
+            self._persistence.save_rules([rule.to_dict() for rule in rules.values()])
+            with self._index_lock:
+                self._storage, self._date_index = storage, date_index
+                self._sorted_dates = sorted_dates
+                self._search, self._occupancy, self._rules = (
+                    search_index, occupancy_index, rules
+                )
+            with self._counter_lock:
+                self._last_id = last_id
+                self._epoch = f"{time.time_ns():x}"
+                # Версия растет без уведомлений: подписчики (кэш списка)
+                # по скачку версии сбрасывают все, что запомнили
+                self._version += 1
+                self._modified_at = time.time()
+                self._event_versions = {}
+                self._changes = changes.ChangeLog(changes.CHANGE_LOG_SIZE, self._version)
+        return len(storage)
+
+
+    def close(self) -> None:
+        """Сбрасывает на диск несохраненные изменения."""
+        self._persistence.close()
+
+
+    def _log(self, op: str, event_id: str, event: EventsModel = None) -> bool:
+        """Записывает операцию в журнал до применения ее в памяти.
+
+        Args:
+            op: Код операции
+            event_id: ID события
+            event: Новое состояние события или None для удаления
+
+        Returns:
+            bool: True если после применения операции нужно сделать снимок
+        """
+        return self._persistence.append(op, event_id, event)
+
+
+    def _apply_insert(self, event_id: str, event: EventsModel) -> None:
+        """Добавляет событие в хранилище и индексы дат.
+
+        Args:
+            event_id: ID нового события
+            event: Новое событие
+        """
+        # Сохраняем в основное хранилище и в индекс по датам
+        self._storage[event_id] = event
+        self._date_index[event.ordinal] = event_id
+        with self._index_lock:
+            insort(self._sorted_dates, event.ordinal)
+        self._occupancy.add(event.ordinal)
+        self._search.add(event_id, event)
+        self._touch(event_id)
+
+
+    def _apply_replace(
+        self, _id: str, old_event: EventsModel, event: EventsModel
+    ) -> None:
+        """Заменяет событие в хранилище и обновляет индексы дат.
+
+        Args:
+            _id: ID события
+            old_event: Текущее состояние события
+            event: Новое состояние события
+        """
+        self._storage[_id] = event
+        # Обновляем индексы дат
+        if old_event.ordinal != event.ordinal:
+            del self._date_index[old_event.ordinal]
+            self._remove_sorted_date(old_event.ordinal)
+            self._date_index[event.ordinal] = _id
+            with self._index_lock:
+                insort(self._sorted_dates, event.ordinal)
+            self._occupancy.move(old_event.ordinal, event.ordinal)
+        self._search.replace(_id, old_event, event)
+        self._touch(_id)
+
+
+    def _apply_remove(self, _id: str, event: EventsModel) -> None:
+        """Удаляет событие из хранилища и индексов дат.
+
+        Args:
+            _id: ID события
+            event: Текущее состояние события
+        """
+        # Удаляем из индексов дат
+        del self._date_index[event.ordinal]
+        self._remove_sorted_date(event.ordinal)
+        self._occupancy.remove(event.ordinal)
+        # Удаляем из основного хранилища
+        del self._storage[_id]
+        self._search.remove(_id, event)
+        self._touch(_id, removed=True)
+
+
+    def _touch(self, _id: str, removed: bool = False) -> None:
+        """Увеличивает версию хранилища и запоминает ее для события.
+
+        Args:
+            _id: ID измененного события
+            removed: True если событие удалено
+        """
+        with self._counter_lock:
+            self._version += 1
+            self._modified_at = time.time()
+            if removed:
+                self._event_versions.pop(_id, None)
+            else:
+                self._event_versions[_id] = self._version
+            self._changes.append(
+                self._version, _id, changes.OP_DELETE if removed else changes.OP_PUT
+            )
+            for listener in self._listeners:
+                listener(_id)
+
+
+    def _snapshot(self) -> None:
+        """Сжимает журнал в снимок текущего состояния.
+
+        На время снимка захватываются все полосы дат, поэтому изменения
+        приостанавливаются и снимок согласован с журналом.
+        """
+        with ExitStack() as stack:
+            for lock in self._date_locks:
+                stack.enter_context(lock)
+            self._persistence.snapshot(self._iter_ids_from(1), self._last_id)
+
+
+    def _next_id(self) -> str:
+        """Атомарно выдает следующий ID события.
+
+        Returns:
+            str: Новый ID
+        """
+        with self._counter_lock:
+            self._last_id += 1
+            return str(self._last_id)
+
+
+    def _id_lock(self, _id: str) -> threading.Lock:
+        """Возвращает полосу блокировки для ID события.
+
+        Args:
+            _id: ID события
+
+        Returns:
+            threading.Lock: Блокировка полосы
+        """
+        return self._id_locks[hash(_id) % LOCK_STRIPES]
+
+
+    @contextmanager
+    def _locked_all(self) -> Iterator[None]:
+        """Захватывает все полосы ID и дат для изменения пакетом.
+
+        Yields:
+            None
+        """
+        with ExitStack() as stack:
+            for lock in self._id_locks + self._date_locks:
+                stack.enter_context(lock)
+            yield
+
+
+    @contextmanager
+    def _locked_dates(self, *days: int) -> Iterator[None]:
+        """Захватывает полосы блокировок для дат в фиксированном порядке.
+
+        Args:
+            *days: Порядковые номера дат, изменения которых нужно
+                сериализовать
+
+        Yields:
+            None
+        """
+        stripes = sorted({day % LOCK_STRIPES for day in days})
+        with ExitStack() as stack:
+            for stripe in stripes:
+                stack.enter_context(self._date_locks[stripe])
+            yield
+
+
+    def _owner_of(self, day: int) -> str:
+        """Возвращает ID события или правила, занимающего день.
+
+        Args:
+            day: Порядковый номер дня
+
+        Returns:
+            str: ID события, ID правила или None для свободного дня
+        """
+        event_id = self._date_index.get(day)
+        if event_id is None and len(self._rules):
+            return self._rules.owner_of(day)
+        return event_id
 
 
     def is_date_available(self, date_str: str, exclude_event_id: str = None) -> bool:
@@ -150,16 +1086,142 @@ class EventsLogic:
         Returns:
             bool: True если дата доступна, иначе False
         """
-        if not EventsModel.validate_date(date_str):
+        day = parse_date(date_str) if isinstance(date_str, str) else None
+        if day is None:
             return False
-        if date_str not in self._date_index:
+        existing_event_id = self._owner_of(day)
+        if existing_event_id is None:
             return True
         # Если указано исключить определенное событие
-        if exclude_event_id and self._date_index[date_str] == exclude_event_id:
+        if exclude_event_id and existing_event_id == exclude_event_id:
             return True
         return False
 
 
-    @staticmethod
-    def num() -> None:
-        """Заглушка для статического метода."""
+
+def _check_date(event: EventsModel) -> int:
+    """Проверяет формат даты события.
+
+    Args:
+        event: Событие для проверки
+
+    Returns:
+        int: Порядковый номер дня даты события
+
+    Raises:
+        ValueError: При неверном формате даты
+    """
+    day = event.ordinal
+    if day is None:
+        raise ValueError(
+            f"Неверный формат даты: {event.dates}. Ожидается YYYY-MM-DD"
+        )
+    return day
+
+
+def _parse_bound(date_str: str) -> int:
+    """Разбирает границу диапазона дат.
+
+    Args:
+        date_str: Дата в формате YYYY-MM-DD
+
+    Returns:
+        int: Порядковый номер дня
+
+    Raises:
+        ValueError: При неверном формате даты
+    """
+    day = parse_date(date_str)
+    if day is None:
+        raise ValueError(f"Неверный формат даты: {date_str}")
+    return day
+
+
+def _first_taken_day(
+    rule: recurrence.Rule, sorted_dates: list[int], date_index: dict[int, str]
+) -> int:
+    """Ищет первое повторение правила, приходящееся на дату события.
+
+    Проверяется то из двух множеств, что меньше: события в диапазоне серии
+    или повторения правила.
+
+    Args:
+        rule: Правило повторения
+        sorted_dates: Отсортированные даты событий
+        date_index: Индекс дата -> ID события
+
+    Returns:
+        int: Порядковый номер занятого дня или None
+    """
+    low = bisect_left(sorted_dates, rule.first)
+    high = bisect_right(sorted_dates, rule.last)
+    if high - low <= rule.size:
+        taken = (day for day in sorted_dates[low:high] if rule.occurs_on(day))
+    else:
+        taken = (day for day in rule.occurrences() if day in date_index)
+    return next(taken, None)
+
+
+def _snapshot_rules(items: list) -> recurrence.RuleSet:
+    """Проверяет правила повторения из снимка.
+
+    Args:
+        items: Правила снимка (Rule.to_dict)
+
+    Returns:
+        recurrence.RuleSet: Набор правил
+
+    Raises:
+        snapshot.SnapshotError: Если правило неверно, ID правила неверен или
+            повторяется, либо повторения двух правил совпадают
+    """
+    rules = recurrence.RuleSet()
+    for item in items:
+        try:
+            rule = recurrence.Rule.from_dict(item)
+        except recurrence.RecurrenceError as ex:
+            raise snapshot.SnapshotError(f"Неверное правило: {ex}") from None
+        number = ""
+        if isinstance(rule.id, str) and recurrence.is_rule_id(rule.id):
+            number = rule.id[len(recurrence.RULE_ID_PREFIX):]
+        if not (number.isascii() and number.isdigit()) or rules.get(rule.id) is not None:
+            raise snapshot.SnapshotError(f"Неверный ID правила: {rule.id}")
+        conflict = rules.conflict(rule)
+        if conflict is not None:
+            day, rule_id = conflict
+            raise snapshot.SnapshotError(
+                f"Повторения правил {rule.id} и {rule_id} совпадают на дату "
+                f"{date.fromordinal(day).isoformat()}"
+            )
+        rules.add(rule)
+    return recurrence.RuleSet(rules.values())
+
+
+def _conflict_error(date_str: str, existing_event_id: str) -> DateConflictError:
+    """Формирует ошибку занятой даты.
+
+    Args:
+        date_str: Занятая дата
+        existing_event_id: ID события, занимающего дату
+
+    Returns:
+        DateConflictError: Исключение с описанием конфликта
+    """
+    return DateConflictError(
+        f"На дату {date_str} уже существует событие с ID {existing_event_id}"
+    )
+
+
+def _batch_conflict_message(date_str: str, owner: str | int) -> str:
+    """Формирует сообщение о занятой дате для операции пакета.
+
+    Args:
+        date_str: Занятая дата
+        owner: ID события или номер записи пакета, занимающей дату
+
+    Returns:
+        str: Сообщение об ошибке
+    """
+    if isinstance(owner, int):
+        return f"Дата {date_str} уже занята записью {owner} пакета"
+    return str(_conflict_error(date_str, owner))
@@ -0,0 +1,496 @@
+"""Метрики и профилирование запросов.
+
+Метрики (счетчики, гистограммы и измеряемые при выгрузке показатели)
+собираются в памяти процесса и выгружаются в текстовом формате Prometheus.
+Гистограммы хранят фиксированные интервалы, поэтому запись значения -
+это поиск интервала и увеличение счетчика под короткой блокировкой.
+
+SlowRequestProfiler профилирует через cProfile выборку запросов и
+сохраняет профили медленных запросов в файлы pstats; его можно включать,
+выключать и перенастраивать во время работы.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import random
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from collections.abc import Callable, Iterable
+
+import app.logic as logic
+
+# Границы интервалов гистограмм времени по умолчанию, в секундах
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+)
+
+
+class Counter:
+    """Монотонно растущий счетчик с метками."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labels: tuple[str, ...] = ()) -> None:
+        """Инициализирует счетчик.
+
+        Args:
+            name: Имя метрики
+            help_text: Описание метрики
+            labels: Имена меток
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        """Увеличивает счетчик.
+
+        Args:
+            *label_values: Значения меток в порядке labels
+            amount: Величина увеличения
+        """
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self) -> Iterable[tuple[str, tuple, float]]:
+        """Возвращает значения для выгрузки.
+
+        Returns:
+            Iterable: Кортежи (суффикс имени, пары меток, значение)
+        """
+        with self._lock:
+            values = list(self._values.items())
+        return [
+            ("_total", tuple(zip(self.labels, key)), value) for key, value in values
+        ]
+
+
+class Histogram:
+    """Гистограмма с фиксированными интервалами и метками."""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        """Инициализирует гистограмму.
+
+        Args:
+            name: Имя метрики
+            help_text: Описание метрики
+            labels: Имена меток
+            buckets: Возрастающие верхние границы интервалов
+        """
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._buckets = buckets
+        # Метки -> [счетчики по интервалам (последний - +Inf), сумма]
+        self._series: dict[tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        """Записывает наблюдение.
+
+        Args:
+            value: Значение
+            *label_values: Значения меток в порядке labels
+        """
+        position = bisect_left(self._buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self._buckets) + 1), 0.0]
+            series[0][position] += 1
+            series[1] += value
+
+    def time(self, *label_values: str) -> "_Timer":
+        """Возвращает контекстный менеджер, записывающий время блока.
+
+        Args:
+            *label_values: Значения меток в порядке labels
+
+        Returns:
+            _Timer: Контекстный менеджер
+        """
+        return _Timer(self, label_values)
+
+    def samples(self) -> Iterable[tuple[str, tuple, float]]:
+        """Возвращает значения для выгрузки (накопленные по интервалам).
+
+        Returns:
+            Iterable: Кортежи (суффикс имени, пары меток, значение)
+        """
+        with self._lock:
+            series = [(key, list(counts), total) for key, (counts, total) in self._series.items()]
+        result = []
+        for key, counts, total in series:
+            labels = tuple(zip(self.labels, key))
+            cumulative = 0
+            for bound, count in zip(self._buckets + (float("inf"),), counts):
+                cumulative += count
+                result.append(("_bucket", labels + (("le", _format_value(bound)),), cumulative))
+            result.append(("_sum", labels, total))
+            result.append(("_count", labels, cumulative))
+        return result
+
+
+class Gauge:
+    """Показатель, значение которого вычисляется при выгрузке."""
+
+    kind = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        collect: Callable[[], float],
+    ) -> None:
+        """Инициализирует показатель.
+
+        Args:
+            name: Имя метрики
+            help_text: Описание метрики
+            collect: Функция, возвращающая текущее значение
+        """
+        self.name = name
+        self.help_text = help_text
+        self._collect = collect
+
+    def samples(self) -> Iterable[tuple[str, tuple, float]]:
+        """Возвращает текущее значение для выгрузки.
+
+        Returns:
+            Iterable: Кортежи (суффикс имени, пары меток, значение)
+        """
+        return [("", (), self._collect())]
+
+
+class CallbackCounter(Gauge):
+    """Счетчик, значение которого берется из внешнего источника при выгрузке."""
+
+    kind = "counter"
+
+    def samples(self) -> Iterable[tuple[str, tuple, float]]:
+        """Возвращает текущее значение для выгрузки.
+
+        Returns:
+            Iterable: Кортежи (суффикс имени, пары меток, значение)
+        """
+        return [("_total", (), self._collect())]
+
+
+class _Timer:
+    """Контекстный менеджер, записывающий время блока в гистограмму."""
+
+    __slots__ = ("_histogram", "_labels", "_started")
+
+    def __init__(self, histogram: Histogram, labels: tuple[str, ...]) -> None:
+        """Инициализирует таймер.
+
+        Args:
+            histogram: Гистограмма для записи
+            labels: Значения меток
+        """
+        self._histogram = histogram
+        self._labels = labels
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        """Запоминает время начала блока.
+
+        Returns:
+            _Timer: Этот таймер
+        """
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Записывает время выполнения блока.
+
+        Args:
+            *exc_info: Информация об исключении
+        """
+        self._histogram.observe(time.perf_counter() - self._started, *self._labels)
+
+
+class Registry:
+    """Набор метрик, выгружаемых вместе."""
+
+    def __init__(self) -> None:
+        """Инициализирует пустой набор."""
+        self._metrics: list = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        """Добавляет метрику в набор.
+
+        Args:
+            metric: Counter, Histogram или Gauge
+
+        Returns:
+            Та же метрика
+        """
+        with self._lock:
+            self._metrics = [m for m in self._metrics if m.name != metric.name]
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        """Выгружает все метрики в текстовом формате Prometheus.
+
+        Returns:
+            str: Текст в формате exposition format 0.0.4
+        """
+        lines = []
+        for metric in list(self._metrics):
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                if labels:
+                    label_text = ",".join(
+                        f'{name}="{_escape(str(label))}"' for name, label in labels
+                    )
+                    lines.append(
+                        f"{metric.name}{suffix}{{{label_text}}} {_format_value(value)}"
+                    )
+                else:
+                    lines.append(f"{metric.name}{suffix} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class SlowRequestProfiler:
+    """Выборочное профилирование медленных запросов через cProfile.
+
+    Профилируется доля запросов sample_rate; если запрос выполнялся дольше
+    threshold секунд, его профиль сохраняется в файл pstats в каталоге
+    output_dir (его можно открыть в snakeviz или преобразовать во flame
+    graph, например flameprof). По умолчанию профилирование выключено.
+    """
+
+    def __init__(self, output_dir: str = None, keep: int = 50) -> None:
+        """Инициализирует профилировщик.
+
+        Args:
+            output_dir: Каталог для профилей; по умолчанию подкаталог
+                временного каталога системы
+            keep: Число хранимых профилей (старые файлы удаляются)
+        """
+        self.output_dir = output_dir or os.path.join(
+            tempfile.gettempdir(), "calendar-profiles"
+        )
+        self.enabled = False
+        self.threshold = 0.1
+        self.sample_rate = 1.0
+        self._dumps: deque = deque()
+        self._keep = keep
+        self._lock = threading.Lock()
+        self._sequence = 0
+
+    def configure(
+        self, enabled: bool = None, threshold: float = None, sample_rate: float = None
+    ) -> dict:
+        """Меняет настройки профилирования во время работы.
+
+        Args:
+            enabled: Включить или выключить профилирование
+            threshold: Порог длительности запроса в секундах
+            sample_rate: Доля профилируемых запросов от 0 до 1
+
+        Returns:
+            dict: Новые настройки
+
+        Raises:
+            ValueError: При неверном значении порога или доли
+        """
+        if threshold is not None and threshold < 0:
+            raise ValueError(f"Неверный порог: {threshold}")
+        if sample_rate is not None and not 0 <= sample_rate <= 1:
+            raise ValueError(f"Неверная доля запросов: {sample_rate}")
+        with self._lock:
+            if enabled is not None:
+                self.enabled = bool(enabled)
+            if threshold is not None:
+                self.threshold = threshold
+            if sample_rate is not None:
+                self.sample_rate = sample_rate
+        return self.settings()
+
+    def settings(self) -> dict:
+        """Возвращает текущие настройки.
+
+        Returns:
+            dict: Признак включения, порог в мс, доля запросов и каталог
+        """
+        return {
+            "enabled": self.enabled,
+            "threshold_ms": self.threshold * 1000,
+            "sample_rate": self.sample_rate,
+            "output_dir": self.output_dir,
+        }
+
+    def start(self) -> cProfile.Profile:
+        """Начинает профилирование запроса, если он попал в выборку.
+
+        Returns:
+            cProfile.Profile: Запущенный профиль или None
+        """
+        if not self.enabled or random.random() >= self.sample_rate:
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # В этом потоке уже работает другой профилировщик
+            return None
+        return profile
+
+    def finish(self, profile: cProfile.Profile, duration: float, label: str) -> str:
+        """Останавливает профилирование и сохраняет профиль медленного запроса.
+
+        Args:
+            profile: Профиль, возвращенный start()
+            duration: Длительность запроса в секундах
+            label: Описание запроса (метод и маршрут)
+
+        Returns:
+            str: Имя сохраненного профиля или None
+        """
+        profile.disable()
+        if duration < self.threshold:
+            return None
+        with self._lock:
+            self._sequence += 1
+            name = f"{time.strftime('%Y%m%d-%H%M%S')}-{self._sequence:06d}.prof"
+        os.makedirs(self.output_dir, exist_ok=True)
+        profile.dump_stats(os.path.join(self.output_dir, name))
+        with self._lock:
+            self._dumps.append({
+                "name": name,
+                "request": label,
+                "duration_ms": round(duration * 1000, 3),
+            })
+            while len(self._dumps) > self._keep:
+                old = self._dumps.popleft()
+                try:
+                    os.remove(os.path.join(self.output_dir, old["name"]))
+                except OSError:
+                    pass
+        return name
+
+    def dumps(self) -> list[dict]:
+        """Возвращает сохраненные профили, начиная с последнего.
+
+        Returns:
+            list: Имя файла, запрос и длительность для каждого профиля
+        """
+        with self._lock:
+            return list(reversed(self._dumps))
+
+    def report(self, name: str, limit: int = 40) -> str:
+        """Формирует текстовый отчет по сохраненному профилю.
+
+        Args:
+            name: Имя профиля
+            limit: Число функций в отчете
+
+        Returns:
+            str: Функции, отсортированные по накопленному времени, или None,
+                если профиля нет
+        """
+        with self._lock:
+            known = any(dump["name"] == name for dump in self._dumps)
+        path = os.path.join(self.output_dir, name)
+        if not known or not os.path.exists(path):
+            return None
+        output = io.StringIO()
+        stats = pstats.Stats(path, stream=output)
+        stats.sort_stats("cumulative").print_stats(limit)
+        return output.getvalue()
+
+
+def count_rejection(ex: ValueError) -> None:
+    """Учитывает операцию, отклоненную хранилищем.
+
+    Args:
+        ex: Исключение хранилища
+    """
+    if isinstance(ex, logic.DateConflictError):
+        DATE_CONFLICTS.inc()
+    else:
+        VALIDATION_FAILURES.inc("value")
+
+
+def _escape(value: str) -> str:
+    """Экранирует значение метки для формата Prometheus.
+
+    Args:
+        value: Значение метки
+
+    Returns:
+        str: Экранированное значение
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_value(value: float) -> str:
+    """Форматирует число для формата Prometheus.
+
+    Args:
+        value: Число
+
+    Returns:
+        str: Текстовое представление
+    """
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, int) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+# Метрики API, общие для всех приложений процесса
+REGISTRY = Registry()
+REQUEST_DURATION = REGISTRY.register(Histogram(
+    "calendar_request_duration_seconds",
+    "Время обработки запроса по маршрутам",
+    ("method", "route"),
+))
+REQUESTS = REGISTRY.register(Counter(
+    "calendar_requests",
+    "Число запросов по маршрутам и кодам ответа",
+    ("method", "route", "status"),
+))
+STAGE_DURATION = REGISTRY.register(Histogram(
+    "calendar_stage_duration_seconds",
+    "Время этапов обработки: parse (_from_raw), logic (EventsLogic), "
+    "serialize (_to_raw)",
+    ("stage",),
+))
+VALIDATION_FAILURES = REGISTRY.register(Counter(
+    "calendar_validation_failures",
+    "Число отклоненных проверкой запросов по причинам",
+    ("reason",),
+))
+DATE_CONFLICTS = REGISTRY.register(Counter(
+    "calendar_date_conflicts",
+    "Число операций, отклоненных из-за занятой даты",
+))
+RATE_LIMITED = REGISTRY.register(Counter(
+    "calendar_rate_limited",
+    "Число запросов на запись, отклоненных допуском (429), по причинам",
+    ("reason",),
+))
+PROFILER = SlowRequestProfiler(os.environ.get("CALENDAR_PROFILE_DIR"))
@@ -1,26 +1,82 @@
 """Модель данных для событий."""
 
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from typing import Optional
 
+# Размер кэша разобранных дат (около 27 лет уникальных дней)
+DATE_CACHE_SIZE = 10_000
+
+
+@lru_cache(maxsize=DATE_CACHE_SIZE)
+def parse_date(date_str: str) -> Optional[int]:
+    """Разбирает дату фиксированного формата YYYY-MM-DD в порядковый номер.
+
+    В отличие от datetime.strptime не зависит от локали и не использует
+    регулярные выражения: проверяет позиции разделителей и цифр и строит
+    datetime.date напрямую. Результаты кэшируются.
+
+    Args:
+        date_str: Строка с датой
+
+    Returns:
+        Optional[int]: Порядковый номер дня (date.toordinal()) или None,
+            если строка не является корректной датой
+    """
+    if len(date_str) != 10 or date_str[4] != "-" or date_str[7] != "-":
+        return None
+    year, month, day = date_str[:4], date_str[5:7], date_str[8:]
+    if not (date_str.isascii() and year.isdigit() and month.isdigit() and day.isdigit()):
+        return None
+    try:
+        return date(int(year), int(month), int(day)).toordinal()
+    except ValueError:
+        return None
+
 
 class Events:
     """Класс представляющий модель события.
 
+    Экземпляры не имеют __dict__ (используется __slots__), что заметно
+    уменьшает расход памяти при большом числе событий.
+
     Attributes:
         id: Уникальный идентификатор события
         title: Заголовок события
         text: Текст описания события
         dates: Дата события в формате YYYY-MM-DD
+        ordinal: Порядковый номер дня даты или None для неверной даты;
+            вычисляется один раз при первом обращении
     """
 
+    __slots__ = ("id", "title", "text", "_dates", "_ordinal")
 
     def __init__(self) -> None:
         """Инициализирует объект события с значениями по умолчанию."""
         self.id: Optional[str] = None
         self.title: str = ""
         self.text: str = ""
-        self.dates: str = ""
+        self.dates = ""
+
+
+    @property
+    def dates(self) -> str:
+        """Дата события в формате YYYY-MM-DD."""
+        return self._dates
+
+
+    @dates.setter
+    def dates(self, value: str) -> None:
+        self._dates = value
+        self._ordinal = None
+
+
+    @property
+    def ordinal(self) -> Optional[int]:
+        """Порядковый номер дня даты события или None для неверной даты."""
+        if self._ordinal is None:
+            self._ordinal = parse_date(self._dates)
+        return self._ordinal
 
 
     @staticmethod
@@ -33,11 +89,7 @@ class Events:
         Returns:
             bool: True если дата в формате YYYY-MM-DD, иначе False
         """
-        try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-            return True
-        except ValueError:
-            return False
+        return isinstance(date_str, str) and parse_date(date_str) is not None
 
 
     @staticmethod
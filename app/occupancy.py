@@ -0,0 +1,190 @@
+"""Занятость дней по месяцам и годам.
+
+OccupancyIndex хранит для каждого месяца битовую маску занятых дней
+(бит d-1 соответствует дню d) и число занятых дней за каждый год.
+Счетчики обновляются инкрементально при изменении событий, поэтому
+календарь месяца и статистика по годам не требуют перебора событий.
+По тем же маскам ищутся свободные дни: полностью занятый месяц
+пропускается за одну проверку, а свободные дни извлекаются по младшим
+установленным битам, поэтому время поиска пропорционально размеру ответа
+и числу просмотренных месяцев, а не длине диапазона.
+"""
+
+import calendar
+import threading
+from collections.abc import Callable, Iterable
+from datetime import date
+
+# Последний допустимый день (9999-12-31)
+LAST_ORDINAL = date.max.toordinal()
+
+
+def month_key(ordinal: int) -> tuple[int, int, int]:
+    """Раскладывает порядковый номер дня на год, месяц и день.
+
+    Args:
+        ordinal: Порядковый номер дня (date.toordinal())
+
+    Returns:
+        tuple[int, int, int]: Год, месяц и день месяца
+    """
+    day = date.fromordinal(ordinal)
+    return day.year, day.month, day.day
+
+
+def check_month(year: int, month: int) -> None:
+    """Проверяет год и месяц календаря.
+
+    Args:
+        year: Год
+        month: Месяц
+
+    Raises:
+        ValueError: Если год вне 1-9999 или месяц вне 1-12
+    """
+    if not 1 <= year <= 9999:
+        raise ValueError(f"Неверный год: {year}")
+    if not 1 <= month <= 12:
+        raise ValueError(f"Неверный месяц: {month}")
+
+
+def free_days(
+    month_mask: Callable[[int, int], int], start: int, count: int, end: int = None
+) -> list[int]:
+    """Находит первые свободные дни начиная с заданного.
+
+    Args:
+        month_mask: Функция (год, месяц) -> маска занятых дней месяца
+        start: Порядковый номер первого проверяемого дня
+        count: Максимальное число дней в ответе
+        end: Порядковый номер последнего проверяемого дня или None
+
+    Returns:
+        list[int]: Порядковые номера свободных дней по возрастанию
+    """
+    last = LAST_ORDINAL if end is None else min(end, LAST_ORDINAL)
+    year, month, day = month_key(start)
+    first = start - day + 1  # первый день месяца
+    days = []
+    while len(days) < count and first <= last:
+        days_in_month = calendar.monthrange(year, month)[1]
+        free = ~month_mask(year, month) & ((1 << days_in_month) - 1)
+        free &= -(1 << (day - 1))  # дни до start не проверяются
+        while free and len(days) < count:
+            low = free & -free
+            ordinal = first + low.bit_length() - 1
+            if ordinal > last:
+                return days
+            days.append(ordinal)
+            free ^= low
+        first += days_in_month
+        day = 1
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return days
+
+
+class OccupancyIndex:
+    """Битовые маски занятых дней по месяцам и счетчики по годам."""
+
+    def __init__(self, ordinals: Iterable[int] = ()) -> None:
+        """Строит счетчики по начальному набору занятых дней.
+
+        Args:
+            ordinals: Порядковые номера занятых дней
+        """
+        self._months: dict[tuple[int, int], int] = {}  # (год, месяц) -> маска
+        self._years: dict[int, int] = {}  # год -> число занятых дней
+        self._lock = threading.Lock()
+        for ordinal in ordinals:
+            self._add(ordinal)
+
+    def add(self, ordinal: int) -> None:
+        """Отмечает день занятым.
+
+        Args:
+            ordinal: Порядковый номер дня
+        """
+        with self._lock:
+            self._add(ordinal)
+
+    def remove(self, ordinal: int) -> None:
+        """Отмечает день свободным.
+
+        Args:
+            ordinal: Порядковый номер дня
+        """
+        with self._lock:
+            self._remove(ordinal)
+
+    def move(self, old_ordinal: int, ordinal: int) -> None:
+        """Переносит занятость с одного дня на другой (изменение даты).
+
+        Args:
+            old_ordinal: Прежний день
+            ordinal: Новый день
+        """
+        if old_ordinal == ordinal:
+            return
+        with self._lock:
+            self._remove(old_ordinal)
+            self._add(ordinal)
+
+    def month(self, year: int, month: int) -> int:
+        """Возвращает маску занятых дней месяца.
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 установлен, если день d занят
+        """
+        return self._months.get((year, month), 0)
+
+    def months(self) -> dict[tuple[int, int], int]:
+        """Возвращает число занятых дней по месяцам.
+
+        Returns:
+            dict[tuple[int, int], int]: (год, месяц) -> число занятых дней
+        """
+        with self._lock:
+            return {key: mask.bit_count() for key, mask in self._months.items()}
+
+    def years(self) -> dict[int, int]:
+        """Возвращает число занятых дней по годам.
+
+        Returns:
+            dict[int, int]: Год -> число занятых дней
+        """
+        with self._lock:
+            return dict(self._years)
+
+    def _add(self, ordinal: int) -> None:
+        """Отмечает день занятым; вызывается под блокировкой.
+
+        Args:
+            ordinal: Порядковый номер дня
+        """
+        year, month, day = month_key(ordinal)
+        key = (year, month)
+        self._months[key] = self._months.get(key, 0) | (1 << (day - 1))
+        self._years[year] = self._years.get(year, 0) + 1
+
+    def _remove(self, ordinal: int) -> None:
+        """Отмечает день свободным; вызывается под блокировкой.
+
+        Args:
+            ordinal: Порядковый номер дня
+        """
+        year, month, day = month_key(ordinal)
+        key = (year, month)
+        mask = self._months.get(key, 0) & ~(1 << (day - 1))
+        if mask:
+            self._months[key] = mask
+        else:
+            self._months.pop(key, None)
+        count = self._years.get(year, 0) - 1
+        if count > 0:
+            self._years[year] = count
+        else:
+            self._years.pop(year, None)
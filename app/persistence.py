@@ -0,0 +1,479 @@
+"""Модуль постоянного хранения событий.
+
+Журнал (write-ahead log) дополняется одной JSON-строкой на каждую операцию
+create/update/delete, а периодический снимок в JSON файле ограничивает время
+восстановления размером данных, а не длиной истории изменений.
+"""
+
+import atexit
+import json
+import os
+import threading
+import weakref
+from collections.abc import Iterable
+
+import app.model as model
+
+# Имена файлов в каталоге данных
+JOURNAL_FILE = "events.log"
+SNAPSHOT_FILE = "events.json"
+RULES_FILE = "rules.json"
+
+# Коды операций в журнале
+OP_CREATE = "c"
+OP_UPDATE = "u"
+OP_DELETE = "d"
+OP_BATCH = "b"
+
+# Открытые журналы процесса: обработчики atexit и fork регистрируются один
+# раз на модуль, а не на каждое хранилище, поэтому закрытые хранилища
+# (например, выгруженные календари арендаторов) не остаются в памяти
+_open_journals: "weakref.WeakSet[JournalPersistence]" = weakref.WeakSet()
+# Журналы, заблокированные перед текущим fork()
+_forking: list = []
+
+
+class PersistenceException(Exception):
+    """Исключение для ошибок постоянного хранилища."""
+
+
+class Persistence:
+    """Базовый механизм хранения, не сохраняющий данные между запусками.
+
+    Определяет интерфейс, который EventsLogic использует для восстановления
+    состояния при старте и записи каждой операции.
+    """
+
+    def load(self) -> tuple[dict[str, model.Events], int]:
+        """Восстанавливает сохраненное состояние.
+
+        Returns:
+            tuple: Словарь событий по ID и последний выданный ID
+        """
+        return {}, 0
+
+    def append(self, op: str, event_id: str, event: model.Events = None) -> bool:
+        """Записывает операцию в журнал.
+
+        Args:
+            op: Код операции (OP_CREATE, OP_UPDATE или OP_DELETE)
+            event_id: ID события
+            event: Новое состояние события или None для удаления
+
+        Returns:
+            bool: True если журнал пора сжать в снимок
+        """
+        return False
+
+    def append_batch(self, records: list[tuple[str, str, model.Events]]) -> bool:
+        """Записывает пакет операций как единое целое.
+
+        Args:
+            records: Список кортежей (код операции, ID, событие или None)
+
+        Returns:
+            bool: True если журнал пора сжать в снимок
+        """
+        return False
+
+    def snapshot(self, events: Iterable[model.Events], last_id: int) -> None:
+        """Сохраняет снимок состояния и очищает журнал.
+
+        Args:
+            events: Все текущие события
+            last_id: Последний выданный ID
+        """
+
+    def load_rules(self) -> list[dict]:
+        """Восстанавливает сохраненные правила повторения.
+
+        Returns:
+            list[dict]: Правила в виде словарей (Rule.to_dict)
+        """
+        return []
+
+    def save_rules(self, rules: list[dict]) -> None:
+        """Сохраняет все правила повторения.
+
+        Args:
+            rules: Правила в виде словарей (Rule.to_dict)
+        """
+
+    def close(self) -> None:
+        """Сбрасывает буферы и освобождает ресурсы."""
+
+
+class JournalPersistence(Persistence):
+    """Хранилище в каталоге с журналом операций и снимком состояния.
+
+    Записи журнала буферизуются и сбрасываются на диск групповым fsync:
+    либо при накоплении group_size записей, либо фоновым потоком не реже
+    одного раза в sync_interval секунд.
+    """
+
+    def __init__(
+        self,
+        data_dir: str,
+        group_size: int = 64,
+        sync_interval: float = 0.05,
+        snapshot_every: int = 100_000,
+    ) -> None:
+        """Открывает каталог данных.
+
+        Args:
+            data_dir: Каталог для файлов журнала и снимка
+            group_size: Число записей, после которого fsync выполняется сразу
+            sync_interval: Максимальная задержка fsync в секундах
+            snapshot_every: Число записей журнала между снимками
+        """
+        os.makedirs(data_dir, exist_ok=True)
+        self._journal_path = os.path.join(data_dir, JOURNAL_FILE)
+        self._snapshot_path = os.path.join(data_dir, SNAPSHOT_FILE)
+        self._rules_path = os.path.join(data_dir, RULES_FILE)
+        self._group_size = group_size
+        self._sync_interval = sync_interval
+        self._snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._journal = None
+        self._pending = 0
+        self._records = 0
+        self._closed = threading.Event()
+        self._flusher = None
+
+    def load(self) -> tuple[dict[str, model.Events], int]:
+        """Читает снимок и проигрывает поверх него журнал.
+
+        Недописанная последняя строка журнала (сбой во время записи)
+        отбрасывается, и журнал усекается до последней целой записи.
+
+        Returns:
+            tuple: Словарь событий по ID и последний выданный ID
+
+        Raises:
+            PersistenceException: Если снимок поврежден
+        """
+        events, last_id = self._read_snapshot()
+        valid_size = 0
+        if os.path.exists(self._journal_path):
+            with open(self._journal_path, "rb") as journal:
+                for line in journal:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        break
+                    valid_size += len(line)
+                    self._records += 1
+                    last_id = max(last_id, _apply_record(events, record))
+        self._open_journal(valid_size)
+        return events, last_id
+
+    def append(self, op: str, event_id: str, event: model.Events = None) -> bool:
+        """Записывает операцию в журнал с групповым fsync.
+
+        Args:
+            op: Код операции (OP_CREATE, OP_UPDATE или OP_DELETE)
+            event_id: ID события
+            event: Новое состояние события или None для удаления
+
+        Returns:
+            bool: True если журнал пора сжать в снимок
+        """
+        return self._write(_make_record(op, event_id, event))
+
+    def append_batch(self, records: list[tuple[str, str, model.Events]]) -> bool:
+        """Записывает пакет операций одной строкой журнала.
+
+        Недописанная строка отбрасывается при восстановлении, поэтому
+        пакет восстанавливается либо целиком, либо не восстанавливается.
+
+        Args:
+            records: Список кортежей (код операции, ID, событие или None)
+
+        Returns:
+            bool: True если журнал пора сжать в снимок
+        """
+        return self._write({
+            "op": OP_BATCH,
+            "ops": [_make_record(*record) for record in records],
+        })
+
+    def _write(self, record: dict) -> bool:
+        """Дописывает запись в журнал с групповым fsync.
+
+        Args:
+            record: Запись журнала
+
+        Returns:
+            bool: True если журнал пора сжать в снимок
+        """
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if self._journal is None:
+                self._open_journal()
+            self._journal.write(line.encode("utf-8"))
+            self._pending += 1
+            self._records += 1
+            if self._pending >= self._group_size:
+                self._sync_locked()
+            return self._records >= self._snapshot_every
+
+    def snapshot(self, events: Iterable[model.Events], last_id: int) -> None:
+        """Атомарно записывает снимок и очищает журнал.
+
+        Снимок пишется во временный файл и заменяет старый через os.replace,
+        поэтому сбой в любой момент оставляет на диске целое состояние.
+
+        Args:
+            events: Все текущие события
+            last_id: Последний выданный ID
+        """
+        tmp_path = self._snapshot_path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as tmp:
+                tmp.write('{"last_id": %d, "events": [' % last_id)
+                for i, event in enumerate(events):
+                    if i:
+                        tmp.write(",")
+                    tmp.write(json.dumps(
+                        [event.id, event.dates, event.title, event.text],
+                        ensure_ascii=False,
+                    ))
+                tmp.write("]}")
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self._snapshot_path)
+            if self._journal is not None:
+                self._journal.truncate(0)
+                self._journal.seek(0)
+                os.fsync(self._journal.fileno())
+            self._pending = 0
+            self._records = 0
+
+    def load_rules(self) -> list[dict]:
+        """Читает файл правил повторения, если он есть.
+
+        Returns:
+            list[dict]: Правила в виде словарей (Rule.to_dict)
+
+        Raises:
+            PersistenceException: Если файл правил поврежден
+        """
+        if not os.path.exists(self._rules_path):
+            return []
+        try:
+            with open(self._rules_path, encoding="utf-8") as rules:
+                return json.load(rules)["rules"]
+        except (ValueError, KeyError, TypeError) as ex:
+            raise PersistenceException(f"Поврежден файл {self._rules_path}") from ex
+
+    def save_rules(self, rules: list[dict]) -> None:
+        """Атомарно перезаписывает файл правил повторения.
+
+        Правил немного и меняются они редко, поэтому файл пишется целиком
+        (через временный файл и os.replace), а не через журнал.
+
+        Args:
+            rules: Правила в виде словарей (Rule.to_dict)
+        """
+        tmp_path = self._rules_path + ".tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as tmp:
+                json.dump({"rules": rules}, tmp, ensure_ascii=False)
+                tmp.flush()
+                os.fsync(tmp.fileno())
+            os.replace(tmp_path, self._rules_path)
+
+    def sync(self) -> None:
+        """Немедленно сбрасывает накопленные записи журнала на диск."""
+        with self._lock:
+            self._sync_locked()
+
+    def close(self) -> None:
+        """Сбрасывает журнал на диск и останавливает фоновый поток."""
+        self._closed.set()
+        with self._lock:
+            if self._journal is not None:
+                self._sync_locked()
+                self._journal.close()
+                self._journal = None
+        _open_journals.discard(self)
+
+    def _read_snapshot(self) -> tuple[dict[str, model.Events], int]:
+        """Читает снимок состояния, если он есть.
+
+        Returns:
+            tuple: Словарь событий по ID и последний выданный ID
+
+        Raises:
+            PersistenceException: Если снимок поврежден
+        """
+        if not os.path.exists(self._snapshot_path):
+            return {}, 0
+        try:
+            with open(self._snapshot_path, encoding="utf-8") as snapshot:
+                data = json.load(snapshot)
+            events = {}
+            for event_id, dates, title, text in data["events"]:
+                events[event_id] = _make_event(event_id, dates, title, text)
+            return events, int(data["last_id"])
+        except (ValueError, KeyError, TypeError) as ex:
+            raise PersistenceException(
+                f"Поврежден снимок {self._snapshot_path}"
+            ) from ex
+
+    def _open_journal(self, valid_size: int = None) -> None:
+        """Открывает журнал на дозапись и запускает фоновый fsync.
+
+        Args:
+            valid_size: Размер целой части журнала; хвост за ней усекается
+        """
+        self._journal = open(self._journal_path, "ab")
+        if valid_size is not None and self._journal.tell() != valid_size:
+            self._journal.truncate(valid_size)
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="events-journal-sync", daemon=True
+            )
+            self._flusher.start()
+            _open_journals.add(self)
+
+    def _before_fork(self) -> None:
+        """Сбрасывает буфер журнала перед fork().
+
+        Иначе незаписанные строки из буфера унаследует дочерний процесс,
+        и они попадут в журнал дважды. Блокировка удерживается до конца
+        fork, чтобы журнал не менялся другими потоками.
+        """
+        self._lock.acquire()
+        if self._journal is not None:
+            self._journal.flush()
+
+    def _after_fork(self) -> None:
+        """Восстанавливает фоновый fsync в дочернем процессе.
+
+        Журнал, открытый до fork (хранилище загружено в мастер-процессе
+        gunicorn), в дочернем процессе продолжает работать; дописывать его
+        при этом должен только один процесс.
+        """
+        self._lock.release()
+        if self._closed.is_set():
+            return
+        self._flusher = threading.Thread(
+            target=self._flush_loop, name="events-journal-sync", daemon=True
+        )
+        self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        """Периодически выполняет групповой fsync накопленных записей."""
+        while not self._closed.wait(self._sync_interval):
+            with self._lock:
+                if self._pending and self._journal is not None:
+                    self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        """Сбрасывает буфер журнала на диск; вызывается под блокировкой."""
+        if self._journal is None or not self._pending:
+            return
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._pending = 0
+
+
+def _close_journals() -> None:
+    """Сбрасывает на диск и закрывает журналы при выходе из процесса."""
+    for journal in list(_open_journals):
+        journal.close()
+
+
+def _before_fork() -> None:
+    """Блокирует открытые журналы и сбрасывает их буферы перед fork()."""
+    _forking[:] = list(_open_journals)
+    for journal in _forking:
+        journal._before_fork()  # pylint: disable=protected-access
+
+
+def _after_fork_in_parent() -> None:
+    """Снимает блокировки журналов в родительском процессе."""
+    for journal in _forking:
+        journal._lock.release()  # pylint: disable=protected-access
+    _forking.clear()
+
+
+def _after_fork_in_child() -> None:
+    """Восстанавливает журналы в дочернем процессе."""
+    for journal in _forking:
+        journal._after_fork()  # pylint: disable=protected-access
+    _forking.clear()
+
+
+atexit.register(_close_journals)
+os.register_at_fork(
+    before=_before_fork,
+    after_in_parent=_after_fork_in_parent,
+    after_in_child=_after_fork_in_child,
+)
+
+
+def _make_event(event_id: str, dates: str, title: str, text: str) -> model.Events:
+    """Создает объект события из сохраненных полей.
+
+    Args:
+        event_id: ID события
+        dates: Дата события
+        title: Заголовок события
+        text: Текст события
+
+    Returns:
+        model.Events: Восстановленное событие
+    """
+    event = model.Events()
+    event.id = event_id
+    event.dates = dates
+    event.title = title
+    event.text = text
+    return event
+
+
+def _make_record(op: str, event_id: str, event: model.Events = None) -> dict:
+    """Формирует запись журнала для операции.
+
+    Args:
+        op: Код операции
+        event_id: ID события
+        event: Новое состояние события или None для удаления
+
+    Returns:
+        dict: Запись журнала
+    """
+    record = {"op": op, "id": event_id}
+    if event is not None:
+        record.update(date=event.dates, title=event.title, text=event.text)
+    return record
+
+
+def _apply_record(events: dict[str, model.Events], record: dict) -> int:
+    """Применяет запись журнала к восстанавливаемому состоянию.
+
+    Записи несут полное состояние события, поэтому повторное применение
+    уже вошедших в снимок записей не меняет результат.
+
+    Args:
+        events: Восстанавливаемый словарь событий
+        record: Запись журнала
+
+    Returns:
+        int: Наибольшее числовое значение ID из записи
+    """
+    if record["op"] == OP_BATCH:
+        return max((_apply_record(events, op) for op in record["ops"]), default=0)
+    event_id = record["id"]
+    if record["op"] == OP_DELETE:
+        if events.pop(event_id, None) is None:
+            # Удаление отсутствующего события не меняет ни состояние, ни
+            # последний выданный ID (и ID может быть не числом)
+            return 0
+    else:
+        events[event_id] = _make_event(
+            event_id, record["date"], record["title"], record["text"]
+        )
+    return int(event_id)
@@ -0,0 +1,538 @@
+"""Повторяющиеся события.
+
+Правило повторения (Rule) хранится одной записью: первая дата, частота
+(ежедневно, еженедельно, ежемесячно), интервал и конец серии (дата until
+или число повторений count). Даты повторений не материализуются: они
+вычисляются только внутри запрошенного диапазона дат, а проверка правила
+"одно событие в день" выполняется арифметически:
+
+* попадание дня в серию - O(1) (Rule.occurs_on);
+* пересечение двух ежедневных или еженедельных серий - решение системы
+  сравнений по китайской теореме об остатках;
+* пересечение с ежемесячной серией - перебор ее повторений в общем
+  диапазоне (не больше двенадцати в год).
+
+Ежемесячные повторения приходятся на тот же день месяца, что и первая
+дата; месяцы без такого дня (например, 31-е число) пропускаются, как в
+RFC 5545.
+"""
+
+import calendar
+import heapq
+import math
+from collections.abc import Iterable, Iterator
+from datetime import date
+
+from app.model import Events as EventsModel
+from app.model import parse_date
+
+# Частоты повторения
+FREQ_DAILY = "daily"
+FREQ_WEEKLY = "weekly"
+FREQ_MONTHLY = "monthly"
+FREQUENCIES = (FREQ_DAILY, FREQ_WEEKLY, FREQ_MONTHLY)
+
+# Префикс ID правил; отличает их от числовых ID событий
+RULE_ID_PREFIX = "r"
+# Наибольшее число повторений в правиле (и с count, и с until)
+MAX_COUNT = 10_000
+# Последний допустимый день (9999-12-31)
+LAST_ORDINAL = date.max.toordinal()
+
+
+class RecurrenceError(ValueError):
+    """Исключение для неверного правила повторения."""
+
+
+def is_rule_id(_id: str) -> bool:
+    """Проверяет, является ли ID идентификатором правила повторения.
+
+    Args:
+        _id: ID события или правила
+
+    Returns:
+        bool: True для ID правила
+    """
+    return _id.startswith(RULE_ID_PREFIX)
+
+
+def _month_index(ordinal: int) -> tuple[int, int]:
+    """Возвращает номер месяца от начала эры и день месяца.
+
+    Args:
+        ordinal: Порядковый номер дня
+
+    Returns:
+        tuple[int, int]: Номер месяца (год * 12 + месяц - 1) и день месяца
+    """
+    day = date.fromordinal(ordinal)
+    return day.year * 12 + day.month - 1, day.day
+
+
+def _first_common_term(a: int, step_a: int, b: int, step_b: int, low: int) -> int:
+    """Находит наименьшее общее число двух арифметических прогрессий.
+
+    Решает систему x = a (mod step_a), x = b (mod step_b) и возвращает
+    наименьшее решение не меньше low.
+
+    Args:
+        a: Член первой прогрессии
+        step_a: Шаг первой прогрессии
+        b: Член второй прогрессии
+        step_b: Шаг второй прогрессии
+        low: Нижняя граница
+
+    Returns:
+        int: Общее число или None, если прогрессии не пересекаются
+    """
+    divisor = math.gcd(step_a, step_b)
+    if (b - a) % divisor:
+        return None
+    modulus = step_b // divisor
+    k = (b - a) // divisor * pow(step_a // divisor, -1, modulus) % modulus
+    period = step_a * modulus
+    return low + (a + k * step_a - low) % period
+
+
+class Rule:
+    """Правило повторения события.
+
+    Attributes:
+        id: ID правила (r<номер>)
+        title: Заголовок повторений
+        text: Текст повторений
+        freq: Частота (FREQ_DAILY, FREQ_WEEKLY или FREQ_MONTHLY)
+        interval: Интервал в единицах частоты (каждые N дней, недель,
+            месяцев)
+        first: Порядковый номер первой даты
+        last: Порядковый номер дня, после которого повторений нет
+        until: Порядковый номер конечной даты или None
+        count: Число повторений или None
+    """
+
+    __slots__ = (
+        "id", "title", "text", "freq", "interval", "first", "last", "until", "count"
+    )
+
+    def __init__(
+        self,
+        first: int,
+        freq: str,
+        interval: int = 1,
+        until: int = None,
+        count: int = None,
+        title: str = "",
+        text: str = "",
+    ) -> None:
+        """Создает правило и вычисляет конец серии.
+
+        Args:
+            first: Порядковый номер первой даты
+            freq: Частота повторения
+            interval: Интервал повторения
+            until: Порядковый номер конечной даты включительно или None
+            count: Число повторений или None
+            title: Заголовок
+            text: Текст
+
+        Raises:
+            RecurrenceError: При неверной частоте, интервале или конце
+                серии, а также для серии длиннее MAX_COUNT повторений
+        """
+        if freq not in FREQUENCIES:
+            raise RecurrenceError(
+                f"Неверная частота: {freq}. Ожидается одна из {', '.join(FREQUENCIES)}"
+            )
+        if not isinstance(interval, int) or interval < 1:
+            raise RecurrenceError(f"Неверный интервал: {interval}")
+        if until is None and count is None:
+            raise RecurrenceError("Не указан конец серии: until или count")
+        if until is not None and until < first:
+            raise RecurrenceError("Дата until раньше первой даты")
+        if count is not None and not (isinstance(count, int) and 0 < count <= MAX_COUNT):
+            raise RecurrenceError(f"Значение count должно быть от 1 до {MAX_COUNT}")
+        self.id = None
+        self.title = title
+        self.text = text
+        self.freq = freq
+        self.interval = interval
+        self.first = first
+        self.until = until
+        self.count = count
+        self.last = LAST_ORDINAL if until is None else until
+        if count is not None:
+            last = self._nth_occurrence(count)
+            if last is None and until is None:
+                raise RecurrenceError("Серия выходит за 9999-12-31")
+            if last is not None:
+                self.last = min(self.last, last)
+        if self.size > MAX_COUNT:
+            raise RecurrenceError(f"Серия длиннее {MAX_COUNT} повторений")
+
+    @property
+    def dates(self) -> str:
+        """Первая дата серии в формате YYYY-MM-DD."""
+        return date.fromordinal(self.first).isoformat()
+
+    @property
+    def step(self) -> int:
+        """Шаг ежедневной или еженедельной серии в днях."""
+        return self.interval * (7 if self.freq == FREQ_WEEKLY else 1)
+
+    @property
+    def size(self) -> int:
+        """Оценка сверху числа повторений серии."""
+        if self.freq != FREQ_MONTHLY:
+            return (self.last - self.first) // self.step + 1
+        months = _month_index(self.last)[0] - _month_index(self.first)[0]
+        return months // self.interval + 1
+
+    def occurs_on(self, day: int) -> bool:
+        """Проверяет за O(1), приходится ли повторение на день.
+
+        Args:
+            day: Порядковый номер дня
+
+        Returns:
+            bool: True если день входит в серию
+        """
+        if not self.first <= day <= self.last:
+            return False
+        if self.freq != FREQ_MONTHLY:
+            return (day - self.first) % self.step == 0
+        month, month_day = _month_index(day)
+        first_month, first_day = _month_index(self.first)
+        return month_day == first_day and (month - first_month) % self.interval == 0
+
+    def occurrences(self, start: int = None, end: int = None) -> Iterator[int]:
+        """Лениво перебирает повторения внутри диапазона.
+
+        Args:
+            start: Порядковый номер начала диапазона или None
+            end: Порядковый номер конца диапазона включительно или None
+
+        Yields:
+            int: Порядковый номер дня очередного повторения
+        """
+        low = self.first if start is None else max(start, self.first)
+        high = self.last if end is None else min(end, self.last)
+        if low > high:
+            return
+        if self.freq != FREQ_MONTHLY:
+            step = self.step
+            day = self.first + -(-(low - self.first) // step) * step
+            while day <= high:
+                yield day
+                day += step
+            return
+        first_month, first_day = _month_index(self.first)
+        skipped = -(-(_month_index(low)[0] - first_month) // self.interval)
+        month = first_month + skipped * self.interval
+        while True:
+            year, month_number = divmod(month, 12)
+            if year > 9999:
+                return
+            if first_day <= calendar.monthrange(year, month_number + 1)[1]:
+                day = date(year, month_number + 1, first_day).toordinal()
+                if day > high:
+                    return
+                if day >= low:
+                    yield day
+            month += self.interval
+
+    def _nth_occurrence(self, number: int) -> int:
+        """Находит повторение с заданным номером в пределах last.
+
+        Args:
+            number: Номер повторения, начиная с 1
+
+        Returns:
+            int: Порядковый номер дня или None, если серия заканчивается
+                раньше
+        """
+        if self.freq != FREQ_MONTHLY:
+            day = self.first + (number - 1) * self.step
+            return day if day <= self.last else None
+        for current, day in enumerate(self.occurrences(), 1):
+            if current == number:
+                return day
+        return None
+
+    def first_common_day(self, other: "Rule") -> int:
+        """Находит первый день, на который приходятся повторения обеих серий.
+
+        Args:
+            other: Другое правило
+
+        Returns:
+            int: Порядковый номер дня или None, если серии не пересекаются
+        """
+        low, high = max(self.first, other.first), min(self.last, other.last)
+        if low > high:
+            return None
+        if self.freq != FREQ_MONTHLY and other.freq != FREQ_MONTHLY:
+            day = _first_common_term(self.first, self.step, other.first, other.step, low)
+            return day if day is not None and day <= high else None
+        monthly, rest = (self, other) if self.freq == FREQ_MONTHLY else (other, self)
+        for day in monthly.occurrences(low, high):
+            if rest.occurs_on(day):
+                return day
+        return None
+
+    def month_mask(self, year: int, month: int) -> int:
+        """Возвращает маску дней месяца, занятых повторениями.
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 установлен, если на день d
+                приходится повторение
+        """
+        first = date(year, month, 1).toordinal()
+        last = first + calendar.monthrange(year, month)[1] - 1
+        mask = 0
+        for day in self.occurrences(first, last):
+            mask |= 1 << (day - first)
+        return mask
+
+    def month_counts(self) -> Iterator[tuple[tuple[int, int], int]]:
+        """Считает повторения по месяцам серии.
+
+        Для ежедневных и еженедельных серий число повторений в месяце
+        вычисляется арифметически, поэтому время пропорционально числу
+        месяцев, а не повторений.
+
+        Yields:
+            tuple: (год, месяц) и число повторений в нем
+        """
+        if self.freq == FREQ_MONTHLY:
+            for day in self.occurrences():
+                value = date.fromordinal(day)
+                yield (value.year, value.month), 1
+            return
+        step = self.step
+        value = date.fromordinal(self.first)
+        year, month = value.year, value.month
+        while True:
+            month_start = date(year, month, 1).toordinal()
+            if month_start > self.last:
+                return
+            low = max(month_start, self.first)
+            high = min(month_start + calendar.monthrange(year, month)[1] - 1, self.last)
+            count = (high - self.first) // step - -(-(low - self.first) // step) + 1
+            if count > 0:
+                yield (year, month), count
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            if year > 9999:
+                return
+
+    def make_event(self, day: int) -> EventsModel:
+        """Создает событие-повторение на заданный день.
+
+        Args:
+            day: Порядковый номер дня повторения
+
+        Returns:
+            EventsModel: Событие с ID правила
+        """
+        event = EventsModel()
+        event.id = self.id
+        event.dates = date.fromordinal(day).isoformat()
+        event.title = self.title
+        event.text = self.text
+        return event
+
+    def to_dict(self) -> dict:
+        """Преобразует правило в словарь для JSON и хранения.
+
+        Returns:
+            dict: Поля id, date, title, text, freq, interval, until, count
+        """
+        return {
+            "id": self.id,
+            "date": self.dates,
+            "title": self.title,
+            "text": self.text,
+            "freq": self.freq,
+            "interval": self.interval,
+            "until": None if self.until is None else date.fromordinal(self.until).isoformat(),
+            "count": self.count,
+        }
+
+    @classmethod
+    def from_dict(cls, item) -> "Rule":
+        """Создает правило из JSON объекта.
+
+        Args:
+            item: Объект с полями date, title, text, freq и необязательными
+                interval, until, count, id
+
+        Returns:
+            Rule: Правило
+
+        Raises:
+            RecurrenceError: Если объект не описывает корректное правило
+        """
+        if not isinstance(item, dict):
+            raise RecurrenceError("Ожидается JSON объект правила")
+        missing = [field for field in ("date", "title", "text", "freq") if field not in item]
+        if missing:
+            raise RecurrenceError(f"Нет полей: {', '.join(missing)}")
+        first = _parse_day(item["date"])
+        until = item.get("until")
+        rule = cls(
+            first,
+            item["freq"],
+            item.get("interval", 1),
+            None if until is None else _parse_day(until),
+            item.get("count"),
+            str(item["title"]),
+            str(item["text"]),
+        )
+        rule.id = item.get("id")
+        return rule
+
+
+def _parse_day(value) -> int:
+    """Разбирает дату правила.
+
+    Args:
+        value: Дата в формате YYYY-MM-DD
+
+    Returns:
+        int: Порядковый номер дня
+
+    Raises:
+        RecurrenceError: При неверном формате даты
+    """
+    day = parse_date(value) if isinstance(value, str) else None
+    if day is None:
+        raise RecurrenceError(f"Неверный формат даты: {value}. Ожидается YYYY-MM-DD")
+    return day
+
+
+class RuleSet:
+    """Набор правил повторения.
+
+    Правила меняются редко, поэтому словарь заменяется целиком при каждом
+    изменении (копирование при записи), а чтения идут без блокировок.
+    """
+
+    def __init__(self, rules: Iterable[Rule] = ()) -> None:
+        """Создает набор из сохраненных правил.
+
+        Args:
+            rules: Правила с заполненными ID
+        """
+        self._rules: dict[str, Rule] = {rule.id: rule for rule in rules}
+        self._last_id = max(
+            (int(_id[len(RULE_ID_PREFIX):]) for _id in self._rules), default=0
+        )
+
+    def __len__(self) -> int:
+        """Число правил."""
+        return len(self._rules)
+
+    def get(self, _id: str) -> Rule:
+        """Возвращает правило по ID или None."""
+        return self._rules.get(_id)
+
+    def values(self) -> list[Rule]:
+        """Возвращает правила в порядке создания."""
+        return list(self._rules.values())
+
+    def next_id(self) -> str:
+        """Выдает ID для нового правила; вызывается под блокировкой записи."""
+        self._last_id += 1
+        return f"{RULE_ID_PREFIX}{self._last_id}"
+
+    def add(self, rule: Rule) -> None:
+        """Добавляет правило; вызывается под блокировкой записи."""
+        self._rules = {**self._rules, rule.id: rule}
+
+    def remove(self, _id: str) -> None:
+        """Удаляет правило; вызывается под блокировкой записи."""
+        rules = dict(self._rules)
+        rules.pop(_id, None)
+        self._rules = rules
+
+    def owner_of(self, day: int) -> str:
+        """Возвращает ID правила, повторение которого приходится на день.
+
+        Args:
+            day: Порядковый номер дня
+
+        Returns:
+            str: ID правила или None
+        """
+        for rule in self._rules.values():
+            if rule.occurs_on(day):
+                return rule.id
+        return None
+
+    def conflict(self, rule: Rule) -> tuple[int, str]:
+        """Ищет пересечение нового правила с уже сохраненными.
+
+        Args:
+            rule: Новое правило
+
+        Returns:
+            tuple: День пересечения и ID правила или None
+        """
+        for other in self._rules.values():
+            day = rule.first_common_day(other)
+            if day is not None:
+                return day, other.id
+        return None
+
+    def occurrences(self, start: int = None, end: int = None) -> Iterator[EventsModel]:
+        """Лениво перебирает повторения всех правил в диапазоне по дате.
+
+        Args:
+            start: Порядковый номер начала диапазона или None
+            end: Порядковый номер конца диапазона включительно или None
+
+        Returns:
+            Iterator[EventsModel]: События-повторения по возрастанию даты
+        """
+        def expand(rule: Rule) -> Iterator[tuple[int, Rule]]:
+            for day in rule.occurrences(start, end):
+                yield day, rule
+
+        merged = heapq.merge(*(expand(rule) for rule in self._rules.values()),
+                             key=lambda item: item[0])
+        return (rule.make_event(day) for day, rule in merged)
+
+    def month_mask(self, year: int, month: int) -> int:
+        """Возвращает маску дней месяца, занятых повторениями правил.
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 соответствует дню d
+        """
+        mask = 0
+        for rule in self._rules.values():
+            mask |= rule.month_mask(year, month)
+        return mask
+
+    def counts(self) -> tuple[dict[int, int], dict[tuple[int, int], int]]:
+        """Считает повторения по годам и месяцам.
+
+        Ежедневные и еженедельные серии считаются по месяцам арифметически,
+        ежемесячные - перебором повторений (не больше MAX_COUNT).
+
+        Returns:
+            tuple: Словари год -> число повторений и (год, месяц) -> число
+        """
+        years: dict[int, int] = {}
+        months: dict[tuple[int, int], int] = {}
+        for rule in self._rules.values():
+            for key, count in rule.month_counts():
+                months[key] = months.get(key, 0) + count
+                years[key[0]] = years.get(key[0], 0) + count
+        return years, months
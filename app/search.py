@@ -0,0 +1,188 @@
+"""Полнотекстовый поиск по заголовкам и текстам событий.
+
+SearchIndex - инвертированный индекс: для каждого слова хранится множество
+ID событий, в заголовке или тексте которых оно встречается. Словарь слов
+дополнительно хранится отсортированным списком, поэтому все слова с
+заданным префиксом находятся бинарным поиском. Индекс обновляется
+инкрементально при создании, изменении и удалении событий.
+"""
+
+import re
+import threading
+from bisect import bisect_left, insort
+from collections.abc import Iterable
+
+from app.model import Events as EventsModel
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    """Разбивает текст на слова без учета регистра.
+
+    Args:
+        text: Текст
+
+    Returns:
+        list[str]: Слова в порядке появления
+    """
+    return _TOKEN_RE.findall(text.casefold())
+
+
+def event_tokens(event: EventsModel) -> set[str]:
+    """Возвращает множество слов заголовка и текста события.
+
+    Args:
+        event: Событие
+
+    Returns:
+        set[str]: Слова события
+    """
+    return set(tokenize(event.title)) | set(tokenize(event.text))
+
+
+def matches(title: str, text: str, query: str) -> bool:
+    """Проверяет, подходит ли событие под запрос, без индекса.
+
+    Семантика совпадает с SearchIndex.find: все слова запроса, кроме
+    последнего, должны встречаться целиком, последнее - как префикс.
+
+    Args:
+        title: Заголовок события
+        text: Текст события
+        query: Поисковый запрос
+
+    Returns:
+        bool: True если событие подходит
+    """
+    words = tokenize(query)
+    if not words:
+        return False
+    tokens = set(tokenize(title or "")) | set(tokenize(text or ""))
+    *exact, prefix = words
+    return all(word in tokens for word in exact) and any(
+        token.startswith(prefix) for token in tokens
+    )
+
+
+class SearchIndex:
+    """Инвертированный индекс слов событий с поиском по префиксу."""
+
+    def __init__(self, events: Iterable[EventsModel] = ()) -> None:
+        """Строит индекс по начальному набору событий.
+
+        Args:
+            events: События с заполненным ID
+        """
+        self._postings: dict[str, set[str]] = {}  # слово -> ID событий
+        for event in events:
+            for token in event_tokens(event):
+                self._postings.setdefault(token, set()).add(event.id)
+        self._tokens: list[str] = sorted(self._postings)  # словарь по алфавиту
+        self._lock = threading.Lock()
+
+    def add(self, event_id: str, event: EventsModel) -> None:
+        """Добавляет событие в индекс.
+
+        Args:
+            event_id: ID события
+            event: Событие
+        """
+        tokens = event_tokens(event)
+        with self._lock:
+            for token in tokens:
+                self._add_posting(token, event_id)
+
+    def replace(self, event_id: str, old_event: EventsModel, event: EventsModel) -> None:
+        """Обновляет индекс при изменении события.
+
+        Меняются только списки слов, которые появились или исчезли.
+
+        Args:
+            event_id: ID события
+            old_event: Прежнее состояние события
+            event: Новое состояние события
+        """
+        old_tokens = event_tokens(old_event)
+        tokens = event_tokens(event)
+        with self._lock:
+            for token in old_tokens - tokens:
+                self._remove_posting(token, event_id)
+            for token in tokens - old_tokens:
+                self._add_posting(token, event_id)
+
+    def remove(self, event_id: str, event: EventsModel) -> None:
+        """Удаляет событие из индекса.
+
+        Args:
+            event_id: ID события
+            event: Текущее состояние события
+        """
+        tokens = event_tokens(event)
+        with self._lock:
+            for token in tokens:
+                self._remove_posting(token, event_id)
+
+    def find(self, query: str) -> set[str]:
+        """Находит события, подходящие под запрос.
+
+        Все слова запроса, кроме последнего, должны встречаться в событии
+        целиком, последнее - как префикс слова. Множества пересекаются
+        начиная с самого маленького.
+
+        Args:
+            query: Поисковый запрос
+
+        Returns:
+            set[str]: ID подходящих событий; пустое множество, если в
+                запросе нет слов
+        """
+        words = tokenize(query)
+        if not words:
+            return set()
+        *exact, prefix = words
+        with self._lock:
+            postings = [self._postings.get(word, ()) for word in set(exact)]
+            matched = set()
+            pos = bisect_left(self._tokens, prefix)
+            while pos < len(self._tokens) and self._tokens[pos].startswith(prefix):
+                matched |= self._postings[self._tokens[pos]]
+                pos += 1
+            postings.append(matched)
+            postings.sort(key=len)
+            result = set(postings[0])
+            for posting in postings[1:]:
+                if not result:
+                    break
+                result.intersection_update(posting)
+        return result
+
+    def _add_posting(self, token: str, event_id: str) -> None:
+        """Добавляет ID события в список слова; вызывается под блокировкой.
+
+        Args:
+            token: Слово
+            event_id: ID события
+        """
+        posting = self._postings.get(token)
+        if posting is None:
+            posting = self._postings[token] = set()
+            insort(self._tokens, token)
+        posting.add(event_id)
+
+    def _remove_posting(self, token: str, event_id: str) -> None:
+        """Удаляет ID события из списка слова; вызывается под блокировкой.
+
+        Args:
+            token: Слово
+            event_id: ID события
+        """
+        posting = self._postings.get(token)
+        if posting is None:
+            return
+        posting.discard(event_id)
+        if not posting:
+            del self._postings[token]
+            pos = bisect_left(self._tokens, token)
+            if pos < len(self._tokens) and self._tokens[pos] == token:
+                del self._tokens[pos]
@@ -0,0 +1,130 @@
+"""Двоичный снимок хранилища событий для резервного копирования и переноса.
+
+Снимок - один файл: заголовок (сигнатура, последний выданный ID, число
+событий и размер правил), правила повторения в JSON и события в двоичном
+формате formats (записи с префиксами длины) по возрастанию даты. Файл
+читается через mmap: записи разбираются прямо из отображенной памяти без
+чтения файла целиком, а порядок по датам позволяет восстановить индексы
+хранилища за один проход без сортировки.
+"""
+
+import mmap
+import struct
+from collections.abc import Iterable, Iterator
+from typing import BinaryIO
+
+import app.formats as formats
+from app.model import Events as EventsModel
+
+# Сигнатура и версия формата
+MAGIC = b"CALSNAP1"
+# Заголовок: сигнатура, последний выданный ID, число событий, размер правил
+HEADER = struct.Struct("<8sQQI")
+# Тип содержимого снимка в API
+MIMETYPE = "application/x-calendar-snapshot"
+
+
+class SnapshotError(ValueError):
+    """Исключение для поврежденного или несовместимого снимка."""
+
+
+def write(
+    file: BinaryIO,
+    events: Iterable[EventsModel],
+    count: int,
+    last_id: int,
+    rules: list[dict],
+) -> None:
+    """Записывает снимок в файл.
+
+    Args:
+        file: Файл, открытый на запись в двоичном режиме
+        events: События по возрастанию даты
+        count: Число событий
+        last_id: Последний выданный ID
+        rules: Правила повторения (Rule.to_dict)
+    """
+    rules_data = formats.dumps_json(rules)
+    file.write(HEADER.pack(MAGIC, last_id, count, len(rules_data)))
+    file.write(rules_data)
+    for chunk in formats.encode_stream(events, formats.BINARY, chunk_size=4096):
+        file.write(chunk)
+
+
+class Snapshot:
+    """Снимок, открытый на чтение через mmap.
+
+    Используется как контекстный менеджер; события можно перебирать,
+    пока снимок открыт.
+    """
+
+    def __init__(self, path: str) -> None:
+        """Открывает снимок и читает заголовок.
+
+        Args:
+            path: Путь к файлу снимка
+
+        Raises:
+            SnapshotError: Если файл не является снимком
+        """
+        with open(path, "rb") as file:
+            size = file.seek(0, 2)
+            if size < HEADER.size:
+                raise SnapshotError("Файл меньше заголовка снимка")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, self.last_id, self.count, rules_size = HEADER.unpack_from(self._map)
+            if magic != MAGIC:
+                raise SnapshotError("Неверная сигнатура снимка")
+            self._events_offset = HEADER.size + rules_size
+            if self._events_offset > size:
+                raise SnapshotError("Обрезанный снимок")
+            try:
+                self.rules = formats.loads_json(self._map[HEADER.size:self._events_offset])
+            except formats.FormatError as ex:
+                raise SnapshotError(f"Неверные правила: {ex}") from None
+            if not isinstance(self.rules, list):
+                raise SnapshotError("Правила снимка должны быть списком")
+        except BaseException:
+            self._map.close()
+            raise
+
+    def events(self) -> Iterator[EventsModel]:
+        """Перебирает события снимка по возрастанию даты.
+
+        Yields:
+            EventsModel: Очередное событие
+
+        Raises:
+            SnapshotError: При поврежденной записи или несовпадении числа
+                событий с заголовком
+        """
+        count = 0
+        try:
+            for event in formats.decode_stream(self._map, self._events_offset):
+                count += 1
+                yield event
+        except formats.FormatError as ex:
+            raise SnapshotError(f"Поврежденный снимок: {ex}") from None
+        if count != self.count:
+            raise SnapshotError(f"В снимке {count} событий, в заголовке {self.count}")
+
+    def close(self) -> None:
+        """Освобождает отображение файла."""
+        self._map.close()
+
+    def __enter__(self) -> "Snapshot":
+        """Возвращает открытый снимок.
+
+        Returns:
+            Snapshot: Этот снимок
+        """
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Закрывает снимок.
+
+        Args:
+            *exc_info: Информация об исключении
+        """
+        self.close()
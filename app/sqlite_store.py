@@ -0,0 +1,972 @@
+"""Общее хранилище событий в SQLite для многопроцессного развертывания.
+
+SQLiteEventsLogic реализует тот же интерфейс, что и EventsLogic, но хранит
+события в файле базы SQLite в режиме WAL. Уникальность даты обеспечивается
+ограничением UNIQUE, поэтому правило "одно событие в день" соблюдается
+сразу для всех процессов (например, воркеров gunicorn), работающих с одним
+файлом.
+"""
+
+import heapq
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import date
+from operator import attrgetter
+
+import app.changes as changes
+import app.occupancy as occupancy
+import app.recurrence as recurrence
+import app.search as search
+from app.logic import BatchError, DateConflictError
+from app.model import Events as EventsModel
+from app.model import parse_date
+from app.persistence import OP_CREATE, OP_DELETE, OP_UPDATE
+
+# Количество строк, читаемых одним запросом при переборе
+FETCH_SIZE = 512
+# Интервал проверки изменений других процессов при ожидании, в секундах
+CHANGES_POLL_INTERVAL = 0.5
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    date TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    text TEXT NOT NULL
+);
+"""
+
+# Версия хранилища общая для всех процессов: ее увеличивают триггеры,
+# а эпоха создается один раз вместе с базой
+_NOW = "(julianday('now') - 2440587.5) * 86400.0"
+_VERSION_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS state (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    epoch TEXT NOT NULL,
+    version INTEGER NOT NULL,
+    modified REAL NOT NULL
+);
+INSERT OR IGNORE INTO state (id, epoch, version, modified)
+VALUES (1, lower(hex(randomblob(8))), 0, {_NOW});
+CREATE TRIGGER IF NOT EXISTS events_version_insert AFTER INSERT ON events BEGIN
+    UPDATE state SET version = version + 1, modified = {_NOW};
+    UPDATE events SET version = (SELECT version FROM state) WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS events_version_update
+AFTER UPDATE OF date, title, text ON events BEGIN
+    UPDATE state SET version = version + 1, modified = {_NOW};
+    UPDATE events SET version = (SELECT version FROM state) WHERE id = NEW.id;
+END;
+CREATE TRIGGER IF NOT EXISTS events_version_delete AFTER DELETE ON events BEGIN
+    UPDATE state SET version = version + 1, modified = {_NOW};
+END;
+"""
+
+# Маски занятых дней по месяцам поддерживаются триггерами, как и версии;
+# бит d-1 маски соответствует дню d месяца YYYY-MM
+_DAY_BIT = "(1 << (CAST(substr({0}.date, 9, 2) AS INTEGER) - 1))"
+_MONTHS_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS months (
+    month TEXT PRIMARY KEY,
+    days INTEGER NOT NULL,
+    count INTEGER NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS events_months_insert AFTER INSERT ON events BEGIN
+    INSERT INTO months VALUES (substr(NEW.date, 1, 7), {_DAY_BIT.format("NEW")}, 1)
+    ON CONFLICT (month) DO UPDATE SET days = days | excluded.days, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS events_months_update
+AFTER UPDATE OF date ON events WHEN OLD.date != NEW.date BEGIN
+    UPDATE months SET days = days & ~{_DAY_BIT.format("OLD")}, count = count - 1
+    WHERE month = substr(OLD.date, 1, 7);
+    DELETE FROM months WHERE month = substr(OLD.date, 1, 7) AND count = 0;
+    INSERT INTO months VALUES (substr(NEW.date, 1, 7), {_DAY_BIT.format("NEW")}, 1)
+    ON CONFLICT (month) DO UPDATE SET days = days | excluded.days, count = count + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS events_months_delete AFTER DELETE ON events BEGIN
+    UPDATE months SET days = days & ~{_DAY_BIT.format("OLD")}, count = count - 1
+    WHERE month = substr(OLD.date, 1, 7);
+    DELETE FROM months WHERE month = substr(OLD.date, 1, 7) AND count = 0;
+END;
+INSERT OR IGNORE INTO months
+SELECT substr(date, 1, 7), SUM({_DAY_BIT.format("events")}), COUNT(*)
+FROM events GROUP BY substr(date, 1, 7);
+"""
+
+# Журнал изменений: триггеры добавляют строку на каждое изменение и удаляют
+# строки старше последних CHANGE_LOG_SIZE; номер изменения (seq) общий для
+# всех процессов
+_CHANGES_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id INTEGER NOT NULL,
+    op TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS events_changes_insert AFTER INSERT ON events BEGIN
+    INSERT INTO changes (event_id, op) VALUES (NEW.id, '{changes.OP_PUT}');
+    DELETE FROM changes
+    WHERE seq <= last_insert_rowid() - {changes.CHANGE_LOG_SIZE};
+END;
+CREATE TRIGGER IF NOT EXISTS events_changes_update
+AFTER UPDATE OF date, title, text ON events BEGIN
+    INSERT INTO changes (event_id, op) VALUES (NEW.id, '{changes.OP_PUT}');
+    DELETE FROM changes
+    WHERE seq <= last_insert_rowid() - {changes.CHANGE_LOG_SIZE};
+END;
+CREATE TRIGGER IF NOT EXISTS events_changes_delete AFTER DELETE ON events BEGIN
+    INSERT INTO changes (event_id, op) VALUES (OLD.id, '{changes.OP_DELETE}');
+    DELETE FROM changes
+    WHERE seq <= last_insert_rowid() - {changes.CHANGE_LOG_SIZE};
+END;
+"""
+
+# Правила повторения: строка на правило (Rule.to_dict без ID, ID правила -
+# r<id>). Изменения правил увеличивают версию хранилища и попадают в журнал
+# изменений, а rules_version в state позволяет процессам держать правила в
+# памяти и перечитывать их только после изменения
+_RULES_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS rules (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    data TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS rules_insert AFTER INSERT ON rules BEGIN
+    UPDATE state SET version = version + 1, modified = {_NOW},
+        rules_version = version + 1;
+    INSERT INTO changes (event_id, op)
+    VALUES ('{recurrence.RULE_ID_PREFIX}' || NEW.id, '{changes.OP_PUT}');
+    DELETE FROM changes
+    WHERE seq <= last_insert_rowid() - {changes.CHANGE_LOG_SIZE};
+END;
+CREATE TRIGGER IF NOT EXISTS rules_delete AFTER DELETE ON rules BEGIN
+    UPDATE state SET version = version + 1, modified = {_NOW},
+        rules_version = version + 1;
+    INSERT INTO changes (event_id, op)
+    VALUES ('{recurrence.RULE_ID_PREFIX}' || OLD.id, '{changes.OP_DELETE}');
+    DELETE FROM changes
+    WHERE seq <= last_insert_rowid() - {changes.CHANGE_LOG_SIZE};
+END;
+"""
+
+
+class SQLiteEventsLogic:
+    """Бизнес-логика событий поверх общей базы SQLite.
+
+    Соединение открывается лениво отдельно для каждого потока и процесса,
+    поэтому объект можно создать до fork() в мастер-процессе.
+    """
+
+    def __init__(self, path: str, timeout: float = 30.0) -> None:
+        """Инициализирует хранилище.
+
+        Args:
+            path: Путь к файлу базы данных
+            timeout: Время ожидания блокировки записи в секундах
+        """
+        self._path = path
+        self._timeout = timeout
+        self._local = threading.local()
+        self._listeners: list[Callable[[str], None]] = []
+        # Будит ожидающих изменений при записи в этом процессе
+        self._changed = threading.Condition()
+        # Правила повторения процесса и rules_version, с которой они прочитаны
+        self._rules: tuple[int, recurrence.RuleSet] = (-1, recurrence.RuleSet())
+        # Соединение для создания схемы закрывается сразу, чтобы не
+        # передавать его дочерним процессам при fork()
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(events)")}
+            if "version" not in columns:
+                # База, созданная до появления версий событий
+                conn.execute(
+                    "ALTER TABLE events ADD COLUMN version INTEGER NOT NULL DEFAULT 0"
+                )
+            conn.executescript(_VERSION_SCHEMA)
+            # Таблица и заполнение по существующим событиям создаются в одной
+            # транзакции, чтобы не пропустить изменения других процессов
+            conn.executescript(f"BEGIN IMMEDIATE; {_MONTHS_SCHEMA} COMMIT;")
+            conn.executescript(_CHANGES_SCHEMA)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(state)")}
+            if "rules_version" not in columns:
+                conn.execute(
+                    "ALTER TABLE state ADD COLUMN rules_version INTEGER NOT NULL DEFAULT 0"
+                )
+            conn.executescript(_RULES_SCHEMA)
+        finally:
+            conn.close()
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """Подписывает обработчик на изменения событий в этом процессе.
+
+        Изменения, сделанные другими процессами, обработчику не передаются;
+        их можно обнаружить по росту version.
+
+        Args:
+            listener: Функция, принимающая ID измененного события
+        """
+        self._listeners.append(listener)
+
+    @property
+    def version(self) -> int:
+        """Текущая версия хранилища; растет при каждом изменении."""
+        return self._state()[1]
+
+    @property
+    def epoch(self) -> str:
+        """Идентификатор базы, отличающий версии разных баз."""
+        return self._state()[0]
+
+    @property
+    def last_modified(self) -> float:
+        """Время последнего изменения хранилища (Unix time)."""
+        return self._state()[2]
+
+    @property
+    def change_seq(self) -> int:
+        """Номер последнего изменения в журнале изменений."""
+        row = self._conn().execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'changes'"
+        ).fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, seq: int, limit: int = None) -> list[tuple[int, str, str]]:
+        """Возвращает изменения событий после заданного номера.
+
+        Изменения, сделанные до появления таблицы changes в базе, в
+        журнал не попадают.
+
+        Args:
+            seq: Номер последнего известного клиенту изменения
+            limit: Максимальное число изменений или None
+
+        Returns:
+            list[tuple[int, str, str]]: Кортежи (номер, ID события, вид
+                изменения) по возрастанию номера
+
+        Raises:
+            ChangesExpiredError: Если изменения после seq уже удалены из
+                журнала
+        """
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            last, first = conn.execute(
+                "SELECT (SELECT seq FROM sqlite_sequence WHERE name = 'changes'), "
+                "(SELECT MIN(seq) FROM changes)"
+            ).fetchone()
+            rows = conn.execute(
+                "SELECT seq, event_id, op FROM changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                (seq, -1 if limit is None else limit),
+            ).fetchall()
+        finally:
+            conn.execute("COMMIT")
+        last = last or 0
+        oldest = last if first is None else first - 1
+        if not oldest <= seq <= last:
+            raise changes.ChangesExpiredError(
+                f"Изменения после {seq} недоступны, доступны после {oldest}-{last}"
+            )
+        return [(row_seq, str(event_id), op) for row_seq, event_id, op in rows]
+
+    def wait_for_changes(self, seq: int, timeout: float) -> bool:
+        """Ждет изменения с номером больше seq.
+
+        Записи этого процесса будят ожидающих сразу, изменения других
+        процессов обнаруживаются проверкой раз в CHANGES_POLL_INTERVAL.
+
+        Args:
+            seq: Номер последнего известного клиенту изменения
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            bool: True если такое изменение есть
+        """
+        deadline = time.monotonic() + timeout
+        while self.change_seq <= seq:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            with self._changed:
+                self._changed.wait(min(remaining, CHANGES_POLL_INTERVAL))
+        return True
+
+    def event_version(self, _id: str) -> int:
+        """Возвращает версию события.
+
+        Args:
+            _id: ID события
+
+        Returns:
+            int: Версия хранилища при последнем изменении события или None,
+                если события нет
+        """
+        row = self._conn().execute(
+            "SELECT version FROM events WHERE id = ?", (_id,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def create(self, event: EventsModel) -> str:
+        """Создает новое событие с валидацией данных.
+
+        Args:
+            event: Объект EventsModel для создания
+
+        Returns:
+            str: ID созданного события
+
+        Raises:
+            ValueError: При неверном формате даты или конфликте дат
+        """
+        _check_date(event.dates)
+        try:
+            with self._transaction() as conn:
+                self._check_rules(conn, event.dates)
+                cursor = conn.execute(
+                    "INSERT INTO events (date, title, text) VALUES (?, ?, ?)",
+                    (event.dates, event.title, event.text),
+                )
+        except sqlite3.IntegrityError as ex:
+            raise self._conflict(event.dates) from ex
+        event.id = str(cursor.lastrowid)
+        self._notify(event.id)
+        return event.id
+
+    def list_events(self) -> list[EventsModel]:
+        """Возвращает список всех событий.
+
+        Returns:
+            List[EventsModel]: Список всех объектов событий
+        """
+        return list(self.iter_events())
+
+    def count(self) -> int:
+        """Возвращает число событий в базе.
+
+        Returns:
+            int: Число событий
+        """
+        return self._conn().execute("SELECT COUNT(*) FROM events").fetchone()[0]
+
+    def month_bitmap(self, year: int, month: int) -> int:
+        """Возвращает маску занятых дней месяца из таблицы months и правил.
+
+        Args:
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 установлен, если день d занят
+
+        Raises:
+            ValueError: При неверном годе или месяце
+        """
+        occupancy.check_month(year, month)
+        return self._month_mask(self._rule_set(), year, month)
+
+    def occupancy_counts(self) -> tuple[dict[int, int], dict[tuple[int, int], int]]:
+        """Возвращает число занятых дней по годам и по месяцам.
+
+        Повторения правил считаются перебором, поэтому время зависит от их
+        числа.
+
+        Returns:
+            tuple: Словари год -> число дней и (год, месяц) -> число дней
+        """
+        rules = self._rule_set()
+        months = {
+            (int(month[:4]), int(month[5:])): count
+            for month, count in self._conn().execute("SELECT month, count FROM months")
+        }
+        if len(rules):
+            for key, count in rules.counts()[1].items():
+                months[key] = months.get(key, 0) + count
+        years: dict[int, int] = {}
+        for (year, _), count in months.items():
+            years[year] = years.get(year, 0) + count
+        return years, months
+
+    def free_days(self, start: str, count: int, end: str = None) -> list[str]:
+        """Находит первые свободные дни по маскам таблицы months.
+
+        Args:
+            start: Первая проверяемая дата в формате YYYY-MM-DD
+            count: Максимальное число дат в ответе
+            end: Последняя проверяемая дата в формате YYYY-MM-DD или None
+
+        Returns:
+            list[str]: Свободные даты в формате YYYY-MM-DD по возрастанию
+
+        Raises:
+            ValueError: При неверном формате даты или count
+        """
+        if count <= 0:
+            raise ValueError(f"Неверное число дней: {count}")
+        _check_date(start)
+        if end is not None:
+            _check_date(end)
+        rules = self._rule_set()
+        days = occupancy.free_days(
+            lambda year, month: self._month_mask(rules, year, month),
+            parse_date(start), count,
+            None if end is None else parse_date(end),
+        )
+        return [date.fromordinal(day).isoformat() for day in days]
+
+    def create_rule(self, rule: recurrence.Rule) -> str:
+        """Создает правило повторения в транзакции записи.
+
+        Пересечение с событиями проверяется по маскам таблицы months в
+        диапазоне серии, а с другими правилами - арифметически; правила
+        читаются в той же транзакции, поэтому проверка действует для всех
+        процессов.
+
+        Args:
+            rule: Новое правило
+
+        Returns:
+            str: ID созданного правила
+
+        Raises:
+            DateConflictError: Если повторение приходится на занятую дату
+        """
+        with self._transaction() as conn:
+            first, last = date.fromordinal(rule.first), date.fromordinal(rule.last)
+            months = conn.execute(
+                "SELECT month, days FROM months WHERE month BETWEEN ? AND ? ORDER BY month",
+                (f"{first.year:04d}-{first.month:02d}", f"{last.year:04d}-{last.month:02d}"),
+            ).fetchall()
+            for month, days in months:
+                taken = days & rule.month_mask(int(month[:4]), int(month[5:]))
+                if taken:
+                    day = (taken & -taken).bit_length()
+                    raise self._conflict(f"{month}-{day:02d}")
+            conflict = self._rule_set(conn).conflict(rule)
+            if conflict is not None:
+                raise self._conflict(date.fromordinal(conflict[0]).isoformat())
+            data = rule.to_dict()
+            del data["id"]
+            cursor = conn.execute(
+                "INSERT INTO rules (data) VALUES (?)",
+                (json.dumps(data, ensure_ascii=False),),
+            )
+            rule.id = f"{recurrence.RULE_ID_PREFIX}{cursor.lastrowid}"
+        self._notify(rule.id)
+        return rule.id
+
+    def read_rule(self, _id: str) -> recurrence.Rule:
+        """Возвращает правило повторения по ID.
+
+        Args:
+            _id: ID правила
+
+        Returns:
+            recurrence.Rule: Правило или None
+        """
+        return self._rule_set().get(_id)
+
+    def list_rules(self) -> list[recurrence.Rule]:
+        """Возвращает все правила повторения в порядке создания.
+
+        Returns:
+            list[recurrence.Rule]: Правила
+        """
+        return self._rule_set().values()
+
+    def delete_rule(self, _id: str) -> None:
+        """Удаляет правило повторения вместе со всеми повторениями.
+
+        Args:
+            _id: ID правила
+        """
+        number = _id[len(recurrence.RULE_ID_PREFIX):]
+        if not recurrence.is_rule_id(_id) or not number.isdigit():
+            return
+        if self._conn().execute(
+            "DELETE FROM rules WHERE id = ?", (int(number),)
+        ).rowcount:
+            self._notify(_id)
+
+    def iter_events(self, cursor: str = None) -> Iterator[EventsModel]:
+        """Лениво перебирает события порциями по FETCH_SIZE.
+
+        Args:
+            cursor: ID последнего полученного события
+
+        Returns:
+            Iterator[EventsModel]: Итератор по событиям в порядке создания
+
+        Raises:
+            ValueError: При неверном значении курсора
+        """
+        after = 0 if cursor is None else int(cursor)
+        return self._iter_keyset("id", after)
+
+    def read(self, _id: str) -> EventsModel:
+        """Возвращает событие по ID.
+
+        Args:
+            _id: ID события для поиска
+
+        Returns:
+            EventsModel: Найденное событие или None
+        """
+        row = self._conn().execute(
+            "SELECT id, date, title, text FROM events WHERE id = ?", (_id,)
+        ).fetchone()
+        return _from_row(row) if row else None
+
+    def read_by_date(self, date_str: str) -> EventsModel:
+        """Получить событие по дате.
+
+        Args:
+            date_str: Дата в формате YYYY-MM-DD
+
+        Returns:
+            EventsModel: Событие на указанную дату или None
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        _check_date(date_str)
+        row = self._conn().execute(
+            "SELECT id, date, title, text FROM events WHERE date = ?", (date_str,)
+        ).fetchone()
+        if row:
+            return _from_row(row)
+        rules = self._rule_set()
+        day = parse_date(date_str)
+        rule_id = rules.owner_of(day)
+        return None if rule_id is None else rules.get(rule_id).make_event(day)
+
+    def read_range(self, start: str = None, end: str = None) -> list[EventsModel]:
+        """Возвращает события в диапазоне дат включительно.
+
+        Args:
+            start: Начальная дата в формате YYYY-MM-DD или None
+            end: Конечная дата в формате YYYY-MM-DD или None
+
+        Returns:
+            List[EventsModel]: События, упорядоченные по дате
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        return list(self.iter_range(start, end))
+
+    def search(
+        self, query: str, start: str = None, end: str = None, limit: int = None
+    ) -> list[EventsModel]:
+        """Ищет события по словам заголовка и текста.
+
+        Инвертированного индекса в базе нет: строки в диапазоне дат
+        проверяются функцией search_match с той же семантикой, что и
+        в EventsLogic.search, поэтому время поиска растет с размером
+        диапазона.
+
+        Args:
+            query: Поисковый запрос
+            start: Начальная дата в формате YYYY-MM-DD или None
+            end: Конечная дата в формате YYYY-MM-DD или None
+            limit: Максимальное число событий или None
+
+        Returns:
+            List[EventsModel]: Найденные события, упорядоченные по дате
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        sql = "SELECT id, date, title, text FROM events WHERE search_match(title, text, ?)"
+        params: list = [query]
+        if start is not None:
+            _check_date(start)
+            sql += " AND date >= ?"
+            params.append(start)
+        if end is not None:
+            _check_date(end)
+            sql += " AND date <= ?"
+            params.append(end)
+        if not search.tokenize(query):
+            return []
+        sql += " ORDER BY date"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [_from_row(row) for row in self._conn().execute(sql, params)]
+
+    def iter_range(
+        self, start: str = None, end: str = None, cursor: str = None
+    ) -> Iterator[EventsModel]:
+        """Лениво перебирает события в диапазоне дат по индексу UNIQUE(date).
+
+        Повторения правил вычисляются только внутри диапазона и
+        сливаются с событиями по дате.
+
+        Args:
+            start: Начальная дата в формате YYYY-MM-DD или None
+            end: Конечная дата в формате YYYY-MM-DD или None
+            cursor: Дата последнего полученного события
+
+        Returns:
+            Iterator[EventsModel]: Итератор по событиям, упорядоченным по дате
+
+        Raises:
+            ValueError: При неверном формате даты
+        """
+        for date_str in (start, end, cursor):
+            if date_str is not None:
+                _check_date(date_str)
+        if cursor is not None and (start is None or cursor >= start):
+            events = self._iter_keyset("date", cursor, upper=end)
+            low = parse_date(cursor) + 1
+        else:
+            # Пустая строка меньше любой даты
+            events = self._iter_keyset("date", start or "", inclusive=True, upper=end)
+            low = None if start is None else parse_date(start)
+        rules = self._rule_set()
+        if not len(rules):
+            return events
+        return heapq.merge(
+            events,
+            rules.occurrences(low, None if end is None else parse_date(end)),
+            key=attrgetter("ordinal"),
+        )
+
+    def update(self, _id: str, event: EventsModel) -> None:
+        """Обновляет существующее событие.
+
+        Args:
+            _id: ID события для обновления
+            event: Объект EventsModel с новыми данными
+
+        Raises:
+            ValueError: Если событие не найдено, неверный формат даты
+                или дата занята другим событием
+        """
+        _check_date(event.dates)
+        try:
+            with self._transaction() as conn:
+                self._check_rules(conn, event.dates)
+                cursor = conn.execute(
+                    "UPDATE events SET date = ?, title = ?, text = ? WHERE id = ?",
+                    (event.dates, event.title, event.text, _id),
+                )
+        except sqlite3.IntegrityError as ex:
+            raise self._conflict(event.dates) from ex
+        if cursor.rowcount == 0:
+            raise ValueError("Событие не найдено")
+        event.id = _id
+        self._notify(_id)
+
+    def delete(self, _id: str) -> None:
+        """Удаляет событие по ID.
+
+        Args:
+            _id: ID события для удаления
+        """
+        if self._conn().execute(
+            "DELETE FROM events WHERE id = ?", (_id,)
+        ).rowcount:
+            self._notify(_id)
+
+    def apply_batch(
+        self, operations: list[tuple[str, str, EventsModel]]
+    ) -> list[str]:
+        """Атомарно применяет пакет операций в одной транзакции.
+
+        Конфликты дат внутри пакета обнаруживаются ограничением UNIQUE по
+        мере выполнения операций, а с повторениями правил - по правилам,
+        прочитанным в той же транзакции; при любой ошибке транзакция
+        откатывается.
+
+        Args:
+            operations: Список кортежей (код операции, ID, событие); для
+                создания ID равен None, для удаления событие равно None
+
+        Returns:
+            list[str]: ID затронутого события для каждой операции
+
+        Raises:
+            BatchError: Если хотя бы одна операция пакета некорректна
+        """
+        conn = self._conn()
+        errors, results = [], []
+        created: dict[str, int] = {}  # date -> номер создавшей записи пакета
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rules = self._rule_set(conn)
+            for number, (op, _id, event) in enumerate(operations, 1):
+                error = None
+                try:
+                    if op == OP_DELETE:
+                        conn.execute("DELETE FROM events WHERE id = ?", (_id,))
+                    elif op not in (OP_CREATE, OP_UPDATE):
+                        error = f"Неизвестная операция: {op}"
+                    elif not EventsModel.validate_date(event.dates):
+                        error = (
+                            f"Неверный формат даты: {event.dates}. Ожидается YYYY-MM-DD"
+                        )
+                    elif rules.owner_of(parse_date(event.dates)) is not None:
+                        error = str(self._conflict(event.dates))
+                    elif op == OP_CREATE:
+                        _id = str(conn.execute(
+                            "INSERT INTO events (date, title, text) VALUES (?, ?, ?)",
+                            (event.dates, event.title, event.text),
+                        ).lastrowid)
+                        created[event.dates] = number
+                    elif conn.execute(
+                        "UPDATE events SET date = ?, title = ?, text = ? WHERE id = ?",
+                        (event.dates, event.title, event.text, _id),
+                    ).rowcount == 0:
+                        error = "Событие не найдено"
+                except sqlite3.IntegrityError:
+                    if event.dates in created:
+                        error = (
+                            f"Дата {event.dates} уже занята записью "
+                            f"{created[event.dates]} пакета"
+                        )
+                    else:
+                        error = str(self._conflict(event.dates))
+                errors.append(error)
+                results.append(_id)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if any(errors):
+            conn.execute("ROLLBACK")
+            raise BatchError(errors)
+        conn.execute("COMMIT")
+        for (_, _, event), _id in zip(operations, results):
+            if event is not None:
+                event.id = _id
+            self._notify(_id)
+        return results
+
+    def is_date_available(self, date_str: str, exclude_event_id: str = None) -> bool:
+        """Проверяет, доступна ли дата для создания события.
+
+        Args:
+            date_str: Дата для проверки
+            exclude_event_id: ID события, которое следует исключить из проверки
+
+        Returns:
+            bool: True если дата доступна, иначе False
+        """
+        if not EventsModel.validate_date(date_str):
+            return False
+        event = self.read_by_date(date_str)
+        return event is None or event.id == exclude_event_id
+
+    def close(self) -> None:
+        """Закрывает соединение текущего потока."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def _connect(self) -> sqlite3.Connection:
+        """Открывает новое соединение в режиме автокоммита.
+
+        Returns:
+            sqlite3.Connection: Соединение с базой
+        """
+        conn = sqlite3.connect(
+            self._path, timeout=self._timeout, isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.create_function("search_match", 3, search.matches, deterministic=True)
+        return conn
+
+    def _conn(self) -> sqlite3.Connection:
+        """Возвращает соединение текущего потока в текущем процессе.
+
+        Соединения, унаследованные через fork(), не используются.
+
+        Returns:
+            sqlite3.Connection: Соединение с базой
+        """
+        local = self._local
+        if getattr(local, "conn", None) is None or local.pid != os.getpid():
+            local.conn = self._connect()
+            local.pid = os.getpid()
+        return local.conn
+
+    def _notify(self, _id: str) -> None:
+        """Уведомляет подписчиков и ожидающих изменений об изменении события.
+
+        Args:
+            _id: ID измененного события
+        """
+        for listener in self._listeners:
+            listener(_id)
+        with self._changed:
+            self._changed.notify_all()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """Выполняет блок в транзакции записи соединения текущего потока.
+
+        Транзакция откатывается при любом исключении блока.
+
+        Yields:
+            sqlite3.Connection: Соединение в открытой транзакции
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _rule_set(self, conn: sqlite3.Connection = None) -> recurrence.RuleSet:
+        """Возвращает правила повторения, перечитывая их после изменения.
+
+        Правила кэшируются в процессе до изменения rules_version, поэтому
+        обычно чтение стоит одного запроса к state.
+
+        Args:
+            conn: Соединение (в транзакции записи) или None для соединения
+                текущего потока
+
+        Returns:
+            recurrence.RuleSet: Правила
+        """
+        conn = conn or self._conn()
+        version = conn.execute("SELECT rules_version FROM state").fetchone()[0]
+        cached_version, rules = self._rules
+        if cached_version != version:
+            loaded = []
+            for row_id, data in conn.execute("SELECT id, data FROM rules ORDER BY id"):
+                rule = recurrence.Rule.from_dict(json.loads(data))
+                rule.id = f"{recurrence.RULE_ID_PREFIX}{row_id}"
+                loaded.append(rule)
+            rules = recurrence.RuleSet(loaded)
+            self._rules = (version, rules)
+        return rules
+
+    def _check_rules(self, conn: sqlite3.Connection, date_str: str) -> None:
+        """Проверяет, что дата не занята повторением правила.
+
+        Args:
+            conn: Соединение в транзакции записи
+            date_str: Дата в формате YYYY-MM-DD
+
+        Raises:
+            DateConflictError: Если на дату приходится повторение
+        """
+        if self._rule_set(conn).owner_of(parse_date(date_str)) is not None:
+            raise self._conflict(date_str)
+
+    def _month_mask(self, rules: recurrence.RuleSet, year: int, month: int) -> int:
+        """Возвращает маску дней месяца, занятых событиями и повторениями.
+
+        Args:
+            rules: Правила повторения
+            year: Год
+            month: Месяц (1-12)
+
+        Returns:
+            int: Битовая маска; бит d-1 соответствует дню d
+        """
+        row = self._conn().execute(
+            "SELECT days FROM months WHERE month = ?", (f"{year:04d}-{month:02d}",)
+        ).fetchone()
+        mask = row[0] if row else 0
+        if len(rules):
+            mask |= rules.month_mask(year, month)
+        return mask
+
+    def _state(self) -> tuple[str, int, float]:
+        """Читает эпоху, версию и время последнего изменения.
+
+        Returns:
+            tuple: (эпоха, версия, время изменения)
+        """
+        return self._conn().execute(
+            "SELECT epoch, version, modified FROM state"
+        ).fetchone()
+
+    def _iter_keyset(
+        self, column: str, after, inclusive: bool = False, upper: str = None
+    ) -> Iterator[EventsModel]:
+        """Перебирает строки порциями, продолжая с последнего ключа.
+
+        Каждая порция читается отдельным коротким запросом, поэтому
+        перебор не удерживает транзакцию чтения и память на все строки.
+
+        Args:
+            column: Столбец-ключ перебора ("id" или "date")
+            after: Начальное значение ключа
+            inclusive: Включать ли в выдачу само начальное значение
+            upper: Верхняя граница ключа включительно или None
+
+        Yields:
+            EventsModel: Очередное событие
+        """
+        position = 0 if column == "id" else 1
+        upper_clause = f" AND {column} <= ?" if upper is not None else ""
+        upper_params = (upper,) if upper is not None else ()
+        op = ">=" if inclusive else ">"
+        while True:
+            rows = self._conn().execute(
+                f"SELECT id, date, title, text FROM events WHERE {column} {op} ?"
+                f"{upper_clause} ORDER BY {column} LIMIT ?",
+                (after, *upper_params, FETCH_SIZE),
+            ).fetchall()
+            for row in rows:
+                yield _from_row(row)
+            if len(rows) < FETCH_SIZE:
+                return
+            after = rows[-1][position]
+            op = ">"
+
+    def _conflict(self, date_str: str) -> DateConflictError:
+        """Формирует ошибку конфликта дат.
+
+        Args:
+            date_str: Занятая дата
+
+        Returns:
+            DateConflictError: Исключение с описанием конфликта
+        """
+        existing = self.read_by_date(date_str)
+        existing_id = existing.id if existing else "?"
+        return DateConflictError(
+            f"На дату {date_str} уже существует событие с ID {existing_id}"
+        )
+
+
+def _check_date(date_str: str) -> None:
+    """Проверяет формат даты.
+
+    Args:
+        date_str: Дата для проверки
+
+    Raises:
+        ValueError: При неверном формате даты
+    """
+    if not EventsModel.validate_date(date_str):
+        raise ValueError(f"Неверный формат даты: {date_str}. Ожидается YYYY-MM-DD")
+
+
+def _from_row(row: tuple) -> EventsModel:
+    """Создает объект события из строки таблицы.
+
+    Args:
+        row: Кортеж (id, date, title, text)
+
+    Returns:
+        EventsModel: Объект события
+    """
+    event = EventsModel()
+    event.id = str(row[0])
+    event.dates, event.title, event.text = row[1], row[2], row[3]
+    return event
@@ -0,0 +1,175 @@
+"""Отложенная загрузка хранилища событий.
+
+Загрузка хранилища (чтение снимка и журнала, построение индексов) может
+занимать секунды, поэтому она не выполняется при импорте модулей.
+LazyLogic создает хранилище при первом обращении или заранее в фоновом
+потоке; до готовности запросы к событиям ждут загрузки, а остальные
+маршруты (фронт, метрики, проверка готовности) обслуживаются сразу.
+
+Если процесс разветвляется (fork) во время загрузки, в дочернем процессе
+она начинается заново; загруженное до fork хранилище дочерние процессы
+разделяют с родителем в режиме копирования при записи.
+"""
+
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+
+# Момент начала запуска; от него отсчитывается время холодного старта
+STARTED_AT = time.perf_counter()
+
+logger = logging.getLogger(__name__)
+
+
+class LazyLogic:
+    """Хранилище событий, загружаемое при первом обращении или в фоне.
+
+    Атрибуты и методы загруженного хранилища доступны через этот объект;
+    обращение к ним до окончания загрузки ждет ее завершения.
+
+    Attributes:
+        error: Сообщение о последней неудачной загрузке или None
+        load_seconds: Длительность загрузки хранилища в секундах
+        ready_after: Время от начала запуска до готовности в секундах
+    """
+
+    def __init__(self, factory: Callable[[], object]) -> None:
+        """Инициализирует незагруженное хранилище.
+
+        Args:
+            factory: Функция создания хранилища (EventsLogic или
+                SQLiteEventsLogic)
+        """
+        self._factory = factory
+        self._logic = None
+        self._load_lock = threading.Lock()  # удерживается во время загрузки
+        self._state_lock = threading.Lock()  # защищает _thread и _listeners
+        self._ready = threading.Event()
+        self._thread = None
+        self._listeners: list[Callable[[str], None]] = []
+        self.error = None
+        self.load_seconds = None
+        self.ready_after = None
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def __getattr__(self, name: str):
+        """Передает обращение загруженному хранилищу.
+
+        Args:
+            name: Имя атрибута
+
+        Returns:
+            Атрибут хранилища
+
+        Raises:
+            AttributeError: Для закрытых атрибутов
+        """
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return getattr(self.load(), name)
+
+    @property
+    def ready(self) -> bool:
+        """Загружено ли хранилище."""
+        return self._ready.is_set()
+
+    def start(self) -> None:
+        """Запускает загрузку в фоновом потоке, если она еще не начата."""
+        with self._state_lock:
+            if self._logic is not None or self._thread is not None:
+                return
+            self._thread = threading.Thread(
+                target=self._load_in_background, name="events-store-loader", daemon=True
+            )
+            self._thread.start()
+
+    def load(self):
+        """Загружает хранилище или ждет окончания начатой загрузки.
+
+        Returns:
+            Загруженное хранилище
+
+        Raises:
+            Exception: Ошибка создания хранилища; следующий вызов
+                повторяет попытку
+        """
+        if self._logic is not None:
+            return self._logic
+        with self._load_lock:
+            if self._logic is None:
+                started = time.perf_counter()
+                try:
+                    logic = self._factory()
+                except Exception as ex:
+                    self.error = f"{type(ex).__name__}: {ex}"
+                    raise
+                finished = time.perf_counter()
+                with self._state_lock:
+                    for listener in self._listeners:
+                        logic.subscribe(listener)
+                    self._logic = logic
+                self.load_seconds = finished - started
+                self.ready_after = finished - STARTED_AT
+                self.error = None
+                self._ready.set()
+                logger.info(
+                    "Хранилище событий загружено за %.3f с (холодный старт %.3f с)",
+                    self.load_seconds, self.ready_after,
+                )
+        return self._logic
+
+    def wait(self, timeout: float = None) -> bool:
+        """Ждет готовности хранилища, при необходимости запуская загрузку.
+
+        Args:
+            timeout: Максимальное время ожидания в секундах
+
+        Returns:
+            bool: True если хранилище загружено
+        """
+        if self._logic is not None:
+            return True
+        self.start()
+        return self._ready.wait(timeout)
+
+    def subscribe(self, listener: Callable[[str], None]) -> None:
+        """Подписывает обработчик на изменения событий, не дожидаясь загрузки.
+
+        Args:
+            listener: Функция, принимающая ID измененного события
+        """
+        with self._state_lock:
+            if self._logic is None:
+                self._listeners.append(listener)
+                return
+        self._logic.subscribe(listener)
+
+    def close(self) -> None:
+        """Закрывает хранилище, если оно было загружено."""
+        if self._logic is not None:
+            self._logic.close()
+
+    def _load_in_background(self) -> None:
+        """Загружает хранилище в фоновом потоке."""
+        try:
+            self.load()
+        except Exception:  # pylint: disable=broad-except
+            logger.exception("Ошибка загрузки хранилища событий")
+        finally:
+            with self._state_lock:
+                self._thread = None
+
+    def _after_fork(self) -> None:
+        """Восстанавливает блокировки в дочернем процессе после fork().
+
+        Поток загрузки не переживает fork, поэтому незавершенная загрузка
+        начинается в дочернем процессе заново.
+        """
+        self._load_lock = threading.Lock()
+        self._state_lock = threading.Lock()
+        if self._thread is not None:
+            self._thread = None
+            if self._logic is None:
+                self.start()
@@ -1,12 +1,38 @@
 const API_BASE = '/api/v1/events';
+const CALENDAR_BASE = '/api/v1/calendar';
+// Сколько последних месяцев показывать в сводке
+const SUMMARY_MONTHS = 24;
+// Задержка перезагрузки после изменений, чтобы объединить их серию, мс
+const RELOAD_DELAY = 200;
 
 // Инициализация при загрузке страницы
 document.addEventListener('DOMContentLoaded', function() {
     loadEvents();
     setupEventListeners();
     setupCharacterCounters();
+    watchChanges();
 });
 
+// Подписка на журнал изменений (Server-Sent Events): список обновляется,
+// когда события меняют другие клиенты, без периодического опроса
+let reloadTimer = null;
+
+function watchChanges() {
+    if (!window.EventSource) return;
+
+    const source = new EventSource(API_BASE + '/changes/');
+    source.addEventListener('change', () => {
+        clearTimeout(reloadTimer);
+        reloadTimer = setTimeout(loadEvents, RELOAD_DELAY);
+    });
+    // Пропущенные изменения уже вытеснены из журнала: перечитываем все
+    source.addEventListener('expired', () => {
+        source.close();
+        loadEvents();
+        watchChanges();
+    });
+}
+
 // Настройка счетчиков символов
 function setupCharacterCounters() {
     const titleInput = document.getElementById('title');
@@ -49,13 +75,39 @@ function setupEventListeners() {
     });
 }
 
-// Загрузка всех событий
+// Адрес списка событий; при выбранном месяце запрашиваем только его диапазон
+function eventsUrl() {
+    const monthFilter = document.getElementById('monthFilter').value;
+    if (!monthFilter) return API_BASE + '/';
+
+    const [year, month] = monthFilter.split('-').map(Number);
+    const lastDay = new Date(year, month, 0).getDate();
+    return `${API_BASE}/?from=${monthFilter}-01&to=${monthFilter}-${lastDay}`;
+}
+
+// Кэш последнего ответа по адресу: { etag, data }
+const responseCache = new Map();
+
+// Условный запрос: при неизменных данных сервер отвечает 304
+async function fetchCached(url) {
+    const cached = responseCache.get(url);
+    const headers = cached ? { 'If-None-Match': cached.etag } : {};
+    const response = await fetch(url, { headers, cache: 'no-store' });
+
+    if (response.status === 304 && cached) return cached.data;
+    if (!response.ok) throw new Error('Ошибка загрузки событий');
+
+    const data = await response.text();
+    const etag = response.headers.get('ETag');
+    if (etag) responseCache.set(url, { etag, data });
+    return data;
+}
+
+// Загрузка событий
 async function loadEvents() {
+    loadCalendar();
     try {
-        const response = await fetch(API_BASE + '/');
-        if (!response.ok) throw new Error('Ошибка загрузки событий');
-        
-        const data = await response.text();
+        const data = await fetchCached(eventsUrl());
         const events = parseEventsData(data);
         displayEvents(events);
     } catch (error) {
@@ -63,6 +115,62 @@ async function loadEvents() {
     }
 }
 
+// Календарь выбранного месяца или сводка по месяцам, если месяц не выбран;
+// оба ответа сервер собирает из готовых счетчиков, без списка событий
+async function loadCalendar() {
+    const container = document.getElementById('monthCalendar');
+    const monthFilter = document.getElementById('monthFilter').value;
+    try {
+        if (monthFilter) {
+            const [year, month] = monthFilter.split('-').map(Number);
+            const data = JSON.parse(await fetchCached(`${CALENDAR_BASE}/${year}/${month}/`));
+            container.innerHTML = renderMonth(year, month, data);
+        } else {
+            const stats = JSON.parse(await fetchCached(API_BASE + '/stats/'));
+            container.innerHTML = renderMonthSummary(stats);
+        }
+    } catch (error) {
+        container.innerHTML = '';
+    }
+}
+
+// Сетка месяца: занятые дни берутся из битовой маски (бит d-1 - день d)
+function renderMonth(year, month, data) {
+    // Неделя начинается с понедельника
+    const offset = (new Date(year, month - 1, 1).getDay() + 6) % 7;
+    const cells = ['Пн', 'Вт', 'Ср', 'Чт', 'Пт', 'Сб', 'Вс']
+        .map(name => `<div class="calendar-head">${name}</div>`);
+    for (let i = 0; i < offset; i++) {
+        cells.push('<div></div>');
+    }
+    for (let day = 1; day <= data.days_in_month; day++) {
+        const busy = (data.bitmap >>> (day - 1)) & 1;
+        cells.push(`<div class="calendar-day${busy ? ' busy' : ''}">${day}</div>`);
+    }
+    return `<p class="calendar-summary">Занято дней: ${data.count} из ${data.days_in_month}</p>` +
+        `<div class="calendar-grid">${cells.join('')}</div>`;
+}
+
+// Сводка: последние месяцы с числом событий, по клику выбирается месяц
+function renderMonthSummary(stats) {
+    const months = Object.entries(stats.months).sort().reverse().slice(0, SUMMARY_MONTHS);
+    if (months.length === 0) return '';
+
+    const chips = months.map(([month, count]) => `
+        <button class="month-chip" onclick="selectMonth('${month}')">
+            ${formatMonth(month)}: ${count}
+        </button>
+    `).join('');
+    return `<p class="calendar-summary">Всего событий: ${stats.total}</p>` +
+        `<div class="month-chips">${chips}</div>`;
+}
+
+// Выбор месяца из сводки
+function selectMonth(month) {
+    document.getElementById('monthFilter').value = month;
+    filterEvents();
+}
+
 // Парсинг данных событий
 function parseEventsData(rawData) {
     if (!rawData.trim()) return [];
@@ -81,20 +189,14 @@ function parseEventsData(rawData) {
 // Отображение событий
 function displayEvents(events) {
     const eventsList = document.getElementById('eventsList');
-    const monthFilter = document.getElementById('monthFilter').value;
     
     if (events.length === 0) {
         eventsList.innerHTML = '<p class="loading">Событий пока нет</p>';
         return;
     }
 
-    // Фильтрация по месяцу
-    let filteredEvents = events;
-    if (monthFilter) {
-        filteredEvents = events.filter(event => event.date.startsWith(monthFilter));
-    }
-
-    eventsList.innerHTML = filteredEvents.map(event => `
+    // Фильтрация по месяцу выполняется на сервере (параметры from/to)
+    eventsList.innerHTML = events.map(event => `
         <div class="event-card">
             <div class="event-date">📅 ${formatDate(event.date)}</div>
             <h3 class="event-title">${escapeHtml(event.title)}</h3>
@@ -269,6 +371,15 @@ function formatDate(dateString) {
     });
 }
 
+// Название месяца в формате YYYY-MM
+function formatMonth(month) {
+    const [year, number] = month.split('-').map(Number);
+    return new Date(year, number - 1, 1).toLocaleDateString('ru-RU', {
+        year: 'numeric',
+        month: 'long'
+    });
+}
+
 // Экранирование HTML
 function escapeHtml(text) {
     const div = document.createElement('div');
@@ -0,0 +1,277 @@
+"""Календари арендаторов с отдельными хранилищами.
+
+Каждый календарь (арендатор) получает собственное хранилище событий со
+своими индексами и блокировками: правило «одно событие в день» действует
+внутри календаря, а размер одного календаря не влияет на остальные.
+Хранилище открывается при первом запросе к календарю и закрывается, когда
+к календарю долго нет запросов, поэтому память и время загрузки зависят от
+числа активных календарей, а не от общего объема данных.
+
+Запрос держит календарь между acquire() и release(); календарь с
+выполняющимися запросами не выгружается. Простаивающие календари ищет
+фоновый поток, поэтому они выгружаются и без новых запросов, а число
+открытых календарей ограничено: при достижении предела выгружается
+дольше всех простаивающий. Хранилище только в памяти выгружается, лишь
+если оно пусто, - иначе его данные были бы потеряны.
+"""
+
+import os
+import re
+import threading
+import time
+from collections.abc import Callable
+
+# Имя календаря: строчные латинские буквы, цифры, "-" и "_"
+NAME_PATTERN = re.compile(r"[a-z0-9][a-z0-9_-]{0,62}")
+# Через сколько секунд без запросов календарь выгружается
+IDLE_SECONDS = 600.0
+# Наибольшее число одновременно открытых календарей
+MAX_TENANTS = 10_000
+
+
+class TenantError(ValueError):
+    """Исключение для неверного имени календаря."""
+
+
+class TenantLimitError(Exception):
+    """Исключение при достижении предела открытых календарей."""
+
+
+class Tenant:
+    """Календарь арендатора: хранилище и кэш списка событий."""
+
+    __slots__ = ("name", "logic", "list_cache", "active", "last_used", "previous", "_lock")
+
+    def __init__(self, name: str, previous: "Tenant" = None) -> None:
+        """Создает календарь без открытого хранилища.
+
+        Args:
+            name: Имя календаря
+            previous: Выгружаемый экземпляр того же календаря или None
+        """
+        self.name = name
+        self.previous = previous
+        self.logic = None
+        self.list_cache = None
+        self.active = 0  # число выполняющихся запросов
+        self.last_used = time.monotonic()
+        self._lock = threading.Lock()
+
+    def open(self, factory: Callable[[str], tuple]) -> None:
+        """Открывает хранилище, если оно еще не открыто.
+
+        Блокировка своя у каждого календаря: загрузка одного календаря не
+        задерживает запросы к остальным.
+
+        Args:
+            factory: Функция (имя) -> (хранилище, кэш списка)
+        """
+        with self._lock:
+            if self.logic is None:
+                if self.previous is not None:
+                    # Хранилище открывается только после того, как
+                    # выгружаемый экземпляр сбросит данные на диск
+                    self.previous.close()
+                    self.previous = None
+                self.logic, self.list_cache = factory(self.name)
+
+    def close(self) -> None:
+        """Закрывает хранилище (и дожидается закрытия предыдущего экземпляра)."""
+        with self._lock:
+            if self.previous is not None:
+                self.previous.close()
+                self.previous = None
+            if self.logic is not None:
+                self.logic.close()
+                self.logic = self.list_cache = None
+
+
+class TenantRegistry:
+    """Открытые календари арендаторов с выгрузкой простаивающих."""
+
+    def __init__(
+        self,
+        factory: Callable[[str], tuple],
+        reserved: frozenset = frozenset(),
+        idle_seconds: float = IDLE_SECONDS,
+        max_tenants: int = MAX_TENANTS,
+        persistent: bool = True,
+    ) -> None:
+        """Создает пустой реестр.
+
+        Args:
+            factory: Функция (имя) -> (хранилище, кэш списка) для открытия
+                календаря
+            reserved: Имена, которые нельзя использовать для календарей
+            idle_seconds: Время без запросов до выгрузки календаря; 0
+                отключает выгрузку простаивающих
+            max_tenants: Наибольшее число открытых календарей
+            persistent: Сохраняют ли хранилища данные на диск; иначе
+                выгружаются только пустые календари
+        """
+        self._factory = factory
+        self._reserved = reserved
+        self._tenants: dict[str, Tenant] = {}
+        self._closing: dict[str, Tenant] = {}  # выгружаемые календари
+        self._lock = threading.Lock()
+        self._sweeper_pid = None  # процесс, в котором запущен фоновый поток
+        self.configure(idle_seconds, max_tenants, persistent)
+        self.evictions = 0
+
+    def configure(
+        self, idle_seconds: float, max_tenants: int = MAX_TENANTS, persistent: bool = True
+    ) -> None:
+        """Меняет правила выгрузки календарей.
+
+        Args:
+            idle_seconds: Время без запросов до выгрузки; 0 отключает
+                выгрузку простаивающих
+            max_tenants: Наибольшее число открытых календарей
+            persistent: Сохраняют ли хранилища данные на диск
+        """
+        with self._lock:
+            self._idle_seconds = idle_seconds
+            self._max_tenants = max_tenants
+            self._persistent = persistent
+
+    def acquire(self, name: str) -> Tenant:
+        """Открывает календарь для запроса.
+
+        После запроса нужно вызвать release().
+
+        Args:
+            name: Имя календаря
+
+        Returns:
+            Tenant: Календарь с открытым хранилищем
+
+        Raises:
+            TenantError: Если имя календаря неверно или зарезервировано
+            TenantLimitError: Если открыто max_tenants календарей и ни
+                один нельзя выгрузить
+        """
+        if not NAME_PATTERN.fullmatch(name) or name in self._reserved:
+            raise TenantError(f"Неверное имя календаря: {name}")
+        evicted = []
+        with self._lock:
+            tenant = self._tenants.get(name)
+            if tenant is None:
+                if len(self._tenants) >= self._max_tenants:
+                    evicted = [min(
+                        (item for item in self._tenants.values() if self._evictable(item)),
+                        key=lambda item: item.last_used, default=None,
+                    )]
+                    if evicted[0] is None:
+                        raise TenantLimitError(
+                            f"Открыто {self._max_tenants} календарей, повторите позже"
+                        )
+                    self._detach(evicted)
+                tenant = self._tenants[name] = Tenant(name, self._closing.get(name))
+            tenant.active += 1
+            tenant.last_used = time.monotonic()
+            if self._idle_seconds and self._sweeper_pid != os.getpid():
+                self._sweeper_pid = os.getpid()
+                threading.Thread(
+                    target=self._sweep_loop, name="tenant-sweeper", daemon=True
+                ).start()
+        self._close(evicted)
+        try:
+            tenant.open(self._factory)
+        except BaseException:
+            self.release(tenant)
+            raise
+        return tenant
+
+    def release(self, tenant: Tenant) -> None:
+        """Отмечает завершение запроса к календарю.
+
+        Args:
+            tenant: Календарь, полученный от acquire()
+        """
+        with self._lock:
+            tenant.active -= 1
+            tenant.last_used = time.monotonic()
+
+    def sweep(self) -> int:
+        """Выгружает календари, простаивающие дольше idle_seconds.
+
+        Returns:
+            int: Число выгруженных календарей
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not self._idle_seconds:
+                return 0
+            idle = [
+                tenant for tenant in self._tenants.values()
+                if now - tenant.last_used >= self._idle_seconds and self._evictable(tenant)
+            ]
+            self._detach(idle)
+        self._close(idle)
+        return len(idle)
+
+    def loaded(self) -> int:
+        """Возвращает число открытых календарей."""
+        return len(self._tenants)
+
+    def close(self) -> None:
+        """Закрывает все календари."""
+        with self._lock:
+            tenants = list(self._tenants.values())
+            self._tenants.clear()
+        for tenant in tenants:
+            tenant.close()
+
+    def _sweep_loop(self) -> None:
+        """Периодически выгружает простаивающие календари (фоновый поток).
+
+        Поток не переживает fork(): в дочернем процессе acquire()
+        запускает свой.
+        """
+        while True:
+            with self._lock:
+                interval = self._idle_seconds / 2
+                if not interval:
+                    self._sweeper_pid = None
+                    return
+            time.sleep(interval)
+            self.sweep()
+
+    def _evictable(self, tenant: Tenant) -> bool:
+        """Проверяет, можно ли выгрузить календарь; вызывается под блокировкой.
+
+        Args:
+            tenant: Календарь
+
+        Returns:
+            bool: True для календаря без запросов, данные которого
+                сохранены на диске или которого нет вовсе
+        """
+        if tenant.active:
+            return False
+        if self._persistent or tenant.logic is None:
+            return True
+        return not tenant.logic.count() and not tenant.logic.list_rules()
+
+    def _detach(self, evicted: list[Tenant]) -> None:
+        """Убирает календари из реестра до закрытия; вызывается под блокировкой.
+
+        Args:
+            evicted: Выгружаемые календари
+        """
+        for tenant in evicted:
+            del self._tenants[tenant.name]
+            self._closing[tenant.name] = tenant
+        self.evictions += len(evicted)
+
+    def _close(self, evicted: list[Tenant]) -> None:
+        """Закрывает выгруженные календари вне блокировки реестра.
+
+        Args:
+            evicted: Календари, убранные _detach()
+        """
+        for tenant in evicted:
+            tenant.close()
+            with self._lock:
+                if self._closing.get(tenant.name) is tenant:
+                    del self._closing[tenant.name]
@@ -0,0 +1,84 @@
+"""Накладные расходы допуска запросов на запись.
+
+Несколько потоков вызывают WriteAdmission.enter() и leave() с ограничением
+по клиентам, общим ограничением и шлюзом параллелизма. Нормы заданы так,
+что запросы допускаются, поэтому меряется стоимость самой проверки. Каждый
+поток представляет заданное число клиентов; печатаются пропускная
+способность и среднее время проверки, а также доля отказов (должна быть
+близка к нулю).
+
+Запуск:
+    python -m benchmarks.bench_admission --threads 8 --ops 200000
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+from app.admission import ConcurrencyGate, RateLimiter, WriteAdmission
+
+
+def _worker(admission: WriteAdmission, clients: list[str], ops: int,
+            rejected: list[int]) -> None:
+    """Проверяет допуск запросов по кругу клиентов.
+
+    Args:
+        admission: Общий допуск
+        clients: Клиенты потока
+        ops: Число проверок
+        rejected: Общий список числа отказов потоков
+    """
+    local = 0
+    for i in range(ops):
+        if admission.enter(clients[i % len(clients)]) is None:
+            admission.leave()
+        else:
+            local += 1
+    rejected.append(local)
+
+
+def main() -> int:
+    """Запускает бенчмарк и печатает результаты.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200_000,
+                        help="проверок на поток")
+    parser.add_argument("--clients", type=int, default=100,
+                        help="клиентов на поток")
+    args = parser.parse_args()
+
+    for threads in sorted({1, args.threads}):
+        admission = WriteAdmission(
+            RateLimiter(1e9, 1e9, 1e9, 1e9), ConcurrencyGate(threads)
+        )
+        rejected: list[int] = []
+        workers = [
+            threading.Thread(
+                target=_worker,
+                args=(admission,
+                      [f"10.{n}.{c // 256}.{c % 256}" for c in range(args.clients)],
+                      args.ops, rejected),
+            )
+            for n in range(threads)
+        ]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+        total = threads * args.ops
+        print(f"потоков: {threads}, проверок: {total}, "
+              f"{total / elapsed:,.0f} проверок/с, "
+              f"{elapsed / total * 1e6:.2f} мкс на проверку, "
+              f"отказов: {sum(rejected)}, клиентов: {admission.limiter.clients()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,231 @@
+"""Сравнение WSGI и асинхронного (ASGI) режимов при многих соединениях.
+
+Сервер запускается в отдельном процессе: Flask приложение под
+многопоточным WSGI сервером Werkzeug или ASGI приложение app.asgi под
+встроенным асинхронным сервером. Клиент на asyncio открывает заданное
+число keep-alive соединений, каждое из которых выполняет смесь запросов:
+создание события, чтение события и страницы списка. Параметр --think
+добавляет паузу между запросами соединения, имитируя медленных клиентов,
+которые держат соединение открытым. Если сервер закрывает соединение после
+ответа (WSGI сервер Werkzeug так делает всегда), клиент открывает новое.
+
+Запуск:
+    python -m benchmarks.bench_asgi --connections 200 --requests 50
+"""
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+HOST = "127.0.0.1"
+
+
+def _serve(mode: str, port: int, ready) -> None:
+    """Запускает сервер в дочернем процессе.
+
+    Args:
+        mode: "wsgi" или "asgi"
+        port: Порт
+        ready: Событие, устанавливаемое после запуска сервера
+    """
+    import app.api as api
+
+    # Сравниваются режимы сервера, а не допуск записей: ограничения отключены
+    for name in (api.WRITE_RATE_ENV, api.GLOBAL_WRITE_RATE_ENV, api.MAX_WRITES_ENV):
+        os.environ[name] = "0"
+    if mode == "wsgi":
+        from werkzeug.serving import make_server
+
+        from app.api import create_app
+
+        logging.getLogger("werkzeug").setLevel(logging.ERROR)
+        server = make_server(HOST, port, create_app(), threaded=True)
+        server.socket.listen(1024)
+        ready.set()
+        server.serve_forever()
+    else:
+        import app.asgi as asgi
+
+        asyncio.run(asgi.serve(asgi.application, HOST, port, ready))
+
+
+async def _request(reader, writer, method: str, path: str,
+                   body: bytes = b"") -> tuple[int, bool]:
+    """Выполняет HTTP/1.1 запрос по открытому соединению.
+
+    Args:
+        reader: Поток чтения соединения
+        writer: Поток записи соединения
+        method: Метод
+        path: Путь
+        body: Тело запроса
+
+    Returns:
+        tuple: Код ответа и признак закрытия соединения сервером
+    """
+    writer.write(
+        f"{method} {path} HTTP/1.1\r\nHost: {HOST}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n".encode() + body
+    )
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    status = int(lines[0].split(" ")[1])
+    headers = {}
+    for line in lines[1:]:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding") == "chunked":
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            await reader.readexactly(size + 2)
+            if not size:
+                break
+    return status, headers.get("connection", "").lower() == "close"
+
+
+async def _client(port: int, seed: int, requests: int, think: float,
+                  latencies: list[float]) -> None:
+    """Выполняет запросы по одному keep-alive соединению.
+
+    Args:
+        port: Порт сервера
+        seed: Зерно генератора случайных чисел
+        requests: Число запросов
+        think: Пауза между запросами в секундах
+        latencies: Список для времени ответа каждого запроса
+    """
+    rnd = random.Random(seed)
+    first = date(2000, 1, 1)
+    root = "/api/v1/events/"
+    writer = None
+    try:
+        for _ in range(requests):
+            choice = rnd.random()
+            started = time.perf_counter()
+            if writer is None:
+                reader, writer = await asyncio.open_connection(
+                    HOST, port, limit=1 << 20
+                )
+            if choice < 0.3:
+                day = first + timedelta(days=rnd.randrange(36500))
+                _, closed = await _request(reader, writer, "POST", root,
+                                           f"{day.isoformat()}|bench|c{seed}".encode())
+            elif choice < 0.9:
+                _, closed = await _request(reader, writer, "GET",
+                                           f"{root}{rnd.randint(1, 5000)}/")
+            else:
+                _, closed = await _request(
+                    reader, writer, "GET",
+                    f"{root}?cursor={rnd.randint(0, 5000)}&limit=20",
+                )
+            latencies.append(time.perf_counter() - started)
+            if closed:
+                writer.close()
+                writer = None
+            if think:
+                await asyncio.sleep(think)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def _load(port: int, connections: int, requests: int,
+                think: float) -> tuple[float, list[float]]:
+    """Нагружает сервер параллельными соединениями.
+
+    Args:
+        port: Порт сервера
+        connections: Число соединений
+        requests: Число запросов на соединение
+        think: Пауза между запросами в секундах
+
+    Returns:
+        tuple: Время прогона в секундах и время ответа каждого запроса
+    """
+    latencies: list[float] = []
+    started = time.perf_counter()
+    await asyncio.gather(*(
+        _client(port, seed, requests, think, latencies)
+        for seed in range(connections)
+    ))
+    return time.perf_counter() - started, latencies
+
+
+def _percentile(values: list[float], share: float) -> float:
+    """Возвращает перцентиль отсортированного списка.
+
+    Args:
+        values: Отсортированные значения
+        share: Доля от 0 до 1
+
+    Returns:
+        float: Значение перцентиля
+    """
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def _run(mode: str, port: int, args: argparse.Namespace) -> None:
+    """Запускает сервер в заданном режиме и печатает результаты нагрузки.
+
+    Args:
+        mode: "wsgi" или "asgi"
+        port: Порт
+        args: Параметры командной строки
+    """
+    ready = multiprocessing.Event()
+    server = multiprocessing.Process(target=_serve, args=(mode, port, ready),
+                                     daemon=True)
+    server.start()
+    try:
+        if not ready.wait(30):
+            raise RuntimeError(f"Сервер {mode} не запустился")
+        elapsed, latencies = asyncio.run(
+            _load(port, args.connections, args.requests, args.think)
+        )
+    finally:
+        server.terminate()
+        server.join()
+    latencies.sort()
+    print(f"{mode}: соединений {args.connections}, запросов {len(latencies)}, "
+          f"{len(latencies) / elapsed:,.0f} запр/с; задержка мс: "
+          f"p50 {_percentile(latencies, 0.5) * 1000:.2f}, "
+          f"p99 {_percentile(latencies, 0.99) * 1000:.2f}, "
+          f"max {latencies[-1] * 1000:.2f}")
+
+
+def main() -> int:
+    """Сравнивает WSGI и ASGI режимы.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--connections", type=int, default=200)
+    parser.add_argument("--requests", type=int, default=50,
+                        help="запросов на соединение")
+    parser.add_argument("--think", type=float, default=0.0,
+                        help="пауза клиента между запросами, с")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--journal", action="store_true",
+                        help="хранить события в журнале во временном каталоге")
+    args = parser.parse_args()
+
+    for offset, mode in enumerate(("wsgi", "asgi")):
+        with tempfile.TemporaryDirectory() as data_dir:
+            if args.journal:
+                os.environ["CALENDAR_DATA_DIR"] = data_dir
+            _run(mode, args.port + offset, args)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
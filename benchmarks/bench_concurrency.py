@@ -0,0 +1,170 @@
+"""Стресс-тест конкурентного доступа к EventsLogic.
+
+Несколько потоков одновременно создают, переносят и удаляют события на
+пересекающемся наборе дат. После прогона проверяется, что на каждую дату
+приходится не более одного события, ID уникальны, а индексы согласованы
+с хранилищем.
+
+Запуск:
+    python -m benchmarks.bench_concurrency --threads 16 --ops 20000
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+from app.logic import EventsLogic
+from app.model import Events
+from app.persistence import JournalPersistence
+
+
+def _make_event(date_str: str) -> Events:
+    """Создает событие на указанную дату.
+
+    Args:
+        date_str: Дата в формате YYYY-MM-DD
+
+    Returns:
+        Events: Новое событие
+    """
+    event = Events()
+    event.dates = date_str
+    event.title = "stress"
+    event.text = "concurrency"
+    return event
+
+
+def _worker(logic: EventsLogic, dates: list[str], ops: int, seed: int,
+            created: list[str], stats: dict) -> None:
+    """Выполняет случайную смесь операций над общими датами.
+
+    Args:
+        logic: Общий объект бизнес-логики
+        dates: Пул дат, на которые претендуют все потоки
+        ops: Число операций
+        seed: Зерно генератора случайных чисел
+        created: Общий список выданных ID
+        stats: Общие счетчики операций
+    """
+    rnd = random.Random(seed)
+    local = {"create": 0, "conflict": 0, "update": 0, "delete": 0}
+    ids = []
+    for _ in range(ops):
+        action = rnd.random()
+        try:
+            if action < 0.6 or not ids:
+                ids.append(logic.create(_make_event(rnd.choice(dates))))
+                local["create"] += 1
+            elif action < 0.85:
+                logic.update(rnd.choice(ids), _make_event(rnd.choice(dates)))
+                local["update"] += 1
+            else:
+                logic.delete(ids.pop(rnd.randrange(len(ids))))
+                local["delete"] += 1
+        except ValueError:
+            local["conflict"] += 1
+    created.extend(ids)
+    with stats["lock"]:
+        for key, value in local.items():
+            stats[key] += value
+
+
+def _check_invariants(logic: EventsLogic, created: list[str]) -> list[str]:
+    """Проверяет согласованность хранилища и индексов.
+
+    Args:
+        logic: Объект бизнес-логики после прогона
+        created: Все ID, выданные потокам
+
+    Returns:
+        list[str]: Описание найденных нарушений
+    """
+    errors = []
+    events = logic.list_events()
+    seen_dates = {}
+    for event in events:
+        if event.dates in seen_dates:
+            errors.append(
+                f"дата {event.dates}: события {seen_dates[event.dates]} и {event.id}"
+            )
+        seen_dates[event.dates] = event.id
+        indexed = logic.read_by_date(event.dates)
+        if indexed is None or indexed.id != event.id:
+            errors.append(f"индекс дат не указывает на событие {event.id}")
+    if len(created) != len(set(created)):
+        errors.append("выданы повторяющиеся ID")
+    range_dates = [event.dates for event in logic.read_range()]
+    if range_dates != sorted(seen_dates):
+        errors.append("отсортированный индекс дат не совпадает с хранилищем")
+    return errors
+
+
+def main() -> int:
+    """Запускает стресс-тест и печатает результаты.
+
+    Returns:
+        int: Код возврата процесса (0 при отсутствии нарушений)
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--ops", type=int, default=20_000,
+                        help="операций на поток")
+    parser.add_argument("--dates", type=int, default=365,
+                        help="размер общего пула дат")
+    parser.add_argument("--journal", action="store_true",
+                        help="писать изменения в журнал во временном каталоге")
+    parser.add_argument("--compact", action="store_true",
+                        help="использовать колоночное хранилище событий")
+    args = parser.parse_args()
+
+    # Частое переключение потоков повышает шанс поймать гонку
+    sys.setswitchinterval(1e-6)
+    first = date(2024, 1, 1)
+    dates = [(first + timedelta(days=i)).isoformat() for i in range(args.dates)]
+    data_dir = tempfile.TemporaryDirectory() if args.journal else None
+    backend = JournalPersistence(data_dir.name) if data_dir else None
+    logic = EventsLogic(backend, compact=args.compact)
+    created: list[str] = []
+    stats = {"lock": threading.Lock(), "create": 0, "conflict": 0,
+             "update": 0, "delete": 0}
+    threads = [
+        threading.Thread(target=_worker,
+                         args=(logic, dates, args.ops, seed, created, stats))
+        for seed in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    logic.close()
+
+    total = args.threads * args.ops
+    print(f"потоков: {args.threads}, операций: {total}, время: {elapsed:.2f} с, "
+          f"{total / elapsed:,.0f} оп/с")
+    print(f"создано: {stats['create']}, обновлено: {stats['update']}, "
+          f"удалено: {stats['delete']}, конфликтов дат: {stats['conflict']}")
+    errors = _check_invariants(logic, created)
+    for error in errors:
+        print("НАРУШЕНИЕ:", error)
+    print("инварианты соблюдены" if not errors else f"нарушений: {len(errors)}")
+    if data_dir is not None:
+        # Восстановленное из журнала состояние должно совпадать с памятью
+        restored = EventsLogic(JournalPersistence(data_dir.name), compact=args.compact)
+        if [(e.id, e.dates) for e in restored.list_events()] != [
+            (e.id, e.dates) for e in logic.list_events()
+        ]:
+            errors.append("состояние из журнала не совпадает с памятью")
+            print("НАРУШЕНИЕ: состояние из журнала не совпадает с памятью")
+        restored.close()
+        data_dir.cleanup()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""Микробенчмарк разбора и проверки дат.
+
+Сравнивает прежнюю проверку через datetime.strptime с быстрым разбором
+model.parse_date без кэша (уникальные даты) и с кэшем (повторяющиеся
+даты, как при повторной проверке одной даты в _from_raw и EventsLogic).
+
+Запуск:
+    python -m benchmarks.bench_dates --number 200000
+"""
+
+import argparse
+import sys
+import timeit
+from datetime import date, datetime, timedelta
+
+from app import model
+
+
+def _validate_strptime(date_str: str) -> bool:
+    """Прежняя реализация Events.validate_date.
+
+    Args:
+        date_str: Строка с датой
+
+    Returns:
+        bool: True если дата корректна
+    """
+    try:
+        datetime.strptime(date_str, "%Y-%m-%d")
+        return True
+    except ValueError:
+        return False
+
+
+def _report(name: str, seconds: float, number: int, baseline: float = None) -> None:
+    """Печатает время одной операции.
+
+    Args:
+        name: Название варианта
+        seconds: Общее время
+        number: Число операций
+        baseline: Время базового варианта для расчета ускорения
+    """
+    per_call = seconds / number * 1e9
+    speedup = f" (ускорение {baseline / seconds:.1f}x)" if baseline else ""
+    print(f"{name:<32} {per_call:8.0f} нс/вызов{speedup}")
+
+
+def main() -> int:
+    """Запускает микробенчмарк.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=200_000)
+    args = parser.parse_args()
+
+    first = date(1990, 1, 1)
+    unique = [(first + timedelta(days=i)).isoformat() for i in range(args.number)]
+    repeated = unique[:365] * (args.number // 365 + 1)
+    repeated = repeated[:args.number]
+    parse_uncached = model.parse_date.__wrapped__
+
+    def run(func, dates):
+        return timeit.timeit(lambda: [func(d) for d in dates], number=1)
+
+    baseline = run(_validate_strptime, unique)
+    _report("strptime", baseline, args.number)
+    _report("parse_date без кэша", run(parse_uncached, unique), args.number, baseline)
+    model.parse_date.cache_clear()
+    run(model.parse_date, repeated)
+    _report("parse_date с кэшем (365 дат)", run(model.parse_date, repeated),
+            args.number, baseline)
+    _report("Events.validate_date", run(model.Events.validate_date, repeated),
+            args.number, baseline)
+    invalid = ["2024-13-01", "2024-02-30", "not a date", "2024-1-1"] * (args.number // 4)
+    _report("strptime, неверные даты", run(_validate_strptime, invalid), len(invalid))
+    _report("parse_date, неверные даты", run(parse_uncached, invalid), len(invalid))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
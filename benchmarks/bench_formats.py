@@ -0,0 +1,127 @@
+"""Сравнение форматов передачи событий: сырого, JSON и двоичного.
+
+Для каждого формата измеряются сериализация списка событий тем же кодом,
+что отдает потоковые ответы API, разбор тела обратно в события и размер
+тела на одно событие. JSON измеряется с orjson (если установлен) и со
+стандартным модулем json.
+
+Запуск:
+    python -m benchmarks.bench_formats --events 100000
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+import app.api as api
+import app.formats as formats
+from app import model
+
+
+def _make_events(number: int) -> list[model.Events]:
+    """Создает события со случайными датами и текстами разной длины.
+
+    Args:
+        number: Число событий
+
+    Returns:
+        list[model.Events]: События с ID
+    """
+    rng = random.Random(42)
+    first = date(2000, 1, 1)
+    words = ["встреча", "релиз", "отчет", "planning", "review", "обед", "звонок"]
+    events = []
+    for number_ in range(1, number + 1):
+        event = model.Events()
+        event.id = str(number_)
+        event.dates = (first + timedelta(days=rng.randrange(20 * 365))).isoformat()
+        event.title = " ".join(rng.choices(words, k=2))
+        event.text = " ".join(rng.choices(words, k=rng.randrange(1, 12)))
+        events.append(event)
+    return events
+
+
+def _decode_raw(body: bytes) -> list[model.Events]:
+    """Разбирает тело в сыром формате так же, как API разбирает запросы.
+
+    Args:
+        body: Строки 'id|date|title|text'
+
+    Returns:
+        list[model.Events]: События
+    """
+    return [api._from_raw(line) for line in body.decode("utf-8").splitlines()]  # pylint: disable=protected-access
+
+
+def _decode_json(body: bytes) -> list[model.Events]:
+    """Разбирает JSON массив событий.
+
+    Args:
+        body: JSON массив
+
+    Returns:
+        list[model.Events]: События
+    """
+    return [formats.from_dict(item) for item in formats.loads_json(body)]
+
+
+def _measure(func, *args) -> tuple[float, object]:
+    """Выполняет функцию и измеряет время.
+
+    Args:
+        func: Функция
+        *args: Аргументы
+
+    Returns:
+        tuple[float, object]: Время в секундах и результат
+    """
+    started = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - started, result
+
+
+def main() -> int:
+    """Запускает сравнение форматов.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=100_000)
+    args = parser.parse_args()
+
+    events = _make_events(args.events)
+    variants = [
+        ("сырой", formats.TEXT, _decode_raw),
+        ("JSON", formats.JSON, _decode_json),
+        ("двоичный", formats.BINARY, lambda body: list(formats.decode_stream(body))),
+    ]
+    if formats.orjson is not None:
+        variants.insert(2, ("JSON (json)", formats.JSON, _decode_json))
+        variants[1] = ("JSON (orjson)",) + variants[1][1:]
+
+    print(f"{'формат':<16} {'кодирование нс':>15} {'разбор нс':>12} {'байт':>8}")
+    for name, mimetype, decode in variants:
+        fast_json = formats.orjson
+        if name == "JSON (json)":
+            formats.orjson = None
+        try:
+            encode_time, body = _measure(
+                lambda: api._join(api._encode_stream(events, mimetype))  # pylint: disable=protected-access
+            )
+            decode_time, decoded = _measure(decode, body)
+        finally:
+            formats.orjson = fast_json
+        assert len(decoded) == len(events)
+        number = len(events)
+        print(
+            f"{name:<16} {encode_time / number * 1e9:15.0f} "
+            f"{decode_time / number * 1e9:12.0f} {len(body) / number:8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""Бенчмарк памяти: сколько байт занимает одно событие в EventsLogic.
+
+Сравниваются три представления:
+
+* прежний класс события с __dict__ в словаре хранилища;
+* model.Events с __slots__ (режим по умолчанию);
+* колоночное хранилище ColumnarStore (EventsLogic(compact=True)).
+
+Учитывается вся память, выделенная при создании событий через
+EventsLogic.create, включая индексы по датам (tracemalloc).
+
+Запуск:
+    python -m benchmarks.bench_memory --events 200000
+"""
+
+import argparse
+import gc
+import random
+import sys
+import tracemalloc
+from datetime import date, timedelta
+from typing import Optional
+
+from app import model
+from app.logic import EventsLogic
+
+_TITLES = ["Встреча", "Созвон", "День рождения", "Отчет", "Планерка", "Отпуск"]
+
+
+class _DictEvents:
+    """Событие в прежнем представлении: обычный класс с __dict__."""
+
+    def __init__(self) -> None:
+        """Инициализирует поля события."""
+        self.id: Optional[str] = None
+        self.title = ""
+        self.text = ""
+        self.dates = ""
+        self.ordinal = None
+
+
+def _make_events(count: int, event_class: type) -> list:
+    """Создает события на последовательные даты.
+
+    Args:
+        count: Число событий
+        event_class: Класс события
+
+    Returns:
+        list: Созданные события
+    """
+    rnd = random.Random(1)
+    first = date(1900, 1, 1)
+    events = []
+    for i in range(count):
+        event = event_class()
+        day = first + timedelta(days=i)
+        event.dates = day.isoformat()
+        if event_class is _DictEvents:
+            event.ordinal = day.toordinal()
+        event.title = rnd.choice(_TITLES)
+        event.text = f"Описание события номер {i} " + "x" * rnd.randrange(40)
+        events.append(event)
+    return events
+
+
+def _measure(count: int, event_class: type, compact: bool) -> float:
+    """Измеряет память на событие для одного представления.
+
+    Args:
+        count: Число событий
+        event_class: Класс создаваемых событий
+        compact: Использовать колоночное хранилище
+
+    Returns:
+        float: Байт на событие
+    """
+    gc.collect()
+    tracemalloc.start()
+    logic = EventsLogic(compact=compact)
+    for event in _make_events(count, event_class):
+        logic.create(event)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del logic
+    return current / count
+
+
+def main() -> int:
+    """Запускает бенчмарк памяти.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    args = parser.parse_args()
+
+    before = _measure(args.events, _DictEvents, compact=False)
+    slots = _measure(args.events, model.Events, compact=False)
+    columnar = _measure(args.events, model.Events, compact=True)
+    print(f"событий: {args.events}")
+    print(f"класс с __dict__:      {before:7.0f} байт/событие")
+    print(f"Events с __slots__:    {slots:7.0f} байт/событие ({slots / before:.0%})")
+    print(f"колоночное хранилище:  {columnar:7.0f} байт/событие ({columnar / before:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
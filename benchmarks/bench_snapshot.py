@@ -0,0 +1,96 @@
+"""Выгрузка и загрузка хранилища двоичным снимком против JSON снимка журнала.
+
+Хранилище заполняется заданным числом событий, затем замеряются:
+
+* выгрузка двоичного снимка (EventsLogic.export_snapshot);
+* загрузка двоичного снимка через mmap с построением индексов за один
+  проход (EventsLogic.import_snapshot) в хранилище в памяти;
+* для сравнения - запуск хранилища из JSON снимка каталога данных, как
+  при обычном старте процесса.
+
+Запуск:
+    python -m benchmarks.bench_snapshot --events 1000000
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from datetime import date
+
+from app.logic import EventsLogic
+from app.model import Events
+from app.persistence import OP_CREATE, JournalPersistence
+
+# Размер пакета при заполнении хранилища
+FILL_BATCH = 10_000
+
+
+def _fill(logic: EventsLogic, size: int) -> None:
+    """Заполняет хранилище событиями на последовательных датах.
+
+    Args:
+        logic: Хранилище событий
+        size: Число событий
+    """
+    first = date(1, 1, 1).toordinal()
+    for start in range(0, size, FILL_BATCH):
+        operations = []
+        for i in range(start, min(size, start + FILL_BATCH)):
+            event = Events()
+            event.dates = date.fromordinal(first + i).isoformat()
+            event.title = f"title {i}"
+            event.text = f"text of event {i}"
+            operations.append((OP_CREATE, None, event))
+        logic.apply_batch(operations)
+
+
+def main() -> int:
+    """Запускает бенчмарк и печатает результаты.
+
+    Returns:
+        int: Код возврата процесса (1, если загруженное состояние отличается)
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        source = EventsLogic(JournalPersistence(data_dir))
+        _fill(source, args.events)
+        source._snapshot()  # pylint: disable=protected-access
+        source.close()
+
+        started = time.perf_counter()
+        source = EventsLogic(JournalPersistence(data_dir))
+        json_load = time.perf_counter() - started
+
+        path = os.path.join(data_dir, "events.snapshot")
+        started = time.perf_counter()
+        with open(path, "wb") as file:
+            source.export_snapshot(file)
+        export = time.perf_counter() - started
+        size = os.path.getsize(path)
+
+        target = EventsLogic()
+        started = time.perf_counter()
+        target.import_snapshot(path)
+        import_ = time.perf_counter() - started
+        json_size = os.path.getsize(os.path.join(data_dir, "events.json"))
+
+        same = [(e.id, e.dates, e.title) for e in source.iter_range()] == [
+            (e.id, e.dates, e.title) for e in target.iter_range()
+        ]
+        source.close()
+
+    print(f"событий: {args.events}")
+    print(f"запуск из JSON снимка: {json_load:.2f} с, {json_size / 2**20:.1f} МиБ")
+    print(f"выгрузка двоичного снимка: {export:.2f} с, {size / 2**20:.1f} МиБ")
+    print(f"загрузка двоичного снимка: {import_:.2f} с")
+    print("состояние совпадает" if same else "НАРУШЕНИЕ: состояние отличается")
+    return 0 if same else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
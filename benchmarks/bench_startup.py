@@ -0,0 +1,134 @@
+"""Холодный старт: когда процесс начинает принимать и обслуживать запросы.
+
+Каталог данных заполняется заданным числом событий (снимок и журнал),
+после чего в новых процессах измеряется:
+
+* время до готового WSGI приложения (импорт и create_app) - с этого
+  момента воркер принимает соединения;
+* время до готовности хранилища (/api/v1/ready/ отвечает 200);
+* время до первого ответа на запрос к событиям.
+
+Сравниваются фоновая загрузка (по умолчанию) и загрузка до создания
+приложения, как при загрузке хранилища во время импорта.
+
+Запуск:
+    python -m benchmarks.bench_startup --events 200000
+"""
+
+import argparse
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date
+
+FIRST_DAY = date(1900, 1, 1).toordinal()
+
+
+def _fill(data_dir: str, events: int) -> None:
+    """Заполняет каталог данных: снимок и хвост журнала после него.
+
+    Args:
+        data_dir: Каталог данных
+        events: Число событий
+    """
+    from app import model, persistence
+    from app.logic import EventsLogic
+
+    backend = persistence.JournalPersistence(data_dir, snapshot_every=events + 1)
+    logic = EventsLogic(backend)
+    tail = min(events // 10, 10_000)
+    batch = []
+    for number in range(events):
+        event = model.Events()
+        event.dates = date.fromordinal(FIRST_DAY + number).isoformat()
+        event.title = f"Событие {number}"
+        event.text = "Описание события " + "x" * (number % 40)
+        batch.append((persistence.OP_CREATE, None, event))
+        if len(batch) == 10_000 or number == events - tail - 1:
+            logic.apply_batch(batch)
+            batch = []
+            if number == events - tail - 1:
+                # Основная часть попадает в снимок, остальное - в журнал
+                logic._snapshot()  # pylint: disable=protected-access
+    if batch:
+        logic.apply_batch(batch)
+    logic.close()
+
+
+def _child(data_dir: str, eager: bool, results) -> None:
+    """Запускает приложение в новом процессе и замеряет этапы старта.
+
+    Args:
+        data_dir: Каталог данных
+        eager: Загружать хранилище до создания приложения
+        results: Очередь для результатов
+    """
+    started = time.perf_counter()
+    os.environ["CALENDAR_DATA_DIR"] = data_dir
+    import app.api as api  # pylint: disable=import-outside-toplevel
+
+    if eager:
+        api.preload_store()
+    flask_app = api.create_app()
+    app_ready = time.perf_counter() - started
+    client = flask_app.test_client()
+    while client.get(api.READY_PATH).status_code != 200:
+        time.sleep(0.01)
+    store_ready = time.perf_counter() - started
+    client.get(api.EVENTS_API_ROOT + "/1/")
+    first_response = time.perf_counter() - started
+    results.put((app_ready, store_ready, first_response))
+    api._events_logic.close()  # pylint: disable=protected-access
+
+
+def _measure(data_dir: str, eager: bool, repeat: int) -> tuple[float, float, float]:
+    """Замеряет старт в нескольких новых процессах.
+
+    Args:
+        data_dir: Каталог данных
+        eager: Загружать хранилище до создания приложения
+        repeat: Число запусков
+
+    Returns:
+        tuple: Медианы времени до приложения, до готовности хранилища и
+            до первого ответа в секундах
+    """
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    runs = []
+    for _ in range(repeat):
+        process = context.Process(target=_child, args=(data_dir, eager, results))
+        process.start()
+        runs.append(results.get())
+        process.join()
+    return tuple(sorted(values)[len(values) // 2] for values in zip(*runs))
+
+
+def main() -> int:
+    """Запускает бенчмарк.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp(prefix="calendar-startup-")
+    try:
+        _fill(data_dir, args.events)
+        print(f"{'загрузка':<12} {'приложение, с':>14} {'хранилище, с':>13} {'первый ответ, с':>16}")
+        for name, eager in (("фоновая", False), ("до старта", True)):
+            app_ready, store_ready, first = _measure(data_dir, eager, args.repeat)
+            print(f"{name:<12} {app_ready:14.3f} {store_ready:13.3f} {first:16.3f}")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
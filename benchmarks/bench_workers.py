@@ -0,0 +1,120 @@
+"""Сравнение пропускной способности 1 и N процессов на общем хранилище SQLite.
+
+Каждый процесс создает собственное Flask приложение (как воркер gunicorn)
+с общим файлом базы из CALENDAR_SHARED_DB и выполняет смесь запросов через
+тестовый клиент: создание событий на общем пуле дат и чтение списка и
+отдельных событий. После прогона проверяется, что ни одна дата не занята
+дважды.
+
+Запуск:
+    python -m benchmarks.bench_workers --workers 4 --requests 2000
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+
+def _worker(args: tuple) -> tuple[int, int, int]:
+    """Выполняет запросы к приложению в отдельном процессе.
+
+    Args:
+        args: Кортеж (зерно, число запросов, размер пула дат)
+
+    Returns:
+        tuple: Число созданных событий, конфликтов дат и чтений
+    """
+    seed, requests, dates_pool = args
+    # Импорт внутри процесса: приложение читает CALENDAR_SHARED_DB при импорте
+    import app.api as api
+    from app.api import EVENTS_API_ROOT, create_app
+
+    # Бенчмарк меряет хранилище, а не допуск записей: ограничения отключены
+    for name in (api.WRITE_RATE_ENV, api.GLOBAL_WRITE_RATE_ENV, api.MAX_WRITES_ENV):
+        os.environ[name] = "0"
+    client = create_app().test_client()
+    rnd = random.Random(seed)
+    first = date(2000, 1, 1)
+    created = conflicts = reads = 0
+    for _ in range(requests):
+        if rnd.random() < 0.5:
+            day = (first + timedelta(days=rnd.randrange(dates_pool))).isoformat()
+            response = client.post(EVENTS_API_ROOT + "/", data=f"{day}|bench|w{seed}")
+            if response.status_code == 201:
+                created += 1
+            else:
+                conflicts += 1
+        else:
+            event_id = rnd.randint(1, max(1, created * 4))
+            client.get(f"{EVENTS_API_ROOT}/{event_id}/")
+            reads += 1
+    client.get(f"{EVENTS_API_ROOT}/?limit=100")
+    return created, conflicts, reads
+
+
+def _run(workers: int, requests: int, dates_pool: int) -> float:
+    """Прогоняет нагрузку заданным числом процессов на чистой базе.
+
+    Args:
+        workers: Число процессов
+        requests: Число запросов на процесс
+        dates_pool: Размер пула дат
+
+    Returns:
+        float: Пропускная способность в запросах в секунду
+    """
+    with tempfile.TemporaryDirectory() as data_dir:
+        db_path = os.path.join(data_dir, "events.db")
+        os.environ["CALENDAR_SHARED_DB"] = db_path
+        started = time.perf_counter()
+        with multiprocessing.Pool(workers) as pool:
+            results = pool.map(
+                _worker, [(seed, requests, dates_pool) for seed in range(workers)]
+            )
+        elapsed = time.perf_counter() - started
+
+        created = sum(result[0] for result in results)
+        conflicts = sum(result[1] for result in results)
+        conn = sqlite3.connect(db_path)
+        rows, dates = conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT date) FROM events"
+        ).fetchone()
+        conn.close()
+
+    total = workers * requests
+    print(f"воркеров: {workers:2d}, запросов: {total}, время: {elapsed:.2f} с, "
+          f"{total / elapsed:,.0f} запр/с; создано {created}, конфликтов {conflicts}")
+    if rows != created or rows != dates:
+        print(f"НАРУШЕНИЕ: строк {rows}, различных дат {dates}, создано {created}")
+        raise SystemExit(1)
+    return total / elapsed
+
+
+def main() -> int:
+    """Сравнивает 1 воркер и N воркеров.
+
+    Returns:
+        int: Код возврата процесса
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="запросов на воркер")
+    parser.add_argument("--dates", type=int, default=3650,
+                        help="размер общего пула дат")
+    args = parser.parse_args()
+
+    single = _run(1, args.requests, args.dates)
+    multi = _run(args.workers, args.requests, args.dates)
+    print(f"ускорение {args.workers} воркеров относительно 1: {multi / single:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
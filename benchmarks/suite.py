@@ -0,0 +1,576 @@
+"""Набор воспроизводимых бенчмарков сервиса с сохраненными базовыми значениями.
+
+Сценарии работают на двух уровнях: напрямую с EventsLogic и через тестовый
+клиент Flask (разбор _from_raw, сериализация _to_raw, обработчики).
+Хранилище перед сценарием заполняется заданным числом событий на разных
+датах; размер задается списком --sizes (по умолчанию 1k, 100k и 1M).
+
+Для каждого сценария и размера печатаются пропускная способность,
+перцентили времени одной операции и пиковая память по tracemalloc. Каждый
+прогон выполняется в отдельном процессе, поэтому сценарии не влияют друг
+на друга. Пиковая память меряется отдельным прогоном, так как tracemalloc
+заметно замедляет код.
+
+Результаты можно сохранить как базовые (--save) и сравнивать с ними
+последующие прогоны: отклонение хуже допуска (--tolerance) по
+пропускной способности, p99 или памяти считается регрессией, и процесс
+завершается с кодом 1. Базовые значения зависят от машины, поэтому
+benchmarks/baseline.json не хранится в репозитории: его создает первый
+прогон с --save на той машине, где потом сравниваются результаты.
+
+Запуск:
+    python -m benchmarks.suite --sizes 1000,100000 --save
+    python -m benchmarks.suite --sizes 1000,100000
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import date
+
+# Базовые значения по умолчанию
+BASELINE_FILE = os.path.join(os.path.dirname(__file__), "baseline.json")
+DEFAULT_SIZES = "1000,100000,1000000"
+# Допустимое ухудшение относительно базовых значений
+DEFAULT_TOLERANCE = 0.25
+# Первая дата заполнения хранилища
+FIRST_DAY = date(1, 1, 1).toordinal()
+
+
+def _event(day: int, title: str = "bench", text: str = "suite"):
+    """Создает событие на дату с заданным порядковым номером.
+
+    Args:
+        day: Порядковый номер даты
+        title: Заголовок
+        text: Текст
+
+    Returns:
+        Events: Новое событие
+    """
+    from app.model import Events
+
+    event = Events()
+    event.dates = date.fromordinal(day).isoformat()
+    event.title = title
+    event.text = text
+    return event
+
+
+def _fill(logic, size: int) -> None:
+    """Заполняет хранилище событиями на последовательных датах.
+
+    Args:
+        logic: Хранилище событий
+        size: Число событий
+    """
+    for i in range(size):
+        logic.create(_event(FIRST_DAY + i, f"title {i}", f"text of event {i}"))
+
+
+def _logic_crud(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Смесь операций EventsLogic.
+
+    50% чтение, 25% создание, 15% изменение и 10% удаление.
+
+    Args:
+        size: Начальное число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая одну операцию
+    """
+    from app.logic import EventsLogic
+
+    logic = EventsLogic()
+    _fill(logic, size)
+    next_day = [FIRST_DAY + size]
+    ids = [str(i) for i in range(1, size + 1)]
+
+    def step() -> None:
+        action = rnd.random()
+        if action < 0.5:
+            logic.read(rnd.choice(ids))
+        elif action < 0.75:
+            ids.append(logic.create(_event(next_day[0])))
+            next_day[0] += 1
+        elif action < 0.9:
+            _id = rnd.choice(ids)
+            event = logic.read(_id)
+            if event is not None:
+                logic.update(_id, _event(event.ordinal, "updated", "text"))
+        else:
+            position = rnd.randrange(len(ids))
+            ids[position], ids[-1] = ids[-1], ids[position]
+            logic.delete(ids.pop())
+
+    return step
+
+
+def _logic_conflicts(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Создание и перенос событий на уже занятые даты.
+
+    Все операции отклоняются проверкой уникальности даты.
+
+    Args:
+        size: Начальное число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая одну операцию
+    """
+    from app.logic import EventsLogic
+
+    logic = EventsLogic()
+    _fill(logic, size)
+
+    def step() -> None:
+        day = FIRST_DAY + rnd.randrange(size)
+        try:
+            if rnd.random() < 0.5:
+                logic.create(_event(day))
+            else:
+                logic.update(str(rnd.randint(1, size)), _event(day))
+        except ValueError:
+            pass
+
+    return step
+
+
+def _logic_list(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Получение полного списка событий из EventsLogic.
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая одну операцию
+    """
+    from app.logic import EventsLogic
+
+    logic = EventsLogic()
+    _fill(logic, size)
+    return logic.list_events
+
+
+def _logic_range(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Выборка событий за случайный месяц по индексу дат.
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая одну операцию
+    """
+    from app.logic import EventsLogic
+
+    logic = EventsLogic()
+    _fill(logic, size)
+
+    def step() -> None:
+        start = FIRST_DAY + rnd.randrange(size)
+        logic.read_range(
+            date.fromordinal(start).isoformat(),
+            date.fromordinal(start + 30).isoformat(),
+        )
+
+    return step
+
+
+def _logic_search(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Поиск по слову, встречающемуся во всех событиях, и префиксу номера.
+
+    Половина запросов ограничена диапазоном дат в один год.
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая одну операцию
+    """
+    from app.logic import EventsLogic
+
+    logic = EventsLogic()
+    _fill(logic, size)
+
+    def step() -> None:
+        query = f"event {rnd.randrange(size)}"
+        if rnd.random() < 0.5:
+            logic.search(query)
+        else:
+            start = FIRST_DAY + rnd.randrange(size)
+            logic.search(
+                query,
+                date.fromordinal(start).isoformat(),
+                date.fromordinal(start + 365).isoformat(),
+            )
+
+    return step
+
+
+def _api_client(size: int):
+    """Создает тестовый клиент Flask с заполненным хранилищем.
+
+    Args:
+        size: Число событий
+
+    Returns:
+        Тестовый клиент и хранилище событий приложения
+    """
+    import app.api as api
+
+    logic = api._events_logic  # pylint: disable=protected-access
+    _fill(logic, size)
+    # Бенчмарк меряет хранилище, а не допуск записей: ограничения отключены
+    for name in (api.WRITE_RATE_ENV, api.GLOBAL_WRITE_RATE_ENV, api.MAX_WRITES_ENV):
+        os.environ[name] = "0"
+    return api.create_app().test_client(), logic
+
+
+def _api_crud(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Смесь запросов к API: 50% GET, 25% POST, 15% PUT, 10% DELETE.
+
+    Args:
+        size: Начальное число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая один запрос
+    """
+    from app.api import EVENTS_API_ROOT
+
+    client, _ = _api_client(size)
+    next_day = [FIRST_DAY + size]
+    ids = [str(i) for i in range(1, size + 1)]
+
+    def step() -> None:
+        action = rnd.random()
+        if action < 0.5:
+            client.get(f"{EVENTS_API_ROOT}/{rnd.choice(ids)}/")
+        elif action < 0.75:
+            day = date.fromordinal(next_day[0]).isoformat()
+            next_day[0] += 1
+            response = client.post(EVENTS_API_ROOT + "/", data=f"{day}|title|text")
+            ids.append(response.get_data(as_text=True).rsplit(" ", 1)[-1])
+        elif action < 0.9:
+            _id = rnd.choice(ids)
+            day = date.fromordinal(FIRST_DAY + int(_id) - 1).isoformat()
+            client.put(f"{EVENTS_API_ROOT}/{_id}/", data=f"{day}|updated|text")
+        else:
+            position = rnd.randrange(len(ids))
+            ids[position], ids[-1] = ids[-1], ids[position]
+            client.delete(f"{EVENTS_API_ROOT}/{ids.pop()}/")
+
+    return step
+
+
+def _api_conflicts(size: int, rnd: random.Random) -> Callable[[], None]:
+    """POST событий на уже занятые даты (ответ 400).
+
+    Args:
+        size: Начальное число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая один запрос
+    """
+    from app.api import EVENTS_API_ROOT
+
+    client, _ = _api_client(size)
+
+    def step() -> None:
+        day = date.fromordinal(FIRST_DAY + rnd.randrange(size)).isoformat()
+        client.post(EVENTS_API_ROOT + "/", data=f"{day}|title|text")
+
+    return step
+
+
+def _api_list(size: int, rnd: random.Random) -> Callable[[], None]:
+    """GET полного списка без изменений между запросами (кэш ответа).
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая один запрос
+    """
+    from app.api import EVENTS_API_ROOT
+
+    client, _ = _api_client(size)
+    return lambda: client.get(EVENTS_API_ROOT + "/").get_data()
+
+
+def _api_list_dirty(size: int, rnd: random.Random) -> Callable[[], None]:
+    """Изменение одного события и GET полного списка (пересборка ответа).
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая изменение и запрос
+    """
+    from app.api import EVENTS_API_ROOT
+
+    client, logic = _api_client(size)
+
+    def step() -> None:
+        _id = rnd.randint(1, size)
+        logic.update(str(_id), _event(FIRST_DAY + _id - 1, "changed", "text"))
+        client.get(EVENTS_API_ROOT + "/").get_data()
+
+    return step
+
+
+def _api_list_gzip(size: int, rnd: random.Random) -> Callable[[], None]:
+    """GET полного списка со сжатием gzip без изменений (кэш сжатого тела).
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая один запрос
+    """
+    from app.api import EVENTS_API_ROOT
+
+    client, _ = _api_client(size)
+    headers = {"Accept-Encoding": "gzip"}
+    return lambda: client.get(EVENTS_API_ROOT + "/", headers=headers).get_data()
+
+
+def _api_page(size: int, rnd: random.Random) -> Callable[[], None]:
+    """GET страницы из 100 событий со случайного курсора.
+
+    Args:
+        size: Число событий
+        rnd: Генератор случайных чисел
+
+    Returns:
+        Функция, выполняющая один запрос
+    """
+    from app.api import EVENTS_API_ROOT
+
+    client, _ = _api_client(size)
+    return lambda: client.get(
+        f"{EVENTS_API_ROOT}/?cursor={rnd.randrange(size)}&limit=100"
+    ).get_data()
+
+
+# Сценарии: имя -> (функция подготовки, число операций при размере 1k),
+# число операций для полного списка уменьшается с ростом размера
+SCENARIOS = {
+    "logic_crud": (_logic_crud, 50_000),
+    "logic_conflicts": (_logic_conflicts, 50_000),
+    "logic_list": (_logic_list, 200),
+    "logic_range": (_logic_range, 20_000),
+    "logic_search": (_logic_search, 20_000),
+    "api_crud": (_api_crud, 5_000),
+    "api_conflicts": (_api_conflicts, 5_000),
+    "api_list": (_api_list, 200),
+    "api_list_dirty": (_api_list_dirty, 200),
+    "api_list_gzip": (_api_list_gzip, 200),
+    "api_page": (_api_page, 2_000),
+}
+# Сценарии, стоимость операции которых растет с размером хранилища
+SCALING = {"logic_list", "api_list", "api_list_dirty", "api_list_gzip"}
+
+
+def _ops_for(name: str, size: int) -> int:
+    """Возвращает число операций сценария для заданного размера.
+
+    Args:
+        name: Имя сценария
+        size: Число событий
+
+    Returns:
+        int: Число операций
+    """
+    ops = SCENARIOS[name][1]
+    if name in SCALING:
+        ops = max(20, ops * 1000 // size)
+    return ops
+
+
+def _run_scenario(args: tuple) -> dict:
+    """Выполняет сценарий в отдельном процессе.
+
+    Args:
+        args: Кортеж (имя сценария, размер, число операций, мерить ли память)
+
+    Returns:
+        dict: Результаты прогона
+    """
+    name, size, ops, memory = args
+    # Импорт до начала замеров, чтобы в пиковую память не попали модули
+    import app.api  # pylint: disable=import-outside-toplevel,unused-import
+
+    rnd = random.Random(f"{name}-{size}")
+    prepare = SCENARIOS[name][0]
+    if memory:
+        tracemalloc.start()
+        step = prepare(size, rnd)
+        for _ in range(ops):
+            step()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return {"peak_mib": peak / 2 ** 20}
+
+    started = time.perf_counter()
+    step = prepare(size, rnd)
+    setup = time.perf_counter() - started
+    # Первая операция прогревает кэши и в замеры не входит
+    step()
+    timer = time.perf_counter_ns
+    latencies = []
+    started = timer()
+    for _ in range(ops):
+        begin = timer()
+        step()
+        latencies.append(timer() - begin)
+    elapsed = (timer() - started) / 1e9
+    latencies.sort()
+    return {
+        "ops": ops,
+        "setup_s": setup,
+        "ops_per_s": ops / elapsed,
+        "p50_us": _percentile(latencies, 0.50) / 1000,
+        "p95_us": _percentile(latencies, 0.95) / 1000,
+        "p99_us": _percentile(latencies, 0.99) / 1000,
+    }
+
+
+def _percentile(values: list[int], share: float) -> float:
+    """Возвращает перцентиль отсортированного списка.
+
+    Args:
+        values: Отсортированные значения
+        share: Доля от 0 до 1
+
+    Returns:
+        float: Значение перцентиля
+    """
+    return values[min(len(values) - 1, int(len(values) * share))]
+
+
+def _compare(key: str, result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Сравнивает результат с базовым значением.
+
+    Args:
+        key: Ключ сценария (имя@размер)
+        result: Результат прогона
+        baseline: Базовые значения
+        tolerance: Допустимое относительное ухудшение
+
+    Returns:
+        list: Описания регрессий
+    """
+    base = baseline.get(key)
+    if base is None:
+        return []
+    regressions = []
+    if result["ops_per_s"] < base["ops_per_s"] * (1 - tolerance):
+        regressions.append(
+            f"{key}: пропускная способность {result['ops_per_s']:,.0f} "
+            f"против {base['ops_per_s']:,.0f} оп/с"
+        )
+    if result["p99_us"] > base["p99_us"] * (1 + tolerance):
+        regressions.append(
+            f"{key}: p99 {result['p99_us']:,.1f} против {base['p99_us']:,.1f} мкс"
+        )
+    if "peak_mib" in result and "peak_mib" in base and (
+        result["peak_mib"] > base["peak_mib"] * (1 + tolerance)
+    ):
+        regressions.append(
+            f"{key}: пиковая память {result['peak_mib']:.1f} "
+            f"против {base['peak_mib']:.1f} МиБ"
+        )
+    return regressions
+
+
+def main() -> int:
+    """Запускает выбранные сценарии и сравнивает результаты с базовыми.
+
+    Returns:
+        int: Код возврата процесса (1 при регрессии)
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help="размеры хранилища через запятую")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help="сценарии через запятую")
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="множитель числа операций")
+    parser.add_argument("--no-memory", action="store_true",
+                        help="не мерить пиковую память")
+    parser.add_argument("--baseline", default=BASELINE_FILE,
+                        help="файл базовых значений")
+    parser.add_argument("--save", action="store_true",
+                        help="сохранить результаты как базовые")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="допустимое ухудшение, доля")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    names = args.scenarios.split(",")
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"неизвестные сценарии: {', '.join(unknown)}")
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+
+    # Новый процесс на каждый прогон: чистые хранилище и куча
+    context = multiprocessing.get_context("spawn")
+    results, regressions = {}, []
+    print(f"{'сценарий':<16}{'размер':>9}{'операций':>10}{'оп/с':>12}"
+          f"{'p50 мкс':>11}{'p95 мкс':>11}{'p99 мкс':>11}{'пик МиБ':>10}")
+    for size in sizes:
+        for name in names:
+            ops = max(1, int(_ops_for(name, size) * args.scale))
+            with context.Pool(1, maxtasksperchild=1) as pool:
+                result = pool.apply(_run_scenario, ((name, size, ops, False),))
+            if not args.no_memory:
+                with context.Pool(1, maxtasksperchild=1) as pool:
+                    result.update(pool.apply(_run_scenario, ((name, size, ops, True),)))
+            key = f"{name}@{size}"
+            results[key] = result
+            found = _compare(key, result, baseline, args.tolerance)
+            regressions += found
+            peak = f"{result['peak_mib']:10.1f}" if "peak_mib" in result else f"{'-':>10}"
+            print(f"{name:<16}{size:>9}{ops:>10}{result['ops_per_s']:>12,.0f}"
+                  f"{result['p50_us']:>11,.1f}{result['p95_us']:>11,.1f}"
+                  f"{result['p99_us']:>11,.1f}{peak}{'  РЕГРЕССИЯ' if found else ''}",
+                  flush=True)
+
+    if args.save:
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(baseline, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write("\n")
+        print(f"базовые значения сохранены в {args.baseline}")
+    elif not baseline:
+        print(f"базовых значений нет ({args.baseline}): сохраните их прогоном "
+              "с --save до изменений, затем повторите без него")
+    else:
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}")
+        if regressions:
+            return 1
+        print("регрессий относительно базовых значений нет")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
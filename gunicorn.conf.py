@@ -0,0 +1,79 @@
+"""Настройки gunicorn для запуска API (gunicorn run:app).
+
+Приложение импортируется в мастер-процессе (preload_app), поэтому модули
+загружаются один раз, а воркеры разделяют их память с мастером в режиме
+копирования при записи. Импорт не загружает хранилище
+(CALENDAR_LAZY_LOAD). При CALENDAR_PRELOAD_STORE=1 мастер загружает его
+до запуска воркеров; иначе каждый воркер загружает хранилище в фоне после
+fork и сразу принимает соединения, а балансировщик узнает о готовности по
+/api/v1/ready/.
+
+Журнал CALENDAR_DATA_DIR может дописывать только один процесс, поэтому
+несколько воркеров запускаются с общей базой CALENDAR_SHARED_DB.
+
+Воркеры многопоточные (gthread): long-poll и поток Server-Sent Events
+журнала изменений держат поток до нескольких минут, и синхронный воркер
+на это время перестал бы принимать запросы, а мастер завершил бы его по
+timeout. У gthread воркера timeout относится к его главному циклу, а не к
+запросу; число одновременно открытых потоков изменений и долгих
+запросов на воркер ограничено CALENDAR_THREADS.
+"""
+
+import gc
+import os
+
+bind = os.environ.get("CALENDAR_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("CALENDAR_WORKERS", "1"))
+worker_class = "gthread"
+threads = int(os.environ.get("CALENDAR_THREADS", "32"))
+preload_app = True
+
+# Мастер не должен начинать фоновую загрузку при импорте приложения
+os.environ.setdefault("CALENDAR_LAZY_LOAD", "1")
+
+
+def on_starting(server):
+    """Проверяет настройки и загружает хранилище до запуска воркеров.
+
+    Args:
+        server: Мастер-процесс gunicorn
+
+    Raises:
+        RuntimeError: Если несколько воркеров запускаются без общей базы
+    """
+    if server.cfg.workers > 1 and not os.environ.get("CALENDAR_SHARED_DB"):
+        # Воркеры дописывали бы один журнал CALENDAR_DATA_DIR независимо
+        # друг от друга (или держали бы разные данные в памяти)
+        raise RuntimeError(
+            f"Для {server.cfg.workers} воркеров нужна общая база CALENDAR_SHARED_DB"
+        )
+    if os.environ.get("CALENDAR_PRELOAD_STORE", "") in ("", "0"):
+        return
+    import app.api as api  # pylint: disable=import-outside-toplevel
+
+    seconds = api.preload_store()
+    server.log.info("Хранилище событий загружено за %.3f с", seconds)
+
+
+def when_ready(server):
+    """Исключает загруженные объекты из сборки мусора перед fork.
+
+    Сборщик мусора меняет заголовки объектов, из-за чего общие с мастером
+    страницы памяти копировались бы в каждый воркер.
+
+    Args:
+        server: Мастер-процесс gunicorn
+    """
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    """Запускает фоновую загрузку хранилища в воркере.
+
+    Args:
+        server: Мастер-процесс gunicorn
+        worker: Воркер
+    """
+    import app.api as api  # pylint: disable=import-outside-toplevel
+
+    api.start_loading()
@@ -1,8 +1,17 @@
 """Точка входа"""
 
-from app.api import create_app
+import sys
+
+from flask.cli import FlaskGroup
+
+from app import create_app
 
 app = create_app()
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    if len(sys.argv) > 1 and sys.argv[1] != 'run':
+        # Команды Flask CLI, например: python run.py snapshot export backup.snapshot;
+        # python run.py run, как и прежде, запускает сервер разработки с debug
+        FlaskGroup(create_app=lambda: app)()
+    else:
+        app.run(debug=True)
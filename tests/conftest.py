@@ -0,0 +1,58 @@
+"""Общие фикстуры тестов.
+
+Общее хранилище app.api создается один раз на процесс, поэтому тесты API
+работают с отдельным календарем арендатора: у каждого теста свое пустое
+хранилище.
+"""
+
+import os
+import uuid
+
+import pytest
+
+# Тесты не должны упираться в ограничения частоты записи и снимков
+for _name in (
+    "CALENDAR_WRITE_RATE", "CALENDAR_GLOBAL_WRITE_RATE", "CALENDAR_MAX_CONCURRENT_WRITES",
+    "CALENDAR_SNAPSHOT_INTERVAL_SECONDS",
+):
+    os.environ[_name] = "0"
+# Токен администратора включает маршруты снимков
+SNAPSHOT_TOKEN = "test-token"
+MAX_SNAPSHOT_BYTES = 1 << 20
+os.environ["CALENDAR_SNAPSHOT_TOKEN"] = SNAPSHOT_TOKEN
+os.environ["CALENDAR_MAX_SNAPSHOT_BYTES"] = str(MAX_SNAPSHOT_BYTES)
+
+import app.api as api  # noqa: E402  pylint: disable=wrong-import-position
+from app.logic import EventsLogic  # noqa: E402  pylint: disable=wrong-import-position
+from app.model import Events  # noqa: E402  pylint: disable=wrong-import-position
+from app.sqlite_store import SQLiteEventsLogic  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def make_event(dates: str, title: str = "встреча", text: str = "текст") -> Events:
+    """Создает событие на дату."""
+    event = Events()
+    event.dates, event.title, event.text = dates, title, text
+    return event
+
+
+@pytest.fixture(scope="session")
+def client():
+    """Тестовый клиент Flask приложения."""
+    return api.create_app().test_client()
+
+
+@pytest.fixture
+def root() -> str:
+    """Корень API отдельного календаря для теста."""
+    return f"{api.API_ROOT}/t{uuid.uuid4().hex[:12]}"
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    """Хранилище в памяти и общее хранилище SQLite."""
+    if request.param == "memory":
+        logic = EventsLogic()
+    else:
+        logic = SQLiteEventsLogic(str(tmp_path / "calendar.db"))
+    yield logic
+    logic.close()
@@ -0,0 +1,27 @@
+"""Тесты допуска запросов на запись."""
+
+import pytest
+
+import app.admission as admission
+
+
+@pytest.mark.parametrize("forwarded_for, proxies, expected", [
+    (None, 1, "10.0.0.1"),
+    ("203.0.113.7", 0, "10.0.0.1"),  # прокси не доверяем: заголовок задал клиент
+    ("203.0.113.7", 1, "203.0.113.7"),
+    ("1.1.1.1, 203.0.113.7", 1, "203.0.113.7"),  # 1.1.1.1 подставил клиент
+    ("203.0.113.7, 192.168.0.2", 2, "203.0.113.7"),
+    ("203.0.113.7", 2, "10.0.0.1"),  # адресов меньше, чем прокси
+])
+def test_client_address(forwarded_for, proxies, expected):
+    """Адрес клиента берется из X-Forwarded-For только за доверенными прокси."""
+    assert admission.client_address("10.0.0.1", forwarded_for, proxies) == expected
+
+
+def test_rate_limit_per_client():
+    """Корзины клиентов независимы, отказ сообщает время до повтора."""
+    limiter = admission.RateLimiter(rate=1, burst=1)
+    assert limiter.acquire("a") is None
+    reason, wait = limiter.acquire("a")
+    assert reason == admission.REJECT_CLIENT and 0 < wait <= 1
+    assert limiter.acquire("b") is None
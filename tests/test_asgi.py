@@ -0,0 +1,46 @@
+"""Тесты встроенного HTTP сервера ASGI режима."""
+
+import asyncio
+
+import pytest
+
+import app.asgi as asgi
+
+
+async def _exchange(request: bytes) -> bytes:
+    """Отправляет запрос встроенному серверу и возвращает ответ целиком."""
+    async def handle(reader, writer) -> None:
+        connection = asgi._Connection(  # pylint: disable=protected-access
+            asgi.application, reader, writer
+        )
+        await connection.serve()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    async with server:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(request)
+        await writer.drain()
+        response = await asyncio.wait_for(reader.read(), 10)
+        writer.close()
+        return response
+
+
+@pytest.mark.parametrize("length", [b"abc", b"-5", b"+5", b"1_0"])
+def test_invalid_content_length(length):
+    """Неверная длина тела получает 400, а не обрывает соединение."""
+    response = asyncio.run(_exchange(
+        b"POST /api/v1/events/ HTTP/1.1\r\nHost: x\r\nContent-Length: " + length
+        + b"\r\n\r\n"
+    ))
+    assert response.startswith(b"HTTP/1.1 400 ")
+
+
+def test_valid_content_length():
+    """Тело с верной длиной передается обработчику."""
+    response = asyncio.run(_exchange(
+        b"POST /api/v1/events/ HTTP/1.1\r\nHost: x\r\nConnection: close\r\n"
+        b"Content-Length: 7\r\n\r\nbad-row"
+    ))
+    assert response.startswith(b"HTTP/1.1 400 ")
+    assert "Неверный формат данных".encode() in response
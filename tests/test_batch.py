@@ -0,0 +1,60 @@
+"""Тесты пакетных операций."""
+
+import pytest
+
+from app.logic import BatchError
+from app.persistence import OP_CREATE, OP_DELETE, OP_UPDATE
+from tests.conftest import make_event
+
+
+def _dates(store) -> list[tuple[str, str]]:
+    """Возвращает пары (дата, заголовок) всех событий хранилища."""
+    return [(event.dates, event.title) for event in store.iter_range()]
+
+
+def test_batch_is_atomic(store):
+    """При ошибке в любой записи пакета не применяется ничего."""
+    first = store.create(make_event("2024-01-01", "первое"))
+    before = _dates(store)
+
+    with pytest.raises(BatchError) as error:
+        store.apply_batch([
+            (OP_CREATE, None, make_event("2024-01-02")),
+            (OP_UPDATE, first, make_event("2024-01-03", "новое")),
+            (OP_UPDATE, "404", make_event("2024-01-04")),
+        ])
+    assert [message is None for message in error.value.errors] == [True, True, False]
+    assert _dates(store) == before
+    assert store.read_by_date("2024-01-02") is None
+
+
+def test_intra_batch_conflicts(store):
+    """Записи пакета не могут занять одну дату."""
+    with pytest.raises(BatchError) as error:
+        store.apply_batch([
+            (OP_CREATE, None, make_event("2024-01-01")),
+            (OP_CREATE, None, make_event("2024-01-01")),
+        ])
+    assert error.value.errors[0] is None
+    assert "записью 1 пакета" in error.value.errors[1]
+    assert _dates(store) == []
+
+
+def test_batch_reuses_freed_date(store):
+    """Дата, освобожденная записью пакета, доступна следующим записям."""
+    first = store.create(make_event("2024-01-01", "старое"))
+    ids = store.apply_batch([
+        (OP_DELETE, first, None),
+        (OP_CREATE, None, make_event("2024-01-01", "новое")),
+    ])
+    assert ids[0] == first
+    assert _dates(store) == [("2024-01-01", "новое")]
+
+
+def test_batch_api(client, root):
+    """API отвечает 400 с результатом каждой записи и не применяет пакет."""
+    response = client.post(f"{root}/events/batch/", data="2024-01-01|a|b\n2024-01-01|c|d")
+    assert response.status_code == 400
+    lines = response.get_data(as_text=True).splitlines()
+    assert lines[0].startswith("1|ok") and lines[1].startswith("2|error|")
+    assert client.get(f"{root}/events/").get_data() == b""
@@ -0,0 +1,68 @@
+"""Тесты сброса кэша списка и ETag при изменениях."""
+
+import gzip
+
+import pytest
+
+
+def _create(client, root: str, raw: str) -> str:
+    """Создает событие и возвращает его ID."""
+    response = client.post(f"{root}/events/", data=raw)
+    assert response.status_code == 201
+    return response.get_data(as_text=True).rsplit(" ", 1)[-1]
+
+
+@pytest.mark.parametrize("write", ["create", "update", "delete", "batch"])
+def test_list_and_etag_follow_writes(client, root, write):
+    """После записи полный список собирается заново, а старый ETag не подходит."""
+    _id = _create(client, root, "2024-01-01|a|старый текст")
+    cached = client.get(f"{root}/events/")
+    assert client.get(f"{root}/events/").get_data() == cached.get_data()  # из кэша
+
+    if write == "create":
+        _create(client, root, "2024-01-02|b|новый")
+        expected = f"{_id}|2024-01-01|a|старый текст\n"
+    elif write == "update":
+        assert client.put(f"{root}/events/{_id}/", data="2024-01-01|a|новый").status_code == 200
+        expected = f"{_id}|2024-01-01|a|новый\n"
+    elif write == "delete":
+        assert client.delete(f"{root}/events/{_id}/").status_code == 200
+        expected = ""
+    else:
+        response = client.post(f"{root}/events/batch/", data=f"{_id}|2024-01-01|a|новый")
+        assert response.status_code == 200
+        expected = f"{_id}|2024-01-01|a|новый\n"
+
+    response = client.get(f"{root}/events/", headers={"If-None-Match": cached.headers["ETag"]})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != cached.headers["ETag"]
+    assert response.get_data(as_text=True).startswith(expected)
+
+
+def test_event_etag(client, root):
+    """ETag события меняется при его изменении и не меняется от чужих записей."""
+    _id = _create(client, root, "2024-01-01|a|b")
+    etag = client.get(f"{root}/events/{_id}/").headers["ETag"]
+    _create(client, root, "2024-01-02|c|d")
+    assert client.get(
+        f"{root}/events/{_id}/", headers={"If-None-Match": etag}
+    ).status_code == 304
+
+    client.put(f"{root}/events/{_id}/", data="2024-01-01|a|новый")
+    response = client.get(f"{root}/events/{_id}/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert "новый" in response.get_data(as_text=True)
+
+
+def test_compressed_list_follows_writes(client, root):
+    """Сжатое тело кэша не переживает изменения событий."""
+    for day in range(1, 29):
+        _create(client, root, f"2024-02-{day:02d}|заголовок {day}|{'текст ' * 20}")
+    headers = {"Accept-Encoding": "gzip"}
+    first = client.get(f"{root}/events/", headers=headers)
+    assert first.headers["Content-Encoding"] == "gzip"
+
+    _create(client, root, "2024-03-01|последнее|x")
+    second = client.get(f"{root}/events/", headers=headers)
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert gzip.decompress(second.get_data()).decode().endswith("|2024-03-01|последнее|x\n")
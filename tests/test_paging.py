@@ -0,0 +1,40 @@
+"""Тесты постраничной выдачи списка событий."""
+
+import asyncio
+
+import pytest
+
+import app.api as api
+from tests.test_asgi import _exchange
+
+INVALID_LIMITS = ["abc", "0", "-1", "1.5", str(api.MAX_LIST_LIMIT + 1), "9" * 5000]
+
+
+@pytest.mark.parametrize("limit", INVALID_LIMITS)
+def test_invalid_limit(client, root, limit):
+    """Неверный или слишком большой limit получает 400, а не весь список."""
+    assert client.post(f"{root}/events/", data="2024-01-01|a|b").status_code == 201
+    assert client.get(f"{root}/events/?limit={limit}").status_code == 400
+
+
+@pytest.mark.parametrize("limit", INVALID_LIMITS)
+def test_invalid_limit_asgi(limit):
+    """Быстрый путь ASGI проверяет limit так же."""
+    response = asyncio.run(_exchange(
+        f"GET /api/v1/events/?limit={limit} HTTP/1.1\r\nHost: x\r\n"
+        "Connection: close\r\n\r\n".encode()
+    ))
+    assert response.startswith(b"HTTP/1.1 400 ")
+
+
+def test_pages(client, root):
+    """Страницы по limit связаны курсором X-Next-Cursor."""
+    for day in range(1, 4):
+        assert client.post(f"{root}/events/", data=f"2024-01-0{day}|a|b").status_code == 201
+    first = client.get(f"{root}/events/?limit=2")
+    assert first.status_code == 200
+    assert len(first.get_data(as_text=True).splitlines()) == 2
+    cursor = first.headers["X-Next-Cursor"]
+    second = client.get(f"{root}/events/?limit={api.MAX_LIST_LIMIT}&cursor={cursor}")
+    assert len(second.get_data(as_text=True).splitlines()) == 1
+    assert "X-Next-Cursor" not in second.headers
@@ -0,0 +1,62 @@
+"""Тесты журнала постоянного хранилища."""
+
+import gc
+import os
+import weakref
+
+import app.persistence as persistence
+from app.logic import EventsLogic
+from app.model import Events
+from tests.conftest import make_event
+
+
+def _open(data_dir) -> persistence.JournalPersistence:
+    """Открывает журнал в каталоге и загружает его."""
+    journal = persistence.JournalPersistence(str(data_dir))
+    journal.load()
+    return journal
+
+
+def test_closed_journals_are_released(tmp_path):
+    """Закрытый журнал не удерживается обработчиками atexit и fork."""
+    journal = _open(tmp_path)
+    assert journal in persistence._open_journals  # pylint: disable=protected-access
+    ref = weakref.ref(journal)
+    journal.close()
+    journal._flusher.join()  # pylint: disable=protected-access
+    del journal
+    gc.collect()
+    assert ref() is None
+
+
+def test_fork_keeps_journal_consistent(tmp_path):
+    """Буфер журнала сбрасывается перед fork() и не дублируется в дочернем процессе."""
+    journal = _open(tmp_path)
+    event = Events()
+    event.dates, event.title, event.text = "2024-01-01", "a", "b"
+    journal.append(persistence.OP_CREATE, "1", event)
+    pid = os.fork()
+    if pid == 0:
+        journal.close()  # сбрасывает буфер, унаследованный от родителя
+        os._exit(0)
+    os.waitpid(pid, 0)
+    journal.close()
+    with open(tmp_path / persistence.JOURNAL_FILE, encoding="utf-8") as file:
+        assert len(file.readlines()) == 1
+
+
+def test_batch_with_missing_delete_reloads(tmp_path):
+    """Удаление отсутствующего события в пакете не портит журнал."""
+    logic = EventsLogic(persistence.JournalPersistence(str(tmp_path)))
+    ids = logic.apply_batch([
+        (persistence.OP_CREATE, None, make_event("2024-01-01")),
+        (persistence.OP_DELETE, "abc", None),
+        (persistence.OP_DELETE, "1000000", None),
+    ])
+    assert ids == ["1", "abc", "1000000"]
+    logic.close()
+
+    logic = EventsLogic(persistence.JournalPersistence(str(tmp_path)))
+    assert [event.dates for event in logic.iter_range()] == ["2024-01-01"]
+    assert logic.create(make_event("2024-01-02")) == "2"
+    logic.close()
@@ -0,0 +1,27 @@
+"""Тесты доступа к маршрутам профилирования."""
+
+import app.api as api
+import app.metrics as metrics
+from tests.conftest import SNAPSHOT_TOKEN
+
+AUTH = {"Authorization": f"Bearer {SNAPSHOT_TOKEN}"}
+
+
+def test_profiler_requires_admin_token(client):
+    """Без верного токена администратора профилирование недоступно."""
+    before = metrics.PROFILER.settings()
+    options = {"enabled": True, "sample_rate": 1, "threshold_ms": 0}
+    for headers in ({}, {"Authorization": "Bearer wrong"}):
+        response = client.put(f"{api.PROFILER_API_ROOT}/", json=options, headers=headers)
+        assert response.status_code == 403
+        assert client.get(f"{api.PROFILER_API_ROOT}/", headers=headers).status_code == 403
+        assert client.get(f"{api.PROFILER_API_ROOT}/any", headers=headers).status_code == 403
+    assert metrics.PROFILER.settings() == before
+
+
+def test_profiler_with_admin_token(client):
+    """С токеном администратора настройки профилирования доступны."""
+    response = client.get(f"{api.PROFILER_API_ROOT}/", headers=AUTH)
+    assert response.status_code == 200
+    assert "settings" in response.get_json()
+    assert client.get(f"{api.PROFILER_API_ROOT}/any", headers=AUTH).status_code == 404
@@ -0,0 +1,81 @@
+"""Тесты правил повторения."""
+
+import pytest
+
+import app.formats as formats
+import app.recurrence as recurrence
+from app.logic import BatchError, DateConflictError
+from app.persistence import OP_CREATE
+from tests.conftest import make_event
+
+
+def _create_weekly_rule(client, root: str) -> str:
+    """Создает еженедельное правило из 4 повторений с 2024-01-01 и возвращает его ID."""
+    response = client.post(f"{root}/recurring/", json={
+        "date": "2024-01-01", "title": "планерка", "text": "еженедельно",
+        "freq": "weekly", "count": 4,
+    })
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_binary_range_with_occurrences(client, root):
+    """Повторения правил кодируются в двоичном формате и с limit, и потоком."""
+    client.post(f"{root}/events/", data="2024-01-03|встреча|текст")
+    rule_id = _create_weekly_rule(client, root)
+    headers = {"Accept": formats.BINARY}
+
+    for query in ("from=2024-01-01&to=2024-01-31", "from=2024-01-01&to=2024-01-31&limit=10"):
+        response = client.get(f"{root}/events/?{query}", headers=headers)
+        assert response.status_code == 200
+        events = list(formats.decode_stream(response.get_data()))
+        assert [(event.id, event.dates) for event in events] == [
+            (rule_id, "2024-01-01"), ("1", "2024-01-03"), (rule_id, "2024-01-08"),
+            (rule_id, "2024-01-15"), (rule_id, "2024-01-22"),
+        ]
+
+
+def test_rule_conflicts(store):
+    """Повторения правила не пересекаются с событиями и другими правилами."""
+    store.create(make_event("2024-01-03"))
+    rule_id = store.create_rule(recurrence.Rule.from_dict({
+        "date": "2024-01-01", "title": "планерка", "text": "", "freq": "weekly", "count": 4,
+    }))
+
+    for item in (
+        {"date": "2024-01-02", "freq": "daily", "count": 3},  # событие 2024-01-03
+        {"date": "2024-01-15", "freq": "monthly", "count": 2},  # повторение rule_id
+    ):
+        with pytest.raises(DateConflictError):
+            store.create_rule(recurrence.Rule.from_dict({"title": "", "text": "", **item}))
+    with pytest.raises(DateConflictError, match=rule_id):
+        store.create(make_event("2024-01-08"))
+    with pytest.raises(BatchError):
+        store.apply_batch([
+            (OP_CREATE, None, make_event("2024-02-01")),
+            (OP_CREATE, None, make_event("2024-01-22")),
+        ])
+    assert store.read_by_date("2024-02-01") is None
+    assert store.read_by_date("2024-01-22").id == rule_id
+    assert store.month_bitmap(2024, 1) == 1 << 0 | 1 << 2 | 1 << 7 | 1 << 14 | 1 << 21
+    assert store.free_days("2024-01-01", 2) == ["2024-01-02", "2024-01-04"]
+
+    store.delete_rule(rule_id)
+    store.create(make_event("2024-01-08"))
+    assert [event.dates for event in store.iter_range()] == ["2024-01-03", "2024-01-08"]
+
+
+def test_series_length_is_capped(client, root):
+    """Серия с until длиннее MAX_COUNT повторений отклоняется."""
+    response = client.post(f"{root}/recurring/", json={
+        "date": "2024-01-01", "title": "", "text": "", "freq": "daily", "until": "9999-12-31",
+    })
+    assert response.status_code == 400
+
+    response = client.post(f"{root}/recurring/", json={
+        "date": "2024-01-30", "title": "", "text": "", "freq": "daily", "until": "2024-03-02",
+    })
+    assert response.status_code == 201
+    stats = client.get(f"{root}/events/stats/").get_json()
+    assert stats["months"] == {"2024-01": 2, "2024-02": 29, "2024-03": 2}
+    assert stats["total"] == 33
@@ -0,0 +1,111 @@
+"""Тесты выгрузки и загрузки двоичных снимков."""
+
+import io
+
+import pytest
+
+import app.snapshot as snapshot
+from tests.conftest import MAX_SNAPSHOT_BYTES, SNAPSHOT_TOKEN, make_event
+
+AUTH = {"Authorization": f"Bearer {SNAPSHOT_TOKEN}"}
+
+
+def _fill(client, root: str) -> None:
+    """Создает в календаре два события и правило повторения."""
+    for raw in ("2024-01-03|встреча|текст", "2024-02-10|отпуск|море"):
+        assert client.post(f"{root}/events/", data=raw).status_code == 201
+    assert client.post(f"{root}/recurring/", json={
+        "date": "2024-01-01", "title": "планерка", "text": "", "freq": "weekly", "count": 4,
+    }).status_code == 201
+
+
+def _listing(client, root: str) -> list:
+    """Возвращает все события календаря с повторениями за 2024 год."""
+    return client.get(f"{root}/events/?from=2024-01-01&to=2024-12-31").get_data(as_text=True)
+
+
+def _import(client, root: str, data: bytes):
+    """Загружает снимок в календарь."""
+    return client.put(
+        f"{root}/snapshot/", data=data,
+        headers={**AUTH, "Content-Type": snapshot.MIMETYPE},
+    )
+
+
+@pytest.mark.parametrize("headers", [{}, {"Authorization": "Bearer wrong"}])
+def test_requires_admin_token(client, root, headers):
+    """Без токена администратора снимки недоступны."""
+    assert client.get(f"{root}/snapshot/", headers=headers).status_code == 401
+    assert client.put(f"{root}/snapshot/", data=b"", headers=headers).status_code == 401
+
+
+def test_round_trip(client, root):
+    """Снимок переносит события и правила в другой календарь."""
+    _fill(client, root)
+    exported = client.get(f"{root}/snapshot/", headers=AUTH)
+    assert exported.status_code == 200
+    assert exported.headers["X-Events-Count"] == "2"
+
+    target = root + "-copy"
+    response = _import(client, target, exported.get_data())
+    assert response.status_code == 200
+    assert response.get_json()["events"] == 2
+    assert response.get_json()["rules"] == 1
+    assert _listing(client, target) == _listing(client, root)
+    # ID новых событий продолжают ID снимка
+    assert client.post(f"{target}/events/", data="2024-03-01|a|b").get_data(as_text=True) \
+        == client.post(f"{root}/events/", data="2024-03-01|a|b").get_data(as_text=True)
+
+
+def test_corrupt_snapshot_is_rejected(client, root):
+    """Поврежденный снимок отклоняется и не меняет данные."""
+    _fill(client, root)
+    before = _listing(client, root)
+    data = client.get(f"{root}/snapshot/", headers=AUTH).get_data()
+
+    for corrupt in (b"garbage", data[:-3], b"X" + data[1:]):
+        assert _import(client, root, corrupt).status_code == 400
+    assert _listing(client, root) == before
+
+
+def test_size_limit(client, root):
+    """Снимок больше MAX_SNAPSHOT_BYTES отклоняется с 413."""
+    assert _import(client, root, b"\0" * (MAX_SNAPSHOT_BYTES + 1)).status_code == 413
+
+
+def _snapshot_with(events: list, rules: list[dict]) -> bytes:
+    """Собирает снимок из событий и правил в обход проверок хранилища."""
+    for number, event in enumerate(events, 1):
+        event.id = str(number)
+    file = io.BytesIO()
+    snapshot.write(file, events, len(events), len(events), rules)
+    return file.getvalue()
+
+
+WEEKLY = {"date": "2024-01-01", "title": "планерка", "text": "", "freq": "weekly", "count": 4}
+
+
+@pytest.mark.parametrize("rules", [
+    [{**WEEKLY, "id": None}],
+    [{**WEEKLY, "id": 5}],
+    [{**WEEKLY, "id": "1"}],
+    [{**WEEKLY, "id": "r1"}, {**WEEKLY, "date": "2025-01-01", "id": "r1"}],
+    [{**WEEKLY, "freq": "hourly", "id": "r1"}],
+], ids=["null", "number", "event-id", "duplicate", "freq"])
+def test_invalid_rules_are_rejected(client, root, rules):
+    """Снимок с неверным правилом отклоняется с 400."""
+    assert _import(client, root, _snapshot_with([], rules)).status_code == 400
+
+
+@pytest.mark.parametrize("events, rules", [
+    ([make_event("2024-01-08")], [{**WEEKLY, "id": "r1"}]),
+    ([], [{**WEEKLY, "id": "r1"}, {**WEEKLY, "date": "2024-01-15", "id": "r2"}]),
+], ids=["event", "rule"])
+def test_conflicting_rules_are_rejected(client, root, events, rules):
+    """Повторения правил снимка не могут занимать даты событий и других правил."""
+    _fill(client, root)
+    before = _listing(client, root)
+    response = _import(client, root, _snapshot_with(events, rules))
+    assert response.status_code == 400
+    assert "совпада" in response.get_data(as_text=True)
+    assert _listing(client, root) == before
@@ -0,0 +1,63 @@
+"""Тесты реестра календарей арендаторов."""
+
+import time
+
+import pytest
+
+import app.tenants as tenants
+from app.logic import EventsLogic
+from app.model import Events
+
+
+def _registry(**kwargs) -> tenants.TenantRegistry:
+    """Создает реестр с хранилищами в памяти."""
+    return tenants.TenantRegistry(lambda name: (EventsLogic(), None), **kwargs)
+
+
+def _use(registry: tenants.TenantRegistry, name: str) -> tenants.Tenant:
+    """Выполняет пустой запрос к календарю."""
+    tenant = registry.acquire(name)
+    registry.release(tenant)
+    return tenant
+
+
+def test_idle_tenants_are_swept_without_requests():
+    """Простаивающий календарь выгружается фоновым потоком без новых запросов."""
+    registry = _registry(idle_seconds=0.05)
+    tenant = _use(registry, "acme")
+    deadline = time.monotonic() + 5
+    while registry.loaded() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert registry.loaded() == 0
+    assert registry.evictions == 1
+    assert tenant.logic is None
+
+
+def test_in_memory_tenants_with_data_are_kept():
+    """Без хранения на диске выгружаются только пустые календари."""
+    registry = _registry(idle_seconds=0, persistent=False)
+    tenant = registry.acquire("full")
+    event = Events()
+    event.dates, event.title, event.text = "2024-01-01", "a", "b"
+    tenant.logic.create(event)
+    registry.release(tenant)
+    _use(registry, "empty")
+    registry.configure(1e-9, persistent=False)
+
+    assert registry.sweep() == 1
+    assert registry.acquire("full").logic.count() == 1
+
+
+def test_tenant_limit():
+    """При достижении предела выгружается дольше всех простаивающий календарь."""
+    registry = _registry(idle_seconds=0, max_tenants=2, persistent=False)
+    first = _use(registry, "first")
+    _use(registry, "second")
+    _use(registry, "third")
+    assert first.logic is None and registry.loaded() == 2
+
+    busy = [registry.acquire("second"), registry.acquire("third")]
+    with pytest.raises(tenants.TenantLimitError):
+        registry.acquire("fourth")
+    for tenant in busy:
+        registry.release(tenant)